@@ -3,3 +3,5 @@ DAQ package per adquisició de dades amb NI-DAQmx
 """
 from .acquisition import DAQAcquisition
 from .sensor import AWP24Sensor, SensorManager
+from .process import AcquisitionProcess
+from .engine import AcquisitionEngine, EngineOutput
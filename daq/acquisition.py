@@ -34,11 +34,13 @@ except OSError as e:
     raise
 
 import numpy as np
+import threading
 import time
 from typing import Optional, Tuple
 from utils.config import (
     AI_CHANNELS, DO_CHANNELS, VOLTAGE_RANGE_MIN, VOLTAGE_RANGE_MAX,
-    SAMPLE_RATE, BUFFER_SIZE, SENSOR_STABILIZATION_TIME
+    SAMPLE_RATE, BUFFER_SIZE, SENSOR_STABILIZATION_TIME,
+    MONITOR_SAMPLE_RATE, MONITOR_BUFFER_SIZE
 )
 
 
@@ -52,6 +54,13 @@ class DAQAcquisition:
         self.monitor_ai_task: Optional[nidaqmx.Task] = None  # Tasca separada per monitorització
         self.is_running = False
         self.using_simulation = USING_MOCK
+        self.sensors_active = False  # Estat actual de les sortides digitals
+        
+        # Monitorització contínua en segon pla (vegeu daq.monitor.MonitorReader)
+        self.monitor_running = False  # Tasca de monitorització en marxa
+        self.monitor_active = False   # Un fil de fons és el propietari de la monitorització
+        self.latest_values: Optional[Tuple[float, float]] = None
+        self._latest_lock = threading.Lock()
         
     def setup_tasks(self):
         """Configura les tasques DAQmx per entrada analògica i sortida digital."""
@@ -78,7 +87,7 @@ class DAQAcquisition:
             for channel in DO_CHANNELS:
                 self.do_task.do_channels.add_do_chan(channel)
             
-            # Crear tasca separada per monitorització (lectura puntual)
+            # Crear tasca separada per monitorització (puntual o contínua a baixa freqüència)
             self.monitor_ai_task = nidaqmx.Task()
             self.monitor_ai_task.ai_channels.add_ai_voltage_chan(
                 AI_CHANNELS,
@@ -100,9 +109,14 @@ class DAQAcquisition:
             if self.do_task is None:
                 return False, "Tasca de sortida digital no inicialitzada"
             
+            # Les sortides només s'escriuen quan canvia l'estat
+            if self.sensors_active:
+                return True, ""
+            
             # Activar tots els canals (DO0 i DO1)
             num_channels = len(DO_CHANNELS)
             self.do_task.write([True] * num_channels)
+            self.sensors_active = True
             
             # Esperar estabilització
             time.sleep(SENSOR_STABILIZATION_TIME)
@@ -115,9 +129,10 @@ class DAQAcquisition:
     def deactivate_sensors(self):
         """Desactiva les sortides digitals."""
         try:
-            if self.do_task is not None:
+            if self.do_task is not None and self.sensors_active:
                 num_channels = len(DO_CHANNELS)
                 self.do_task.write([False] * num_channels)
+            self.sensors_active = False
             return True, ""
         except Exception as e:
             return False, f"Error desactivant sensors: {str(e)}"
@@ -160,10 +175,111 @@ class DAQAcquisition:
         except Exception as e:
             return False, f"Error llegint mostres: {str(e)}", None
     
+    def start_monitoring(self):
+        """Posa en marxa la tasca de monitorització contínua a baixa freqüència."""
+        try:
+            if self.monitor_ai_task is None:
+                return False, "Tasca de monitorització no inicialitzada"
+            if self.monitor_running:
+                return True, ""
+            
+            self.monitor_ai_task.timing.cfg_samp_clk_timing(
+                rate=MONITOR_SAMPLE_RATE,
+                sample_mode=nidaqmx.constants.AcquisitionType.CONTINUOUS,
+                samps_per_chan=MONITOR_BUFFER_SIZE
+            )
+            self.monitor_ai_task.start()
+            self.monitor_running = True
+            return True, ""
+            
+        except Exception as e:
+            return False, f"Error iniciant monitorització: {str(e)}"
+    
+    def read_monitor_block(self) -> Tuple[bool, str, Optional[np.ndarray]]:
+        """
+        Llegeix totes les mostres disponibles de la tasca de monitorització.
+        Actualitza els últims valors (mitjana del bloc) que retorna read_current_values.
+        
+        Returns:
+            Tupla (success, error_message, data) amb data de forma (2, n)
+        """
+        try:
+            if self.monitor_ai_task is None or not self.monitor_running:
+                return False, "Monitorització no iniciada", None
+            
+            data = self.monitor_ai_task.read(
+                number_of_samples_per_channel=nidaqmx.constants.READ_ALL_AVAILABLE
+            )
+            data_array = np.array(data, dtype=np.float64).reshape(2, -1)
+            
+            if data_array.shape[1] > 0:
+                with self._latest_lock:
+                    self.latest_values = (float(data_array[0].mean()),
+                                          float(data_array[1].mean()))
+            return True, "", data_array
+            
+        except Exception as e:
+            return False, f"Error llegint monitorització: {str(e)}", None
+    
+    def stop_monitoring(self):
+        """Atura la tasca de monitorització contínua."""
+        try:
+            if self.monitor_ai_task is not None and self.monitor_running:
+                self.monitor_ai_task.stop()
+            self.monitor_running = False
+            return True, ""
+        except Exception as e:
+            self.monitor_running = False
+            return False, f"Error aturant monitorització: {str(e)}"
+    
+    def read_burst(self, num_samples: int) -> Tuple[bool, str, Optional[np.ndarray]]:
+        """
+        Llegeix una ràfega finita de mostres a la freqüència completa amb la tasca
+        de monitorització (p.ex. per capturar un punt de calibratge). La tasca
+        contínua ha d'estar aturada; qui crida la torna a engegar després.
+        
+        Args:
+            num_samples: Nombre de mostres a llegir per canal
+            
+        Returns:
+            Tupla (success, error_message, data) amb data de forma (2, num_samples)
+        """
+        try:
+            if self.is_running:
+                return False, "No es pot capturar durant adquisició", None
+            if self.monitor_ai_task is None:
+                return False, "Tasca de monitorització no inicialitzada", None
+            if self.monitor_running:
+                return False, "Cal aturar la monitorització contínua abans de la ràfega", None
+            
+            success, msg = self.activate_sensors()
+            if not success:
+                return False, msg, None
+            
+            self.monitor_ai_task.timing.cfg_samp_clk_timing(
+                rate=SAMPLE_RATE,
+                sample_mode=nidaqmx.constants.AcquisitionType.FINITE,
+                samps_per_chan=num_samples
+            )
+            self.monitor_ai_task.start()
+            try:
+                data = self.monitor_ai_task.read(
+                    number_of_samples_per_channel=num_samples,
+                    timeout=num_samples / SAMPLE_RATE + 5.0
+                )
+            finally:
+                self.monitor_ai_task.stop()
+            
+            return True, "", np.array(data, dtype=np.float64).reshape(2, -1)
+            
+        except Exception as e:
+            return False, f"Error llegint ràfega: {str(e)}", None
+    
     def read_current_values(self) -> Tuple[bool, str, Optional[Tuple[float, float]]]:
         """
         Llegeix valors puntuals dels sensors per monitorització.
-        Utilitza una tasca separada que no interfereix amb l'adquisició.
+        Utilitza una tasca separada que no interfereix amb l'adquisició. Si la
+        monitorització contínua està activa, retorna l'última lectura sense bloquejar.
         
         Returns:
             Tupla (success, error_message, (voltage1, voltage2))
@@ -173,14 +289,22 @@ class DAQAcquisition:
             if self.is_running:
                 return False, "No es pot monitoritzar durant adquisició", None
             
+            # El fil de monitorització és l'únic que accedeix al hardware
+            if self.monitor_active:
+                with self._latest_lock:
+                    values = self.latest_values
+                if values is None:
+                    return False, "Esperant la primera lectura de monitorització", None
+                return True, "", values
+            
             # Utilitzar la tasca de monitorització
             if self.monitor_ai_task is None:
                 return False, "Tasca de monitorització no inicialitzada", None
             
-            # Assegurar que els sensors estan activats
-            if self.do_task is not None:
-                num_channels = len(DO_CHANNELS)
-                self.do_task.write([True] * num_channels)
+            # Assegurar que els sensors estan activats (només s'escriu si cal)
+            success, msg = self.activate_sensors()
+            if not success:
+                return False, msg, None
             
             # Llegir una mostra de cada canal
             values = self.monitor_ai_task.read(number_of_samples_per_channel=1)
@@ -245,6 +369,7 @@ class DAQAcquisition:
                 self.ai_task = None
             
             # Tancar tasca de monitorització
+            self.monitor_running = False
             if self.monitor_ai_task is not None:
                 try:
                     self.monitor_ai_task.close()
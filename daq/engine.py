@@ -0,0 +1,361 @@
+"""
+Motor d'adquisició asíncron (asyncio)
+Compon la lectura, el processament i les sortides (emmagatzematge, difusió,
+avisos...) com a tasques concurrents unides per cues limitades:
+
+    lectura → cua → processament → una cua per sortida → sortida
+
+Les crides bloquejants del DAQ s'executen en un fil propi de cada motor, i la
+lectura mai espera les etapes següents: si una cua és plena, l'element es
+descarta i es compta, de manera que afegir sortides no afegeix latència al bucle
+de lectura. Les sortides sense pèrdues (l'emmagatzematge) són l'excepció: el
+processament espera que hi hagi lloc a la seva cua, i només si la lectura
+s'avança fins a omplir la cua de blocs llegits es perden blocs (lost_blocks).
+Un mateix procés (p.ex. el servei sense interfície, vegeu headless.py) pot
+executar diversos motors alhora.
+"""
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from daq.acquisition import DAQAcquisition
+from daq.sensor import SensorManager
+from data.events import EventEngine
+from utils.calibration import CalibrationManager
+from utils.config import SAMPLE_RATE, DEFAULT_SAMPLING_PERIOD, ENGINE_QUEUE_SIZE, ENGINE_FLUSH_INTERVAL
+
+
+class EngineOutput:
+    """Sortida del motor amb la seva cua limitada."""
+
+    def __init__(self, name: str, handler: Callable, queue_size: int = ENGINE_QUEUE_SIZE,
+                 close: Optional[Callable] = None, lossless: bool = False):
+        """
+        Inicialitza la sortida.
+
+        Args:
+            name: Nom de la sortida (per a les estadístiques)
+            handler: Funció o corutina que rep cada registre processat
+            queue_size: Registres pendents màxims abans de descartar-ne (o d'esperar)
+            close: Funció o corutina opcional que es crida en acabar
+            lossless: Si és True, mai es descarten registres: amb la cua plena s'espera
+        """
+        self.name = name
+        self.handler = handler
+        self.close = close
+        self.lossless = lossless
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+
+    def offer(self, record: dict):
+        """Encua un registre sense esperar (si la cua és plena, es descarta)."""
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def put(self, record: dict):
+        """Encua un registre: les sortides sense pèrdues esperen lloc, la resta el descarten."""
+        if self.lossless:
+            await self.queue.put(record)
+        else:
+            self.offer(record)
+
+    async def run(self):
+        """Consumeix la cua fins a rebre el senyal de final (None)."""
+        while True:
+            record = await self.queue.get()
+            if record is None:
+                break
+            try:
+                await _maybe_await(self.handler(record))
+            except Exception as e:
+                print(f"Error a la sortida '{self.name}': {e}")
+        if self.close is not None:
+            await _maybe_await(self.close())
+
+
+async def _maybe_await(result):
+    """Espera el resultat si és una corutina (les sortides poden ser síncrones)."""
+    if inspect.isawaitable(result):
+        await result
+
+
+class AcquisitionEngine:
+    """Pipeline asíncron d'adquisició: lectura, processament i sortides."""
+
+    def __init__(self, daq: Optional[DAQAcquisition] = None,
+                 period: float = DEFAULT_SAMPLING_PERIOD,
+                 sensor_manager: Optional[SensorManager] = None,
+                 calibration_manager: Optional[CalibrationManager] = None,
+                 event_engine: Optional[EventEngine] = None,
+                 queue_size: int = ENGINE_QUEUE_SIZE):
+        """
+        Inicialitza el motor.
+
+        Args:
+            daq: Sistema d'adquisició (per defecte un de nou)
+            period: Durada de cada bloc llegit (s)
+            sensor_manager: Compensació de deriva i agregació dels blocs
+            calibration_manager: Conversió a alçades
+            event_engine: Regles d'esdeveniments (per defecte EVENT_RULES)
+            queue_size: Blocs llegits pendents de processar abans de descartar-ne
+        """
+        self.daq = daq or DAQAcquisition()
+        self.period = period
+        self.block_samples = int(SAMPLE_RATE * period)
+        self.sensor_manager = sensor_manager or SensorManager()
+        self.calibration_manager = calibration_manager or CalibrationManager()
+        self.event_engine = event_engine or EventEngine()
+        self.queue_size = queue_size
+        self.outputs: List[EngineOutput] = []
+        self.blocks = 0        # Blocs processats
+        self.lost_blocks = 0   # Blocs descartats perquè el processament no donava l'abast
+        self.rejected_totals = np.zeros(len(self.sensor_manager.sensors), dtype=np.int64)
+        self.rejected_blocks = 0
+        self.error = ""
+        self.is_running = False
+        self._stop_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Un fil per motor: les lectures bloquejants no competeixen entre motors
+        self._daq_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="DAQRead")
+
+    def add_output(self, name: str, handler: Callable, queue_size: Optional[int] = None,
+                   close: Optional[Callable] = None, lossless: bool = False) -> EngineOutput:
+        """
+        Afegeix una sortida (abans de run()).
+
+        Args:
+            name: Nom de la sortida
+            handler: Funció o corutina que rep cada registre
+                {'index', 'time', 'voltages', 'heights', 'events', 'rejected'}
+            queue_size: Mida de la cua (per defecte la del motor)
+            close: Funció o corutina que es crida en acabar la mesura
+            lossless: Si és True, el processament espera la sortida en lloc de
+                descartar registres (p.ex. l'emmagatzematge)
+
+        Returns:
+            La sortida creada
+        """
+        output = EngineOutput(name, handler, queue_size or self.queue_size, close, lossless)
+        self.outputs.append(output)
+        return output
+
+    def stop(self):
+        """Demana l'aturada del motor (es pot cridar des de qualsevol fil)."""
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def run_metadata(self) -> dict:
+        """Metadades de la mesura fins ara (com MainWindow.update_run_metadata)."""
+        metadata = {'lost_blocks': self.lost_blocks}
+        compensator = self.sensor_manager.compensator
+        if compensator.enabled:
+            metadata['drift_compensation'] = compensator.parameters()
+        if self.event_engine.enabled:
+            metadata['events'] = list(self.event_engine.events)  # L'escriptura es fa en un altre fil
+        if self.sensor_manager.aggregator != 'mean':
+            metadata['block_aggregator'] = {
+                'method': self.sensor_manager.aggregator,
+                'rejected_samples': self.rejected_totals.tolist(),
+                'blocks_with_rejections': self.rejected_blocks
+            }
+        return metadata
+
+    def metrics(self) -> dict:
+        """Comptadors del motor."""
+        return {
+            'blocks': self.blocks,
+            'lost_blocks': self.lost_blocks,
+            'dropped': {output.name: output.dropped for output in self.outputs},
+            'events': len(self.event_engine.events),
+            'rejected_samples': self.rejected_totals.tolist()
+        }
+
+    async def run(self, duration: Optional[float] = None) -> Tuple[bool, str]:
+        """
+        Executa la mesura fins a stop() o fins a esgotar la durada.
+
+        Args:
+            duration: Durada màxima (s), None per continuar fins a stop()
+
+        Returns:
+            Tupla (success, error_message)
+        """
+        if self.daq.using_simulation:
+            # Les lectures es fan al fil del motor: poden esperar el rellotge simulat
+            from simulation.mock_daq import enable_paced_reads
+            enable_paced_reads()
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self.error = ""
+        self.blocks = 0
+        self.lost_blocks = 0
+        self.rejected_totals[:] = 0
+        self.rejected_blocks = 0
+        self.sensor_manager.compensator.reset()
+        self.event_engine.reset()
+
+        for step in (self.daq.setup_tasks, self.daq.activate_sensors, self.daq.start_acquisition):
+            success, msg = await self._loop.run_in_executor(self._daq_executor, step)
+            if not success:
+                await self._loop.run_in_executor(self._daq_executor, self.daq.cleanup)
+                return False, msg
+
+        self.is_running = True
+        raw: asyncio.Queue = asyncio.Queue(self.queue_size)
+        consumers = [asyncio.create_task(output.run()) for output in self.outputs]
+        processor = asyncio.create_task(self._process(raw))
+        reader = asyncio.create_task(self._read(raw, duration))
+        try:
+            await reader
+        finally:
+            # Final ordenat: es processa el que ja s'ha llegit i es tanquen les sortides
+            await raw.put(None)
+            await processor
+            for output in self.outputs:
+                await output.queue.put(None)
+            await asyncio.gather(*consumers)
+            await self._loop.run_in_executor(self._daq_executor, self.daq.cleanup)
+            self.is_running = False
+        return not self.error, self.error
+
+    async def _read(self, raw: asyncio.Queue, duration: Optional[float]):
+        """Tasca de lectura: només llegeix i encua, mai espera el processament."""
+        index = 0
+        while not self._stop_event.is_set():
+            if duration is not None and index * self.period >= duration:
+                break
+            success, msg, data = await self._loop.run_in_executor(
+                self._daq_executor, self.daq.read_samples, self.block_samples
+            )
+            if not success:
+                self.error = msg
+                break
+            try:
+                raw.put_nowait((index, data))
+            except asyncio.QueueFull:
+                self.lost_blocks += 1
+            index += 1
+
+    async def _process(self, raw: asyncio.Queue):
+        """Tasca de processament: deriva, agregació, alçades i esdeveniments."""
+        while True:
+            item = await raw.get()
+            if item is None:
+                break
+            index, data = item
+            t = index * self.period
+            try:
+                block = self.sensor_manager.compensate(data, t)
+                voltages = self.sensor_manager.process_multi_channel_data(block)
+                events = self.event_engine.process(t, block, self._event_heights(block)) \
+                    if self.event_engine.enabled else []
+            except Exception as e:
+                self.error = f"Error processant dades: {str(e)}"
+                self._stop_event.set()
+                continue
+            self.blocks += 1
+            rejected = self.sensor_manager.last_rejected
+            if rejected.any():
+                self.rejected_totals += rejected
+                self.rejected_blocks += 1
+            record = {
+                'index': index,
+                'time': t,
+                'voltages': voltages,
+                'heights': tuple(self.calibration_manager.voltage_to_height(sensor_id, value)
+                                 for sensor_id, value in enumerate(voltages)),
+                'events': events,
+                'rejected': rejected.tolist()
+            }
+            for output in self.outputs:
+                await output.put(record)
+
+    def _event_heights(self, block: np.ndarray) -> Optional[np.ndarray]:
+        """Alçades de totes les mostres del bloc, si alguna regla les necessita."""
+        if not (self.event_engine.needs_heights and self.calibration_manager.are_all_calibrated()):
+            return None
+        return np.vstack([
+            self.calibration_manager.voltages_to_heights(sensor_id, block[sensor_id])
+            for sensor_id in range(block.shape[0])
+        ])
+
+
+def storage_output(file_handler, metadata: Optional[Callable[[], dict]] = None,
+                   flush_interval: float = ENGINE_FLUSH_INTERVAL) -> Tuple[Callable, Callable]:
+    """
+    Sortida que desa cada registre amb un gestor de fitxers (l'escriptura al disc,
+    bloquejant, es fa en un fil). S'ha d'afegir amb lossless=True.
+
+    Les escriptures es fan per temps i no cada N files: si una escriptura s'allarga
+    (l'Excel es reescriu sencer), els registres que s'hi acumulen entren tots a la
+    següent, i el nombre d'escriptures no creix amb la taxa de registres.
+
+    Args:
+        file_handler: Gestor de fitxers ja creat (create_file() fet)
+        metadata: Funció que retorna les metadades a desar abans de cada escriptura
+            (p.ex. AcquisitionEngine.run_metadata)
+        flush_interval: Temps mínim entre escriptures al disc (s)
+
+    Returns:
+        Tupla (handler, close) per a AcquisitionEngine.add_output
+    """
+    last_flush = None
+
+    async def handler(record: dict):
+        nonlocal last_flush
+        file_handler.append_data(record['time'], *record['voltages'], *record['heights'])
+        loop = asyncio.get_running_loop()
+        if last_flush is None:
+            last_flush = loop.time()
+        elif loop.time() - last_flush >= flush_interval:
+            if metadata is not None:
+                file_handler.metadata.update(metadata())
+            await loop.run_in_executor(None, file_handler.flush_to_file)
+            last_flush = loop.time()
+
+    async def close():
+        if metadata is not None:
+            file_handler.metadata.update(metadata())
+        await asyncio.get_running_loop().run_in_executor(None, file_handler.close)
+
+    return handler, close
+
+
+def stream_output(server) -> Callable:
+    """
+    Sortida que difon els registres amb un servidor de dades (data.streaming).
+
+    Args:
+        server: StreamServer en marxa
+
+    Returns:
+        Handler per a AcquisitionEngine.add_output
+    """
+    def handler(record: dict):
+        server.publish_row(record['time'], *record['voltages'], *record['heights'])
+        if record['events']:
+            server.publish_events(record['events'])
+
+    return handler
+
+
+def alert_output(callback: Callable[[dict], None]) -> Callable:
+    """
+    Sortida que avisa de cada esdeveniment detectat.
+
+    Args:
+        callback: Funció o corutina que rep cada esdeveniment
+
+    Returns:
+        Handler per a AcquisitionEngine.add_output
+    """
+    async def handler(record: dict):
+        for event in record['events']:
+            await _maybe_await(callback(event))
+
+    return handler
@@ -0,0 +1,100 @@
+"""
+Bus de valors en directe dels sensors
+Un sol lector (el fil de monitorització o l'adquisició) hi publica les mostres i
+tots els consumidors (finestra principal, diàleg de calibratge...) s'hi
+subscriuen, en lloc de consultar el hardware cadascun pel seu compte. Els
+subscriptors reben la mitjana de la finestra de temps configurada.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.config import LIVE_VALUE_WINDOW
+
+
+class LiveValueBus:
+    """Publicació/subscripció de les lectures dels sensors amb mitjana temporal."""
+
+    def __init__(self, window: float = LIVE_VALUE_WINDOW, num_channels: int = 2):
+        """
+        Inicialitza el bus.
+
+        Args:
+            window: Durada de la finestra de mitjana (s)
+            num_channels: Nombre de canals de cada lectura
+        """
+        self.window = window
+        self.num_channels = num_channels
+        self._entries = deque()  # (temps, suma per canal, nombre de mostres)
+        self._lock = threading.Lock()
+        self._new_data = False
+        self._subscribers: List[Callable[[float, float], None]] = []
+
+    def publish(self, samples):
+        """
+        Publica noves mostres (es pot cridar des de qualsevol fil).
+
+        Args:
+            samples: Una lectura (un valor per canal) o un bloc de forma (canals, n)
+        """
+        block = np.asarray(samples, dtype=np.float64).reshape(self.num_channels, -1)
+        count = block.shape[1]
+        if count == 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._entries.append((now, block.sum(axis=1), count))
+            self._trim(now)
+            self._new_data = True
+
+    def latest(self) -> Optional[Tuple[float, ...]]:
+        """Retorna la mitjana de la finestra actual, o None si no hi ha lectures recents."""
+        with self._lock:
+            self._trim(time.monotonic())
+            if not self._entries:
+                return None
+            total = sum(entry[1] for entry in self._entries)
+            count = sum(entry[2] for entry in self._entries)
+        return tuple(float(value) for value in total / count)
+
+    def subscribe(self, callback: Callable[[float, float], None]):
+        """Afegeix un subscriptor, que rebrà un valor per canal a cada distribució."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[float, float], None]):
+        """Elimina un subscriptor."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def dispatch(self):
+        """
+        Envia la mitjana actual als subscriptors si hi ha dades noves.
+        S'ha de cridar des del fil de la interfície (p.ex. amb un QTimer).
+        """
+        with self._lock:
+            if not self._new_data:
+                return
+            self._new_data = False
+        values = self.latest()
+        if values is None:
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(*values)
+            except Exception as e:
+                print(f"Error en un subscriptor de valors en directe: {e}")
+
+    def clear(self):
+        """Descarta les lectures acumulades."""
+        with self._lock:
+            self._entries.clear()
+            self._new_data = False
+
+    def _trim(self, now: float):
+        """Descarta les lectures fora de la finestra (cal tenir el bloqueig)."""
+        while self._entries and now - self._entries[0][0] > self.window:
+            self._entries.popleft()
@@ -0,0 +1,170 @@
+"""
+Monitorització dels sensors en segon pla quan no s'està gravant
+Un fil manté oberta una tasca contínua a baixa freqüència i publica les lectures
+al bus de valors en directe; la interfície només rep els valors, de manera que
+mai queda bloquejada per lectures, reconnexions o temps d'estabilització del hardware.
+El mateix fil atén les ràfegues a freqüència completa (captura de calibratge),
+perquè continuï sent l'únic usuari del hardware.
+"""
+import threading
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from daq.acquisition import DAQAcquisition
+from daq.live_values import LiveValueBus
+from utils.config import MONITOR_INTERVAL, MONITOR_RETRY_INTERVAL
+
+
+class MonitorReader:
+    """Fil de fons que llegeix contínuament els sensors a baixa freqüència."""
+
+    def __init__(self, daq: DAQAcquisition, bus: Optional[LiveValueBus] = None,
+                 interval: float = MONITOR_INTERVAL,
+                 retry_interval: float = MONITOR_RETRY_INTERVAL):
+        """
+        Inicialitza el lector.
+
+        Args:
+            daq: Sistema d'adquisició (el fil n'és l'únic usuari mentre està en marxa)
+            bus: Bus on es publiquen les mostres llegides
+            interval: Temps entre lectures (s)
+            retry_interval: Temps d'espera abans de reconnectar després d'un error (s)
+        """
+        self.daq = daq
+        self.bus = bus
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.status = ""
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._bursts: List[Tuple[int, Future]] = []  # Ràfegues pendents (mostres, resultat)
+        self._bursts_lock = threading.Lock()
+        self._state_lock = threading.Lock()  # Ordena start() respecte de la sortida del fil
+        self._exiting = False                # El fil ha deixat el bucle i està alliberant el hardware
+
+    @property
+    def is_running(self) -> bool:
+        """Indica si el fil de monitorització està en marxa."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Engega el fil de monitorització (si no ho està ja)."""
+        with self._state_lock:
+            if self.is_running and not self._exiting:
+                # Una aturada que no havia acabat (stop() ha fallat) es cancel·la
+                self._stop_event.clear()
+                return
+        if self._thread is not None:
+            self._thread.join()  # Només li queda alliberar el hardware
+        self._stop_event.clear()
+        self._exiting = False
+        self.daq.monitor_active = True
+        self._thread = threading.Thread(target=self._run, name="MonitorReader", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Atura el fil i espera que acabi, per tornar el control del hardware a qui crida.
+
+        Args:
+            timeout: Temps màxim d'espera (s), None per esperar sempre
+
+        Returns:
+            True si el fil s'ha aturat; False si encara fa servir el hardware
+            (p.ex. una ràfega llarga en curs) i qui crida no l'ha de tocar
+        """
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+            self._thread = None
+        self.daq.monitor_active = False
+        self._fail_bursts("Monitorització aturada")
+        return True
+
+    def request_burst(self, num_samples: int) -> Future:
+        """
+        Demana una ràfega de mostres a la freqüència completa sense bloquejar.
+        El fil atura momentàniament la tasca contínua, llegeix la ràfega i la reprèn.
+
+        Args:
+            num_samples: Nombre de mostres a llegir per canal
+
+        Returns:
+            Future amb l'array de forma (2, num_samples), o amb l'error
+        """
+        future = Future()
+        if not self.is_running:
+            future.set_exception(RuntimeError("La monitorització no està en marxa"))
+            return future
+        with self._bursts_lock:
+            self._bursts.append((num_samples, future))
+        return future
+
+    def _run(self):
+        """Bucle del fil: connecta, llegeix periòdicament i reconnecta si cal."""
+        try:
+            while True:
+                with self._state_lock:
+                    if self._stop_event.is_set():
+                        self._exiting = True
+                        break
+                if not self.daq.monitor_running and not self._connect():
+                    self._stop_event.wait(self.retry_interval)
+                    continue
+
+                if self._bursts:
+                    self._serve_bursts()
+
+                success, msg, data = self.daq.read_monitor_block()
+                if success and self.bus is not None:
+                    self.bus.publish(data)
+                if not success:
+                    # Es tornarà a configurar tot a la següent volta
+                    self.status = msg
+                    self.daq.stop_monitoring()
+                    self._stop_event.wait(self.retry_interval)
+                    continue
+
+                self.status = ""
+                self._stop_event.wait(self.interval)
+        finally:
+            self.daq.stop_monitoring()
+            self._fail_bursts("Monitorització aturada")
+
+    def _serve_bursts(self):
+        """Llegeix les ràfegues pendents i torna a engegar la tasca contínua."""
+        with self._bursts_lock:
+            bursts, self._bursts = self._bursts, []
+        self.daq.stop_monitoring()
+        for num_samples, future in bursts:
+            if not future.set_running_or_notify_cancel():
+                continue
+            success, msg, data = self.daq.read_burst(num_samples)
+            if success:
+                if self.bus is not None:
+                    self.bus.publish(data)
+                future.set_result(data)
+            else:
+                future.set_exception(RuntimeError(msg))
+        success, msg = self.daq.start_monitoring()
+        if not success:
+            self.status = msg
+
+    def _fail_bursts(self, message: str):
+        """Fa fallar les ràfegues que encara no s'han atès."""
+        with self._bursts_lock:
+            bursts, self._bursts = self._bursts, []
+        for _, future in bursts:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError(message))
+
+    def _connect(self) -> bool:
+        """Configura les tasques, activa els sensors i engega la tasca contínua."""
+        for step in (self.daq.setup_tasks, self.daq.activate_sensors, self.daq.start_monitoring):
+            success, msg = step()
+            if not success:
+                self.status = msg
+                return False
+        return True
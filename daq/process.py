@@ -0,0 +1,158 @@
+"""
+Adquisició en un procés separat
+El procés fill és l'únic usuari del hardware durant la mesura: llegeix blocs
+d'un període a SAMPLE_RATE i els copia a una memòria circular compartida
+(vegeu daq.shared_ring). La interfície els llegeix sense còpies des del seu
+procés, de manera que la càrrega de la gràfica (i el GIL) no pot endarrerir
+les lectures i l'adquisició fa servir un altre nucli.
+"""
+import math
+import multiprocessing
+import queue
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from daq.shared_ring import SharedBlockRing
+from utils.config import ACQUISITION_RING_DURATION, ACQUISITION_PROCESS_TIMEOUT
+
+
+def _acquisition_main(ring_name: str, slots: int, num_channels: int, block_samples: int,
+                      stop_event, messages):
+    """
+    Punt d'entrada del procés fill: llegeix blocs del hardware i els publica.
+    El mode simulació s'hereta per l'entorn (vegeu simulation.mock_daq).
+    """
+    from daq.acquisition import DAQAcquisition
+
+    ring = SharedBlockRing(slots, num_channels, block_samples, name=ring_name)
+    daq = DAQAcquisition()
+    if daq.using_simulation:
+        # Aquest procés només llegeix: les lectures poden esperar el rellotge simulat
+        from simulation.mock_daq import enable_paced_reads
+        enable_paced_reads()
+    try:
+        for step in (daq.setup_tasks, daq.activate_sensors, daq.start_acquisition):
+            success, msg = step()
+            if not success:
+                messages.put(('error', msg))
+                return
+        messages.put(('ready', ""))
+
+        while not stop_event.is_set():
+            success, msg, data = daq.read_samples(block_samples)
+            if not success:
+                messages.put(('error', msg))
+                return
+            ring.write(data)
+    finally:
+        daq.cleanup()
+        ring.close()
+
+
+class AcquisitionProcess:
+    """Procés d'adquisició i lectura dels seus blocs des de la interfície."""
+
+    def __init__(self, ring_duration: float = ACQUISITION_RING_DURATION,
+                 timeout: float = ACQUISITION_PROCESS_TIMEOUT, num_channels: int = 2):
+        """
+        Inicialitza el gestor (el procés s'engega a start()).
+
+        Args:
+            ring_duration: Segons de dades que caben a la memòria compartida
+            timeout: Temps màxim d'espera per engegar o aturar el procés (s)
+            num_channels: Canals de cada bloc
+        """
+        self.ring_duration = ring_duration
+        self.timeout = timeout
+        self.num_channels = num_channels
+        self.ring: Optional[SharedBlockRing] = None
+        self.lost_blocks = 0
+        self._process = None
+        self._stop_event = None
+        self._messages = None
+
+    @property
+    def is_running(self) -> bool:
+        """Indica si hi ha una adquisició en un procés separat en curs."""
+        return self._process is not None
+
+    def start(self, block_samples: int, block_period: float) -> Tuple[bool, str]:
+        """
+        Engega el procés i espera que el hardware estigui configurat.
+
+        Args:
+            block_samples: Mostres per canal de cada bloc
+            block_period: Durada de cada bloc (s)
+
+        Returns:
+            Tupla (success, error_message)
+        """
+        if self.is_running:
+            return False, "L'adquisició en procés separat ja està en marxa"
+        # 'spawn': fer fork d'un procés amb Qt i fils en marxa no és segur
+        context = multiprocessing.get_context('spawn')
+        slots = max(4, math.ceil(self.ring_duration / block_period))
+        try:
+            self.ring = SharedBlockRing(slots, self.num_channels, block_samples)
+            self._stop_event = context.Event()
+            self._messages = context.Queue()
+            self._process = context.Process(
+                target=_acquisition_main,
+                args=(self.ring.name, slots, self.num_channels, block_samples,
+                      self._stop_event, self._messages),
+                name="DAQAcquisition", daemon=True
+            )
+            self._process.start()
+        except Exception as e:
+            self.stop()
+            return False, f"Error engegant el procés d'adquisició: {str(e)}"
+        self.lost_blocks = 0
+
+        try:
+            kind, msg = self._messages.get(timeout=self.timeout)
+        except queue.Empty:
+            kind, msg = 'error', "El procés d'adquisició no respon"
+        if kind != 'ready':
+            self.stop()
+            return False, msg
+        return True, ""
+
+    def read_blocks(self) -> Tuple[bool, str, List[Tuple[int, np.ndarray]]]:
+        """
+        Retorna els blocs arribats des de l'última lectura, sense copiar-los.
+
+        Returns:
+            Tupla (success, error_message, llista de (índex del bloc, vista (canals, mostres)))
+        """
+        if not self.is_running:
+            return False, "Adquisició no iniciada", []
+        blocks, lost = self.ring.read_available()
+        self.lost_blocks += lost
+        if not blocks:
+            try:
+                kind, msg = self._messages.get_nowait()
+                if kind == 'error':
+                    return False, msg, []
+            except queue.Empty:
+                pass
+            if not self._process.is_alive():
+                return False, "El procés d'adquisició s'ha aturat", []
+        return True, "", blocks
+
+    def stop(self):
+        """Atura el procés (allibera el hardware) i la memòria compartida."""
+        if self._process is not None:
+            self._stop_event.set()
+            if self._process.pid is not None:
+                self._process.join(self.timeout)
+                if self._process.is_alive():
+                    self._process.terminate()
+                    self._process.join()
+            self._process = None
+        if self._messages is not None:
+            self._messages.close()
+            self._messages = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
@@ -4,6 +4,8 @@ Classe específica per gestionar els sensors AWP-24-3
 from typing import Tuple
 import numpy as np
 from data.processor import DataProcessor
+from data.drift import DriftCompensator
+from utils.config import BLOCK_AGGREGATOR
 
 
 class AWP24Sensor:
@@ -21,17 +23,20 @@ class AWP24Sensor:
         self.name = name
         self.data_processor = DataProcessor()
         
-    def process_samples(self, samples: np.ndarray) -> float:
+    def process_samples(self, samples: np.ndarray, method: str = BLOCK_AGGREGATOR) -> float:
         """
-        Processa les mostres del sensor i retorna la mitjana.
+        Processa les mostres del sensor amb el mateix agregador que els blocs
+        (vegeu DataProcessor.aggregate_block).
         
         Args:
             samples: Array de mostres de voltatge
+            method: Agregador ('mean', 'median', 'hampel' o 'sigma_clip')
             
         Returns:
-            Voltatge mitjà en V
+            Voltatge agregat en V
         """
-        return self.data_processor.calculate_mean(samples)
+        values, _ = DataProcessor.aggregate_block(np.asarray(samples)[np.newaxis, :], method)
+        return float(values[0])
     
     def validate_voltage(self, voltage: float, min_voltage: float = -10.0, 
                         max_voltage: float = 10.0) -> Tuple[bool, str]:
@@ -61,10 +66,30 @@ class SensorManager:
             AWP24Sensor(0, "Sensor #1"),
             AWP24Sensor(1, "Sensor #2")
         ]
+        self.compensator = DriftCompensator()
+        self.aggregator = BLOCK_AGGREGATOR
+        self.last_rejected = np.zeros(len(self.sensors), dtype=np.int64)  # Mostres rebutjades a l'últim bloc
+    
+    def compensate(self, data: np.ndarray, start_time: float) -> np.ndarray:
+        """
+        Aplica la compensació de deriva a un bloc de mostres brutes (si està activada).
+        
+        Args:
+            data: Array de forma (num_channels, num_samples)
+            start_time: Temps de la primera mostra (s des de l'inici)
+            
+        Returns:
+            Bloc corregit (el mateix bloc si la compensació està desactivada)
+        """
+        if not self.compensator.enabled:
+            return data
+        return self.compensator.compensate(start_time, data)
     
     def process_multi_channel_data(self, data: np.ndarray) -> Tuple[float, float]:
         """
-        Processa les dades de tots els canals.
+        Processa les dades de tots els canals amb l'agregador configurat; les
+        mostres rebutjades de cada canal queden a last_rejected. La compensació
+        de deriva s'aplica abans, amb compensate().
         
         Args:
             data: Array de forma (num_channels, num_samples)
@@ -75,10 +100,10 @@ class SensorManager:
         if data.shape[0] != 2:
             raise ValueError(f"S'esperaven 2 canals, rebuts {data.shape[0]}")
         
-        voltage1 = self.sensors[0].process_samples(data[0])
-        voltage2 = self.sensors[1].process_samples(data[1])
+        # Mitjana (o agregador robust) de tots els canals alhora
+        values, self.last_rejected = DataProcessor.aggregate_block(data, self.aggregator)
         
-        return voltage1, voltage2
+        return float(values[0]), float(values[1])
     
     def validate_readings(self, voltage1: float, voltage2: float) -> Tuple[bool, str]:
         """
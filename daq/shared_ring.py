@@ -0,0 +1,90 @@
+"""
+Memòria circular de blocs de mostres en memòria compartida
+Un sol escriptor (el procés d'adquisició) hi copia cada bloc llegit del hardware
+i el lector (la interfície, en un altre procés) n'obté vistes numpy directament
+sobre la memòria compartida, sense cap còpia ni serialització. El comptador de
+blocs escrits es publica després de les dades, de manera que el lector només
+veu blocs complets.
+"""
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+HEADER_BYTES = 64  # Capçalera: comptador de blocs escrits (int64) + reserva
+
+
+class SharedBlockRing:
+    """Memòria circular de blocs (canals, mostres) compartida entre processos."""
+
+    def __init__(self, slots: int, num_channels: int, block_samples: int,
+                 name: Optional[str] = None):
+        """
+        Crea la memòria compartida o s'hi connecta.
+
+        Args:
+            slots: Nombre de blocs que caben a la memòria
+            num_channels: Canals de cada bloc
+            block_samples: Mostres per canal de cada bloc
+            name: Nom de la memòria existent (None per crear-ne una de nova)
+        """
+        self.slots = slots
+        self.num_channels = num_channels
+        self.block_samples = block_samples
+        size = HEADER_BYTES + slots * num_channels * block_samples * 8
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self._header = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self._blocks = np.ndarray((slots, num_channels, block_samples), dtype=np.float64,
+                                  buffer=self.shm.buf, offset=HEADER_BYTES)
+        if self.owner:
+            self._header[0] = 0
+        self.read_index = 0  # Següent bloc que ha de llegir aquest procés
+
+    @property
+    def name(self) -> str:
+        """Nom de la memòria compartida (per connectar-s'hi des d'un altre procés)."""
+        return self.shm.name
+
+    @property
+    def write_count(self) -> int:
+        """Nombre de blocs escrits des de l'inici."""
+        return int(self._header[0])
+
+    def write(self, block: np.ndarray):
+        """
+        Copia un bloc a la memòria (només l'ha de cridar l'escriptor).
+
+        Args:
+            block: Array de forma (num_channels, block_samples)
+        """
+        count = int(self._header[0])
+        self._blocks[count % self.slots] = block
+        self._header[0] = count + 1  # Es publica quan les dades ja hi són
+
+    def read_available(self) -> Tuple[List[Tuple[int, np.ndarray]], int]:
+        """
+        Retorna els blocs nous com a vistes sobre la memòria compartida.
+        Les vistes són vàlides fins que l'escriptor dona la volta (slots blocs més
+        tard); qui les vulgui conservar n'ha de fer una còpia.
+
+        Returns:
+            Tupla (llista de (índex del bloc, vista), blocs perduts perquè
+            l'escriptor els ha sobreescrit abans de llegir-los)
+        """
+        count = self.write_count
+        # Es deixa un bloc de marge: l'escriptor pot estar omplint el següent
+        oldest = max(self.read_index, count - self.slots + 1)
+        lost = oldest - self.read_index
+        blocks = [(index, self._blocks[index % self.slots]) for index in range(oldest, count)]
+        self.read_index = count
+        return blocks, lost
+
+    def close(self):
+        """Es desconnecta de la memòria (i l'allibera si l'ha creada aquest procés)."""
+        # Les vistes pròpies s'han d'alliberar abans de tancar la memòria
+        self._header = None
+        self._blocks = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -1,5 +1,15 @@
 """
 Data package per gestió de fitxers i processament de dades
 """
-from .file_handler import FileHandler
+from .file_handler import FileHandler, create_file_handler
+from .compressed_file_handler import CompressedFileHandler
 from .processor import DataProcessor
+from .catalog import MeasurementCatalog
+from .multirate import MultiRateWriter, load_overview
+from .segments import SegmentedFileHandler, load_segmented
+from .multires import MultiResolutionCache
+from .drift import DriftCompensator
+from .events import EventEngine
+from .burst import BurstRecorder, is_burst_file
+from .adaptive import AdaptiveSampler
+from .streaming import StreamServer, StreamClient
@@ -0,0 +1,96 @@
+"""
+Període de mostreig adaptatiu de les dades desades
+El hardware continua mostrejant a SAMPLE_RATE i cada cicle d'adquisició dona una
+lectura; les lectures consecutives s'agrupen i es desa la seva mitjana. Quan el
+nivell està quiet el grup creix (fins a max_factor cicles per fila) i quan canvia
+més del llindar respecte de la mitjana del grup, el grup es tanca i es torna al
+període base, de manera que els transitoris es desen amb tota la resolució.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from utils.config import ADAPTIVE_MAX_FACTOR, ADAPTIVE_THRESHOLD, ADAPTIVE_QUIET_TIME
+
+
+class AdaptiveSampler:
+    """Agrupa les lectures de cada cicle en files de període variable."""
+
+    def __init__(self, base_period: float, max_factor: int = ADAPTIVE_MAX_FACTOR,
+                 threshold: float = ADAPTIVE_THRESHOLD, quiet_time: float = ADAPTIVE_QUIET_TIME):
+        """
+        Inicialitza l'agrupador.
+
+        Args:
+            base_period: Període del cicle d'adquisició (s), el més curt possible
+            max_factor: Màxim de cicles agrupats en una fila
+            threshold: Canvi (V) respecte de la mitjana del grup que es considera activitat
+            quiet_time: Temps sense activitat (s) abans de doblar el període
+        """
+        self.base_period = base_period
+        self.max_factor = max(1, int(max_factor))
+        self.threshold = threshold
+        self.quiet_time = quiet_time
+        self.reset()
+
+    def reset(self):
+        """Torna al període base i descarta el grup en curs."""
+        self.factor = 1
+        self.quiet_since: Optional[float] = None
+        self._start_time = 0.0
+        self._sum: Optional[np.ndarray] = None
+        self._count = 0
+
+    @property
+    def period(self) -> float:
+        """Període actual de les files desades (s)."""
+        return self.base_period * self.factor
+
+    def add(self, t: float, values) -> List[Tuple[float, Tuple[float, ...]]]:
+        """
+        Afegeix la lectura d'un cicle.
+
+        Args:
+            t: Temps del cicle (s des de l'inici)
+            values: Voltatge de cada canal
+
+        Returns:
+            Files a desar, cadascuna (temps, valors); pot ser buida o tenir-ne dues
+            (el grup anterior i la lectura que l'ha interromput)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        rows = []
+        if self._count > 0 and np.max(np.abs(values - self._sum / self._count)) > self.threshold:
+            # Activitat: es tanca el grup i es torna al període base
+            rows.append(self._flush())
+            self.factor = 1
+            self.quiet_since = None
+        elif self.quiet_since is None:
+            self.quiet_since = t
+        elif self.factor < self.max_factor and t - self.quiet_since >= self.quiet_time:
+            self.factor = min(self.max_factor, self.factor * 2)
+            self.quiet_since = t
+
+        if self._count == 0:
+            self._start_time = t
+            self._sum = values.copy()
+        else:
+            self._sum += values
+        self._count += 1
+
+        if self._count >= self.factor:
+            rows.append(self._flush())
+        return rows
+
+    def flush(self) -> Optional[Tuple[float, Tuple[float, ...]]]:
+        """Retorna el grup pendent (p.ex. en aturar l'adquisició), o None si és buit."""
+        if self._count == 0:
+            return None
+        return self._flush()
+
+    def _flush(self) -> Tuple[float, Tuple[float, ...]]:
+        """Tanca el grup en curs i en retorna la mitjana."""
+        row = (self._start_time, tuple(float(value) for value in self._sum / self._count))
+        self._sum = None
+        self._count = 0
+        return row
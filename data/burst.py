@@ -0,0 +1,174 @@
+"""
+Captura de ràfegues a freqüència completa al voltant dels esdeveniments
+Les mostres brutes de cada bloc es guarden en una memòria circular que cobreix el
+temps de pre-disparament; quan es dispara una captura s'hi afegeixen les mostres
+posteriors i la finestra completa s'escriu en un fitxer comprimit a part
+(mesura_rafaga_001.lvz...). Així es tenen dades a 1 kHz just on cal sense
+haver de gravar-les durant tota la mesura.
+"""
+import os
+import re
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from data.compressed_file_handler import CompressedFileHandler
+from utils.config import (
+    SAMPLE_RATE, MAX_SAMPLING_PERIOD, COMPRESSED_FILE_EXTENSION, MANIFEST_EXTENSION,
+    BURST_PRE_TRIGGER, BURST_POST_TRIGGER, BURST_SUFFIX
+)
+
+_BURST_PATTERN = re.compile(re.escape(BURST_SUFFIX) + r"_\d+$")
+
+BURST_COLUMNS = ['time_seconds', 'voltage_sensor1', 'voltage_sensor2']
+
+
+def is_burst_file(filepath: str) -> bool:
+    """Comprova si un fitxer és una ràfega d'una mesura."""
+    name = os.path.basename(filepath)
+    return bool(_BURST_PATTERN.search(os.path.splitext(name)[0]))
+
+
+class BurstRecorder:
+    """Memòria circular de mostres brutes i captures pre/post-disparament."""
+
+    def __init__(self, filepath: str, sample_rate: float = SAMPLE_RATE,
+                 pre_trigger: float = BURST_PRE_TRIGGER,
+                 post_trigger: float = BURST_POST_TRIGGER, num_channels: int = 2):
+        """
+        Inicialitza l'enregistrador.
+
+        Args:
+            filepath: Fitxer de la mesura (les ràfegues es desen al seu costat)
+            sample_rate: Freqüència de mostreig de les mostres brutes (Hz)
+            pre_trigger: Segons guardats abans del disparament
+            post_trigger: Segons guardats després del disparament
+            num_channels: Nombre de canals de cada bloc
+        """
+        base = filepath[:-len(MANIFEST_EXTENSION)] if filepath.endswith(MANIFEST_EXTENSION) \
+            else os.path.splitext(filepath)[0]
+        self.base_path = base
+        self.sample_rate = sample_rate
+        self.pre_trigger = pre_trigger
+        self.post_trigger = post_trigger
+
+        # Ha de cabre el pre-disparament més el bloc més llarg possible
+        capacity = int((pre_trigger + MAX_SAMPLING_PERIOD) * sample_rate) + 1
+        self.ring = np.zeros((num_channels, capacity))
+        self.position = 0      # Següent posició d'escriptura
+        self.filled = 0        # Mostres vàlides a la memòria
+        self.next_time = 0.0   # Temps de la mostra següent a l'última guardada
+
+        self.capture: Optional[dict] = None  # Captura en curs
+        self.bursts: List[dict] = []          # Ràfegues escrites (per a les metadades)
+        self._writers: List[threading.Thread] = []
+
+    def push(self, t0: float, block: np.ndarray):
+        """
+        Afegeix un bloc de mostres brutes.
+
+        Args:
+            t0: Temps de la primera mostra del bloc (s des de l'inici)
+            block: Array de forma (num_channels, n)
+        """
+        block = np.asarray(block, dtype=np.float64)
+        n = block.shape[1]
+        capacity = self.ring.shape[1]
+        if n >= capacity:
+            self.ring[:] = block[:, -capacity:]
+            self.position, self.filled = 0, capacity
+        else:
+            first = min(n, capacity - self.position)
+            self.ring[:, self.position:self.position + first] = block[:, :first]
+            self.ring[:, :n - first] = block[:, first:]
+            self.position = (self.position + n) % capacity
+            self.filled = min(capacity, self.filled + n)
+        self.next_time = t0 + n / self.sample_rate
+
+        if self.capture is not None:
+            self.capture['chunks'].append(block.copy())  # El bloc pot ser una vista d'una memòria reutilitzada
+            self.capture['covered'] = self.next_time
+            if self.capture['covered'] >= self.capture['end']:
+                self._finish_capture()
+
+    def trigger(self, t: float, reason: str = ""):
+        """
+        Dispara una captura al voltant de l'instant t (ja ha de ser a la memòria).
+        Si ja n'hi ha una en curs, s'allarga fins a cobrir el nou disparament.
+
+        Args:
+            t: Instant del disparament (s des de l'inici)
+            reason: Motiu (p.ex. el nom de la regla que l'ha disparat)
+        """
+        if self.capture is not None:
+            self.capture['end'] = max(self.capture['end'], t + self.post_trigger)
+            self.capture['triggers'].append({'time': t, 'reason': reason})
+            return
+
+        # Mostres de la memòria en ordre cronològic
+        if self.filled < self.ring.shape[1]:
+            history = self.ring[:, :self.filled].copy()
+        else:
+            history = np.roll(self.ring, -self.position, axis=1)
+        self.capture = {
+            'start': self.next_time - self.filled / self.sample_rate,
+            'end': t + self.post_trigger,
+            'covered': self.next_time,
+            'window_start': t - self.pre_trigger,
+            'triggers': [{'time': t, 'reason': reason}],
+            'chunks': [history]
+        }
+        if self.capture['covered'] >= self.capture['end']:
+            self._finish_capture()
+
+    def close(self):
+        """Escriu la captura en curs (encara que sigui incompleta) i espera les escriptures."""
+        if self.capture is not None:
+            self._finish_capture()
+        for writer in self._writers:
+            writer.join()
+        self._writers.clear()
+
+    def _finish_capture(self):
+        """Retalla la finestra de la captura i l'escriu en un fil de fons."""
+        capture, self.capture = self.capture, None
+        data = np.concatenate(capture['chunks'], axis=1)
+        times = capture['start'] + np.arange(data.shape[1]) / self.sample_rate
+        keep = (times >= capture['window_start']) & (times <= capture['end'])
+        times, data = times[keep], data[:, keep]
+        if len(times) == 0:
+            return
+
+        filepath = f"{self.base_path}{BURST_SUFFIX}_{len(self.bursts) + 1:03d}{COMPRESSED_FILE_EXTENSION}"
+        info = {
+            'file': os.path.basename(filepath),
+            'first_time': round(float(times[0]), 6),
+            'last_time': round(float(times[-1]), 6),
+            'triggers': capture['triggers']
+        }
+        self.bursts.append(info)
+
+        # L'escriptura (compressió inclosa) no ha de frenar el cicle d'adquisició
+        writer = threading.Thread(target=self._write, args=(filepath, times, data, info),
+                                  name="BurstWriter", daemon=True)
+        writer.start()
+        self._writers = [w for w in self._writers if w.is_alive()] + [writer]
+
+    def _write(self, filepath: str, times: np.ndarray, data: np.ndarray, info: dict):
+        """Escriu una ràfega en format comprimit."""
+        try:
+            handler = CompressedFileHandler(filepath, BURST_COLUMNS)
+            handler.metadata.update({
+                'sample_rate': self.sample_rate,
+                'pre_trigger': self.pre_trigger,
+                'post_trigger': self.post_trigger,
+                'source_file': os.path.basename(self.base_path),
+                'triggers': info['triggers']
+            })
+            handler.create_file()
+            for row in zip(times.tolist(), data[0].tolist(), data[1].tolist()):
+                handler.append_row(dict(zip(BURST_COLUMNS, row)))
+            handler.close()
+        except Exception as e:
+            print(f"Error escrivint la ràfega {filepath}: {e}")
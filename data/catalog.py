@@ -0,0 +1,308 @@
+"""
+Catàleg persistent (SQLite) de les mesures del directori Mesures
+Permet cercar i navegar milers de mesures sense obrir cada fitxer
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from data.file_handler import FileHandler
+from data.multirate import is_overview_file
+from data.segments import is_segment_file
+from data.burst import is_burst_file
+from data.processor import DataProcessor
+from utils.config import DEFAULT_FILENAME_PATTERN, CATALOG_FILE_EXTENSIONS
+
+
+class MeasurementCatalog:
+    """Índex persistent de les mesures guardades."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS measurements (
+            filepath TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            start_time TEXT,
+            duration REAL,
+            sample_count INTEGER,
+            period REAL,
+            calibration TEXT,
+            stats TEXT,
+            file_mtime REAL,
+            file_size INTEGER,
+            indexed_at TEXT,
+            calibration_version TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_measurements_start ON measurements(start_time);
+    """
+
+    COLUMNS = ("filepath", "filename", "start_time", "duration", "sample_count", "period",
+               "calibration", "stats", "file_mtime", "file_size", "indexed_at",
+               "calibration_version")
+
+    def __init__(self, db_path: str):
+        """
+        Inicialitza el catàleg.
+
+        Args:
+            db_path: Camí del fitxer SQLite del catàleg
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(self.SCHEMA)
+        self._migrate()
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_measurements_calibration "
+            "ON measurements(calibration_version)"
+        )
+        self.connection.commit()
+
+    def _migrate(self):
+        """Afegeix les columnes noves als catàlegs creats amb versions anteriors."""
+        existing = {row['name'] for row in self.connection.execute("PRAGMA table_info(measurements)")}
+        if 'calibration_version' not in existing:
+            self.connection.execute("ALTER TABLE measurements ADD COLUMN calibration_version TEXT")
+
+    def add_measurement(self, filepath: str, start_time: Optional[datetime], duration: float,
+                        sample_count: int, period: Optional[float],
+                        calibration: Optional[dict] = None, stats: Optional[dict] = None,
+                        calibration_version: Optional[str] = None):
+        """
+        Afegeix o actualitza una mesura al catàleg.
+
+        Args:
+            filepath: Camí del fitxer de la mesura
+            start_time: Instant d'inici de la mesura
+            duration: Durada en segons
+            sample_count: Nombre de mostres guardades
+            period: Període de mostreig en segons
+            calibration: Calibratge utilitzat (opcional)
+            stats: Estadístiques per columna (opcional)
+            calibration_version: Versió del calibratge al magatzem de calibracions (opcional)
+        """
+        key = os.path.abspath(filepath)
+        try:
+            file_stat = os.stat(filepath)
+            mtime, size = file_stat.st_mtime, file_stat.st_size
+        except OSError:
+            mtime, size = None, None
+
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO measurements ({', '.join(self.COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+            (
+                key,
+                os.path.basename(filepath),
+                start_time.isoformat(timespec='seconds') if start_time else None,
+                float(duration),
+                int(sample_count),
+                float(period) if period is not None else None,
+                json.dumps(calibration) if calibration is not None else None,
+                json.dumps(stats) if stats is not None else None,
+                mtime,
+                size,
+                datetime.now().isoformat(timespec='seconds'),
+                calibration_version,
+            )
+        )
+        self.connection.commit()
+
+    def index_file(self, filepath: str, start_time: Optional[datetime] = None,
+                   period: Optional[float] = None, calibration: Optional[dict] = None,
+                   calibration_version: Optional[str] = None) -> bool:
+        """
+        Llegeix una mesura del disc i l'afegeix al catàleg.
+
+        Args:
+            filepath: Camí del fitxer de la mesura
+            start_time: Instant d'inici (si no es coneix, es dedueix del nom o la data del fitxer)
+            period: Període de mostreig (si no es coneix, es dedueix de les dades)
+            calibration: Calibratge utilitzat (opcional)
+            calibration_version: Versió del calibratge utilitzat (opcional)
+
+        Returns:
+            True si s'ha pogut indexar el fitxer
+        """
+        # Les mesures noves porten el resum precalculat: no cal llegir les dades
+        metadata = FileHandler.load_metadata(filepath)
+        if metadata is not None and 'summary' in metadata:
+            summary = metadata['summary']
+            sample_count = summary['sample_count']
+            duration = 0.0
+            if sample_count > 1:
+                duration = float(summary['last_time'] - summary['first_time'])
+            if period is None:
+                period = metadata.get('period')
+                if period is None and sample_count > 1:
+                    period = duration / (sample_count - 1)
+            if start_time is None:
+                if metadata.get('start_time'):
+                    start_time = datetime.fromisoformat(metadata['start_time'])
+                else:
+                    start_time = self._guess_start_time(filepath, duration)
+            if calibration is None:
+                calibration = metadata.get('calibration')
+            if calibration_version is None:
+                calibration_version = metadata.get('calibration_version')
+            stats = {
+                column: column_stats for column, column_stats in summary['overall'].items()
+                if column_stats['count'] > 0
+            }
+            self.add_measurement(filepath, start_time, duration, sample_count, period,
+                                 calibration, stats, calibration_version)
+            return True
+
+        df = FileHandler.load_file(filepath)
+        if df is None:
+            return False
+
+        times = df['time_seconds'].dropna()
+        sample_count = len(df)
+        duration = float(times.iloc[-1] - times.iloc[0]) if len(times) > 1 else 0.0
+        if period is None and len(times) > 1:
+            period = float(times.diff().median())
+        if start_time is None:
+            start_time = self._guess_start_time(filepath, duration)
+
+        stats = {}
+        for column in df.columns:
+            if column == 'time_seconds':
+                continue
+            values = df[column].dropna().tolist()
+            if values:
+                stats[column] = DataProcessor.calculate_statistics(values)
+
+        self.add_measurement(filepath, start_time, duration, sample_count, period,
+                             calibration, stats, calibration_version)
+        return True
+
+    def sync_directory(self, directory: str) -> int:
+        """
+        Sincronitza el catàleg amb el contingut d'un directori de forma incremental.
+        Només es llegeixen els fitxers nous o modificats des de l'última indexació.
+
+        Args:
+            directory: Directori de mesures
+
+        Returns:
+            Nombre de fitxers (re)indexats
+        """
+        if not os.path.isdir(directory):
+            return 0
+
+        known = {
+            row['filepath']: (row['file_mtime'], row['file_size'])
+            for row in self.connection.execute(
+                "SELECT filepath, file_mtime, file_size FROM measurements"
+            )
+        }
+
+        indexed = 0
+        present = set()
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(CATALOG_FILE_EXTENSIONS) or name.startswith('~$'):
+                continue
+            if is_overview_file(name) or is_segment_file(name) or is_burst_file(name):
+                continue
+            path = os.path.join(directory, name)
+            key = os.path.abspath(path)
+            present.add(key)
+            file_stat = os.stat(path)
+            if known.get(key) == (file_stat.st_mtime, file_stat.st_size):
+                continue
+
+            # Conservar les dades conegudes si només ha canviat el fitxer
+            previous = self.get(path)
+            start_time = None
+            calibration = None
+            calibration_version = None
+            if previous is not None:
+                if previous['start_time']:
+                    start_time = datetime.fromisoformat(previous['start_time'])
+                calibration = previous['calibration']
+                calibration_version = previous['calibration_version']
+            if self.index_file(path, start_time=start_time, calibration=calibration,
+                               calibration_version=calibration_version):
+                indexed += 1
+
+        # Eliminar entrades de fitxers que ja no existeixen en aquest directori
+        directory_key = os.path.abspath(directory)
+        for key in known:
+            if os.path.dirname(key) == directory_key and key not in present:
+                self.connection.execute("DELETE FROM measurements WHERE filepath = ?", (key,))
+        self.connection.commit()
+
+        return indexed
+
+    def get(self, filepath: str) -> Optional[dict]:
+        """Retorna l'entrada del catàleg d'un fitxer, o None si no hi és."""
+        row = self.connection.execute(
+            "SELECT * FROM measurements WHERE filepath = ?", (os.path.abspath(filepath),)
+        ).fetchone()
+        return self._row_to_dict(row) if row is not None else None
+
+    def search(self, text: str = "", start_from: Optional[datetime] = None,
+               start_to: Optional[datetime] = None,
+               min_duration: Optional[float] = None,
+               calibration_version: Optional[str] = None) -> List[dict]:
+        """
+        Cerca mesures al catàleg.
+
+        Args:
+            text: Text a cercar dins del nom del fitxer
+            start_from: Data d'inici mínima
+            start_to: Data d'inici màxima
+            min_duration: Durada mínima en segons
+            calibration_version: Només les mesures fetes amb aquesta versió de calibratge
+
+        Returns:
+            Llista d'entrades ordenades per data d'inici (més recents primer)
+        """
+        query = "SELECT * FROM measurements WHERE 1 = 1"
+        params = []
+        if text:
+            query += " AND filename LIKE ?"
+            params.append(f"%{text}%")
+        if start_from is not None:
+            query += " AND start_time >= ?"
+            params.append(start_from.isoformat(timespec='seconds'))
+        if start_to is not None:
+            query += " AND start_time <= ?"
+            params.append(start_to.isoformat(timespec='seconds'))
+        if min_duration is not None:
+            query += " AND duration >= ?"
+            params.append(float(min_duration))
+        if calibration_version is not None:
+            query += " AND calibration_version = ?"
+            params.append(calibration_version)
+        query += " ORDER BY start_time DESC"
+
+        return [self._row_to_dict(row) for row in self.connection.execute(query, params)]
+
+    def close(self):
+        """Tanca la connexió amb la base de dades."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> dict:
+        """Converteix una fila SQLite a diccionari decodificant els camps JSON."""
+        entry = dict(row)
+        for field in ('calibration', 'stats'):
+            entry[field] = json.loads(entry[field]) if entry[field] else None
+        return entry
+
+    @staticmethod
+    def _guess_start_time(filepath: str, duration: float) -> datetime:
+        """Dedueix l'inici de la mesura a partir del nom del fitxer o de la data de modificació."""
+        try:
+            return datetime.strptime(os.path.basename(filepath), DEFAULT_FILENAME_PATTERN)
+        except ValueError:
+            modified = datetime.fromtimestamp(os.path.getmtime(filepath))
+            return modified - timedelta(seconds=duration)
@@ -0,0 +1,297 @@
+"""
+Gestor de fitxers comprimits per a arxius de mesures de llarga durada
+
+Format del fitxer (.lvz):
+    MAGIC | longitud capçalera (uint32) | capçalera JSON (codec, columnes)
+    seguit de trames: tipus (1 byte) | longitud (uint32) | contingut
+
+    Trama 'D' (dades): nrows (uint32), t_first, t_last (float64) i les columnes
+                       codificades amb XOR + transposició de bytes, comprimides
+    Trama 'M' (metadades): JSON comprimit; l'última trama 'M' és la vàlida
+
+Cada flush afegeix una trama al final del fitxer (cost proporcional a les dades
+noves) i la lectura descomprimeix trama a trama.
+"""
+import json
+import os
+import struct
+import time
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from data.compression import get_codec, encode_series, decode_series
+from data.file_handler import FileHandler
+from utils.config import (
+    COMPRESSION_CODEC, COMPRESSED_FILE_EXTENSION, COMPRESSED_FRAME_ROWS, COMPRESSED_MAX_FRAME_AGE
+)
+
+
+class CompressedFileHandler(FileHandler):
+    """Gestiona l'escriptura i lectura de mesures en format comprimit."""
+
+    MAGIC = b'LVZ1'
+    FRAME_DATA = b'D'
+    FRAME_METADATA = b'M'
+
+    _LENGTH = struct.Struct('<I')
+    _FRAME = struct.Struct('<cI')
+    _DATA_HEADER = struct.Struct('<Idd')
+
+    def __init__(self, filepath: str, columns: Optional[List[str]] = None,
+                 codec: Optional[str] = None):
+        """
+        Inicialitza el gestor de fitxers comprimits.
+
+        Args:
+            filepath: Camí complet del fitxer
+            columns: Columnes del fitxer (per defecte FileHandler.COLUMNS)
+            codec: Codec de compressió (per defecte COMPRESSION_CODEC)
+        """
+        super().__init__(filepath, columns)
+        self.codec, self._compress, _ = get_codec(codec or COMPRESSION_CODEC)
+        self._buffer_started = 0.0  # Instant (monotònic) en què va entrar la fila més antiga del buffer
+
+    def create_file(self):
+        """Crea un nou fitxer comprimit amb la capçalera i les metadades inicials."""
+        header = json.dumps({'codec': self.codec, 'columns': self.columns}).encode('utf-8')
+        with open(self.filepath, 'wb') as f:
+            f.write(self.MAGIC)
+            f.write(self._LENGTH.pack(len(header)))
+            f.write(header)
+        self._append_frame(self.FRAME_METADATA,
+                           self._compress(json.dumps(self.get_metadata()).encode('utf-8')))
+
+    def append_row(self, row: dict):
+        """Afegeix una fila al buffer i recorda quan hi ha entrat la primera."""
+        if not self.data_buffer:
+            self._buffer_started = time.monotonic()
+        super().append_row(row)
+
+    def flush_to_file(self, force: bool = False):
+        """
+        Afegeix el buffer de dades al final del fitxer com una nova trama.
+
+        Les trames petites comprimeixen malament: si no es força, s'espera a tenir
+        com a mínim COMPRESSED_FRAME_ROWS files, però mai més de COMPRESSED_MAX_FRAME_AGE
+        segons (amb períodes llargs, les dades no poden quedar només en memòria).
+
+        Args:
+            force: Escriure la trama encara que el buffer sigui petit
+        """
+        if not self.data_buffer:
+            return
+        if (not force and len(self.data_buffer) < COMPRESSED_FRAME_ROWS
+                and time.monotonic() - self._buffer_started < COMPRESSED_MAX_FRAME_AGE):
+            return
+
+        table = np.array(
+            [[row[column] for column in self.columns] for row in self.data_buffer],
+            dtype=np.float64
+        )
+        encoded = b''.join(encode_series(table[:, i]) for i in range(len(self.columns)))
+        payload = self._DATA_HEADER.pack(len(table), table[0, 0], table[-1, 0])
+        self._append_frame(self.FRAME_DATA, payload + self._compress(encoded))
+
+        self.data_buffer.clear()
+
+    def close(self):
+        """Escriu les dades pendents i les metadades finals."""
+        self.flush_to_file(force=True)
+        self._append_frame(self.FRAME_METADATA,
+                           self._compress(json.dumps(self.get_metadata()).encode('utf-8')))
+
+    def _append_frame(self, frame_type: bytes, payload: bytes):
+        """Afegeix una trama al final del fitxer."""
+        with open(self.filepath, 'ab') as f:
+            f.write(self._FRAME.pack(frame_type, len(payload)))
+            f.write(payload)
+
+    @classmethod
+    def _read_header(cls, f) -> dict:
+        """Llegeix i valida la capçalera del fitxer."""
+        if f.read(len(cls.MAGIC)) != cls.MAGIC:
+            raise ValueError("El fitxer no té el format comprimit esperat")
+        (length,) = cls._LENGTH.unpack(f.read(cls._LENGTH.size))
+        return json.loads(f.read(length).decode('utf-8'))
+
+    @classmethod
+    def _iter_frames(cls, f, skip_data: bool = False):
+        """
+        Recorre les trames del fitxer.
+
+        Yields:
+            Tuples (tipus, contingut); si skip_data és True, les trames de dades
+            no es llegeixen i el contingut és None
+        """
+        while True:
+            raw = f.read(cls._FRAME.size)
+            if len(raw) < cls._FRAME.size:
+                return
+            frame_type, length = cls._FRAME.unpack(raw)
+            if skip_data and frame_type == cls.FRAME_DATA:
+                f.seek(length, os.SEEK_CUR)
+                yield frame_type, None
+                continue
+            payload = f.read(length)
+            if len(payload) < length:
+                # Trama incompleta (p.ex. tall d'alimentació durant l'escriptura)
+                return
+            yield frame_type, payload
+
+    @classmethod
+    def iter_blocks(cls, filepath: str, t_from: Optional[float] = None,
+                    t_to: Optional[float] = None) -> Iterator[pd.DataFrame]:
+        """
+        Llegeix el fitxer de forma incremental, descomprimint una trama cada vegada.
+
+        Args:
+            filepath: Camí complet del fitxer
+            t_from: Si s'indica, s'ometen (sense descomprimir) les trames anteriors
+            t_to: Si s'indica, s'ometen les trames posteriors
+
+        Yields:
+            DataFrame amb les files de cada trama de dades
+        """
+        with open(filepath, 'rb') as f:
+            header = cls._read_header(f)
+            columns = header['columns']
+            _, _, decompress = get_codec(header['codec'])
+
+            for frame_type, payload in cls._iter_frames(f):
+                if frame_type != cls.FRAME_DATA:
+                    continue
+                nrows, t_first, t_last = cls._DATA_HEADER.unpack_from(payload)
+                if ((t_from is not None and t_last < t_from)
+                        or (t_to is not None and t_first > t_to)):
+                    continue
+                encoded = decompress(payload[cls._DATA_HEADER.size:])
+                size = nrows * 8
+                yield pd.DataFrame({
+                    column: decode_series(encoded[i * size:(i + 1) * size], nrows)
+                    for i, column in enumerate(columns)
+                })
+
+    @staticmethod
+    def load_table(filepath: str) -> pd.DataFrame:
+        """
+        Carrega totes les columnes d'un fitxer comprimit, sense validar-les.
+
+        Args:
+            filepath: Camí complet del fitxer
+
+        Returns:
+            DataFrame amb les dades (llança una excepció si hi ha error)
+        """
+        blocks = list(CompressedFileHandler.iter_blocks(filepath))
+        if blocks:
+            return pd.concat(blocks, ignore_index=True)
+        with open(filepath, 'rb') as f:
+            header = CompressedFileHandler._read_header(f)
+        return pd.DataFrame(columns=header['columns'], dtype='float64')
+
+    @staticmethod
+    def load_time_range(filepath: str, t_from: float, t_to: float) -> pd.DataFrame:
+        """
+        Carrega les files d'un interval de temps descomprimint només les trames necessàries.
+
+        Args:
+            filepath: Camí complet del fitxer
+            t_from: Temps inicial (s)
+            t_to: Temps final (s)
+
+        Returns:
+            DataFrame amb les files de l'interval (llança una excepció si hi ha error)
+        """
+        blocks = list(CompressedFileHandler.iter_blocks(filepath, t_from, t_to))
+        if not blocks:
+            with open(filepath, 'rb') as f:
+                header = CompressedFileHandler._read_header(f)
+            return pd.DataFrame(columns=header['columns'], dtype='float64')
+        df = pd.concat(blocks, ignore_index=True)
+        mask = (df['time_seconds'] >= t_from) & (df['time_seconds'] <= t_to)
+        return df[mask].reset_index(drop=True)
+
+    @staticmethod
+    def load_file(filepath: str) -> Optional[pd.DataFrame]:
+        """
+        Carrega dades d'un fitxer comprimit existent.
+
+        Args:
+            filepath: Camí complet del fitxer
+
+        Returns:
+            DataFrame amb les dades o None si hi ha error
+        """
+        try:
+            df = CompressedFileHandler.load_table(filepath)
+
+            # Validar columnes obligatòries
+            required_columns = ['time_seconds', 'voltage_sensor1', 'voltage_sensor2']
+            if not all(col in df.columns for col in required_columns):
+                raise ValueError(f"El fitxer ha de contenir les columnes: {required_columns}")
+
+            return df
+
+        except Exception as e:
+            print(f"Error carregant fitxer: {e}")
+            return None
+
+    @staticmethod
+    def load_metadata(filepath: str) -> Optional[dict]:
+        """
+        Carrega només les metadades (l'última trama 'M'), sense descomprimir les dades.
+
+        Args:
+            filepath: Camí complet del fitxer
+
+        Returns:
+            Diccionari de metadades, o None si hi ha error
+        """
+        try:
+            with open(filepath, 'rb') as f:
+                header = CompressedFileHandler._read_header(f)
+                _, _, decompress = get_codec(header['codec'])
+                metadata = None
+                for frame_type, payload in CompressedFileHandler._iter_frames(f, skip_data=True):
+                    if frame_type == CompressedFileHandler.FRAME_METADATA:
+                        metadata = payload
+            if metadata is None:
+                return None
+            return json.loads(decompress(metadata).decode('utf-8'))
+        except Exception:
+            return None
+
+    @staticmethod
+    def archive_file(source: str, destination: Optional[str] = None,
+                     block_size: int = 10000) -> str:
+        """
+        Converteix una mesura existent (p.ex. Excel) al format comprimit.
+
+        Args:
+            source: Camí del fitxer d'origen
+            destination: Camí del fitxer comprimit (per defecte, mateix nom amb
+                         l'extensió comprimida)
+            block_size: Nombre de files per trama
+
+        Returns:
+            Camí del fitxer comprimit creat
+        """
+        df = FileHandler.load_file(source)
+        if df is None:
+            raise ValueError(f"No s'ha pogut llegir {source}")
+        if destination is None:
+            destination = os.path.splitext(source)[0] + COMPRESSED_FILE_EXTENSION
+
+        handler = CompressedFileHandler(destination, list(df.columns))
+        metadata = FileHandler.load_metadata(source) or {}
+        metadata.pop('summary', None)
+        handler.metadata.update(metadata)
+        handler.create_file()
+        for start in range(0, len(df), block_size):
+            for row in df.iloc[start:start + block_size].to_dict('records'):
+                handler.append_row(row)
+            handler.flush_to_file(force=True)
+        handler.close()
+        return destination
@@ -0,0 +1,94 @@
+"""
+Codificació i compressió de sèries de valors float per als arxius de mesures
+Les sèries de nivell d'aigua varien lentament: codificar cada valor amb XOR
+respecte l'anterior i agrupar els bytes per posició deixa molts bytes a zero
+que qualsevol compressor redueix dràsticament.
+"""
+import zlib
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+# Compressors ràpids opcionals (si no hi són, s'usa zlib de la llibreria estàndard)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+
+def available_codecs() -> list:
+    """Retorna els codecs disponibles en aquest sistema, del preferit al menys preferit."""
+    codecs = []
+    if zstandard is not None:
+        codecs.append('zstd')
+    if lz4_frame is not None:
+        codecs.append('lz4')
+    codecs.append('zlib')
+    return codecs
+
+
+def get_codec(name: Optional[str] = None) -> Tuple[str, Callable[[bytes], bytes],
+                                                   Callable[[bytes], bytes]]:
+    """
+    Obté les funcions de compressió i descompressió d'un codec.
+
+    Args:
+        name: Nom del codec ('zstd', 'lz4', 'zlib'), o None/'auto' pel més ràpid disponible
+
+    Returns:
+        Tupla (name, compress, decompress)
+    """
+    if name in (None, 'auto'):
+        name = available_codecs()[0]
+
+    if name == 'zstd':
+        if zstandard is None:
+            raise ValueError("El codec 'zstd' requereix el paquet zstandard")
+        return name, zstandard.ZstdCompressor(level=3).compress, \
+            zstandard.ZstdDecompressor().decompress
+    if name == 'lz4':
+        if lz4_frame is None:
+            raise ValueError("El codec 'lz4' requereix el paquet lz4")
+        return name, lz4_frame.compress, lz4_frame.decompress
+    if name == 'zlib':
+        return name, lambda data: zlib.compress(data, 1), zlib.decompress
+
+    raise ValueError(f"Codec desconegut: {name}")
+
+
+def encode_series(values: np.ndarray) -> bytes:
+    """
+    Codifica una sèrie float64 amb XOR respecte el valor anterior i transposició de bytes.
+
+    Args:
+        values: Array 1D de valors float64
+
+    Returns:
+        Bytes codificats (mateixa mida que l'entrada, però molt més compressibles)
+    """
+    bits = np.ascontiguousarray(values, dtype='<f8').view('<u8')
+    xored = bits.copy()
+    xored[1:] ^= bits[:-1]
+    # Agrupar els bytes per posició: els bytes alts (signe/exponent) queden junts
+    return xored.view(np.uint8).reshape(-1, 8).T.tobytes()
+
+
+def decode_series(data: bytes, count: int) -> np.ndarray:
+    """
+    Descodifica una sèrie codificada amb encode_series.
+
+    Args:
+        data: Bytes codificats
+        count: Nombre de valors de la sèrie
+
+    Returns:
+        Array 1D de valors float64
+    """
+    shuffled = np.frombuffer(data, dtype=np.uint8, count=count * 8).reshape(8, count)
+    xored = np.ascontiguousarray(shuffled.T).view('<u8').ravel()
+    return np.bitwise_xor.accumulate(xored).view('<f8')
@@ -0,0 +1,162 @@
+"""
+Compensació de la deriva lenta dels sensors (temperatura, envelliment...)
+La deriva s'estima en línia i es resta a cada bloc de mostres de forma vectoritzada:
+- 'zero_check': l'usuari fa comprovacions de zero amb el nivell en l'estat de
+  referència; la diferència respecte de la primera és la deriva, i el ritme entre
+  les dues últimes comprovacions s'extrapola fins a la següent
+- 'reference': un dels sensors és a un dipòsit de referència amb nivell constant;
+  la seva variació (suavitzada) es resta als altres canals
+Totes les correccions aplicades queden registrades per poder desfer-les.
+"""
+import math
+from typing import List, Optional
+
+import numpy as np
+
+from utils.config import (
+    SAMPLE_RATE, DRIFT_COMPENSATION_MODE, DRIFT_REFERENCE_SENSOR,
+    DRIFT_TIME_CONSTANT, DRIFT_LOG_STEP
+)
+
+MODE_NONE = "none"
+MODE_ZERO_CHECK = "zero_check"
+MODE_REFERENCE = "reference"
+
+
+class DriftCompensator:
+    """Estima la deriva de cada canal i la resta als blocs de mostres."""
+
+    def __init__(self, mode: str = DRIFT_COMPENSATION_MODE, num_channels: int = 2,
+                 sample_rate: float = SAMPLE_RATE,
+                 reference_channel: int = DRIFT_REFERENCE_SENSOR,
+                 time_constant: float = DRIFT_TIME_CONSTANT,
+                 log_step: float = DRIFT_LOG_STEP):
+        """
+        Inicialitza el compensador.
+
+        Args:
+            mode: 'none', 'zero_check' o 'reference'
+            num_channels: Nombre de canals de cada bloc
+            sample_rate: Freqüència de mostreig de les mostres brutes (Hz)
+            reference_channel: Canal de referència (mode 'reference')
+            time_constant: Constant de temps del suavitzat de la referència (s)
+            log_step: Canvi mínim de correcció (V) per afegir una entrada al registre
+        """
+        if mode not in (MODE_NONE, MODE_ZERO_CHECK, MODE_REFERENCE):
+            raise ValueError(f"Mode de compensació desconegut: {mode}")
+        self.mode = mode
+        self.num_channels = num_channels
+        self.sample_rate = sample_rate
+        self.reference_channel = reference_channel
+        self.time_constant = time_constant
+        self.log_step = log_step
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        """Indica si la compensació està activada."""
+        return self.mode != MODE_NONE
+
+    def reset(self):
+        """Oblida la línia base i les correccions (p.ex. en iniciar una mesura)."""
+        self.baseline: Optional[np.ndarray] = None
+        self.offset = np.zeros(self.num_channels)  # Correcció a l'instant t_ref (V)
+        self.rate = np.zeros(self.num_channels)    # Ritme de deriva (V/s)
+        self.t_ref = 0.0
+        self.reference_drift = 0.0  # Deriva suavitzada del canal de referència (V)
+        self.last_time = 0.0
+        self.last_raw: Optional[np.ndarray] = None  # Mitjana bruta de l'últim bloc
+        self.checks = 0
+        self.log: List[dict] = []
+
+    def compensate(self, t0: float, block: np.ndarray) -> np.ndarray:
+        """
+        Resta la deriva estimada a un bloc de mostres brutes.
+
+        Args:
+            t0: Temps de la primera mostra del bloc (s des de l'inici)
+            block: Array de forma (num_channels, n)
+
+        Returns:
+            Bloc corregit (nou array de la mateixa forma)
+        """
+        block = np.asarray(block, dtype=np.float64)
+        n = block.shape[1]
+        if n == 0:
+            return block
+        self.last_raw = block.mean(axis=1)
+        self.last_time = t0 + n / self.sample_rate
+
+        if self.mode == MODE_REFERENCE:
+            self._update_reference(t0, n)
+        if np.any(self.rate):
+            times = t0 + np.arange(n) / self.sample_rate
+            return block - (self.offset[:, None] + self.rate[:, None] * (times - self.t_ref))
+        return block - self.offset[:, None]
+
+    def zero_check(self, t: Optional[float] = None, values=None) -> np.ndarray:
+        """
+        Registra una comprovació de zero (el nivell és a l'estat de referència).
+        La primera comprovació fixa la línia base; les següents mesuren la deriva.
+
+        Args:
+            t: Instant de la comprovació (per defecte, el final de l'últim bloc)
+            values: Voltatges bruts de referència (per defecte, la mitjana de l'últim bloc)
+
+        Returns:
+            Deriva mesurada de cada canal (V)
+        """
+        if t is None:
+            t = self.last_time
+        values = self.last_raw if values is None else np.asarray(values, dtype=np.float64)
+        if values is None:
+            raise ValueError("Encara no hi ha cap lectura per a la comprovació de zero")
+
+        if self.baseline is None:
+            self.baseline = values.copy()
+        drift = values - self.baseline
+        if self.checks > 0 and t > self.t_ref:
+            self.rate = (drift - self.offset) / (t - self.t_ref)
+        self.offset = drift
+        self.t_ref = t
+        self.checks += 1
+        self._log(t, "zero_check")
+        return drift
+
+    def parameters(self) -> dict:
+        """
+        Paràmetres de la compensació per guardar a les metadades de la mesura.
+        La correcció aplicada a l'instant t és offset + rate * (t - time) de
+        l'última entrada del registre amb time <= t.
+        """
+        return {
+            'mode': self.mode,
+            'reference_channel': self.reference_channel if self.mode == MODE_REFERENCE else None,
+            'baseline': self.baseline.tolist() if self.baseline is not None else None,
+            'log': self.log
+        }
+
+    def _update_reference(self, t0: float, n: int):
+        """Actualitza la deriva a partir de la mitjana del canal de referència."""
+        reference = self.last_raw[self.reference_channel]
+        if self.baseline is None:
+            self.baseline = self.last_raw.copy()
+            self._log(t0, "baseline")
+            return
+        # Mitjana mòbil exponencial: les onades i el soroll no passen a la correcció
+        alpha = 1.0 - math.exp(-n / (self.sample_rate * self.time_constant))
+        drift = reference - self.baseline[self.reference_channel]
+        self.reference_drift += alpha * (drift - self.reference_drift)
+        self.offset[:] = self.reference_drift
+        self.offset[self.reference_channel] = 0.0  # El canal de referència es guarda sense tocar
+        if not self.log or np.max(np.abs(self.offset - self.log[-1]['offset'])) >= self.log_step:
+            self._log(t0, "reference")
+
+    def _log(self, t: float, source: str):
+        """Afegeix la correcció actual al registre."""
+        self.log.append({
+            'time': round(float(t), 6),
+            'offset': self.offset.tolist(),
+            'rate': self.rate.tolist(),
+            'source': source
+        })
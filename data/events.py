@@ -0,0 +1,140 @@
+"""
+Detecció d'esdeveniments sobre les dades en directe (llindars i ritme de canvi)
+Cada regla s'avalua mostra a mostra sobre el bloc sencer de forma vectoritzada
+(mitjana mòbil amb sumes acumulades i histèresi per propagació de l'últim estat),
+de manera que els esdeveniments tenen la resolució temporal de les dades brutes i
+el cost per bloc és negligible.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from utils.config import SAMPLE_RATE, EVENT_RULES
+
+RULE_TYPES = ("above", "below", "rate_above", "rate_below")
+RULE_QUANTITIES = ("voltage", "height")
+
+# Valors per defecte de les regles (vegeu EVENT_RULES a utils.config)
+DEFAULT_RULE = {
+    'name': "",
+    'channel': 0,
+    'quantity': "height",   # 'voltage' (V) o 'height' (cm, amb el calibratge actual)
+    'type': "above",        # 'above', 'below', 'rate_above' o 'rate_below'
+    'threshold': 0.0,       # unitats de la magnitud, o unitats/s per als ritmes
+    'hysteresis': 0.0,      # marge per donar l'esdeveniment per acabat
+    'window': 0.1,          # segons de mitjana mòbil (i interval del ritme de canvi)
+}
+
+
+class EventEngine:
+    """Avalua un conjunt de regles sobre cada bloc de mostres."""
+
+    def __init__(self, rules: Optional[List[dict]] = None, sample_rate: float = SAMPLE_RATE):
+        """
+        Inicialitza el motor de regles.
+
+        Args:
+            rules: Llista de regles (per defecte EVENT_RULES)
+            sample_rate: Freqüència de mostreig dels blocs (Hz)
+        """
+        self.sample_rate = sample_rate
+        self.rules = []
+        for rule in (EVENT_RULES if rules is None else rules):
+            rule = dict(DEFAULT_RULE, **rule)
+            if rule['type'] not in RULE_TYPES:
+                raise ValueError(f"Tipus de regla desconegut: {rule['type']}")
+            if rule['quantity'] not in RULE_QUANTITIES:
+                raise ValueError(f"Magnitud de regla desconeguda: {rule['quantity']}")
+            if not rule['name']:
+                rule['name'] = f"{rule['type']} {rule['threshold']} (canal {rule['channel'] + 1})"
+            rule['samples'] = max(1, int(round(rule['window'] * sample_rate)))
+            self.rules.append(rule)
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        """Indica si hi ha regles a avaluar."""
+        return bool(self.rules)
+
+    @property
+    def needs_heights(self) -> bool:
+        """Indica si alguna regla treballa amb alçades (cal convertir el bloc)."""
+        return any(rule['quantity'] == "height" for rule in self.rules)
+
+    def reset(self):
+        """Oblida l'estat de les regles i els esdeveniments (p.ex. en iniciar una mesura)."""
+        self.history = [np.empty(0) for _ in self.rules]
+        self.active = [False for _ in self.rules]
+        self.events: List[dict] = []
+
+    def process(self, t0: float, voltages: np.ndarray,
+                heights: Optional[np.ndarray] = None) -> List[dict]:
+        """
+        Avalua totes les regles sobre un bloc.
+
+        Args:
+            t0: Temps de la primera mostra del bloc (s des de l'inici)
+            voltages: Bloc de voltatges de forma (canals, n)
+            heights: Bloc d'alçades de la mateixa forma (None si no es coneixen)
+
+        Returns:
+            Esdeveniments nous ordenats per temps
+            ({'time', 'rule', 'channel', 'kind': 'start'/'end', 'value'})
+        """
+        new_events = []
+        for index, rule in enumerate(self.rules):
+            source = heights if rule['quantity'] == "height" else voltages
+            if source is None:
+                continue
+            new_events.extend(self._evaluate(index, rule, t0, source[rule['channel']]))
+        new_events.sort(key=lambda event: event['time'])
+        self.events.extend(new_events)
+        return new_events
+
+    def _evaluate(self, index: int, rule: dict, t0: float, samples: np.ndarray) -> List[dict]:
+        """Avalua una regla sobre les mostres noves d'un canal."""
+        w = rule['samples']
+        history = self.history[index]
+        x = np.concatenate((history, np.asarray(samples, dtype=np.float64)))
+        # Es guarden prou mostres per a la mitjana (w-1) i per al ritme (2w-1)
+        self.history[index] = x[-(2 * w - 1):]
+
+        # Mitjana mòbil: smoothed[j] correspon a la mostra j + w - 1 de x
+        cumulative = np.concatenate(([0.0], np.cumsum(x)))
+        smoothed = (cumulative[w:] - cumulative[:-w]) / w
+        if rule['type'].startswith("rate_"):
+            signal = (smoothed[w:] - smoothed[:-w]) * (self.sample_rate / w)
+            first = 2 * w - 1  # Índex a x de la primera mostra amb valor
+        else:
+            signal = smoothed
+            first = w - 1
+
+        # Només les mostres noves (les de l'historial ja s'han avaluat)
+        skip = max(0, len(history) - first)
+        signal = signal[skip:]
+        if len(signal) == 0:
+            return []
+        offset = first + skip - len(history)  # Índex dins del bloc del primer valor
+
+        threshold, hysteresis = rule['threshold'], rule['hysteresis']
+        if rule['type'] in ("above", "rate_above"):
+            set_mask = signal > threshold
+            reset_mask = signal < threshold - hysteresis
+        else:
+            set_mask = signal < threshold
+            reset_mask = signal > threshold + hysteresis
+
+        # Histèresi: cada mostra hereta l'estat de l'última que l'ha fixat
+        decided = set_mask | reset_mask
+        last = np.maximum.accumulate(np.where(decided, np.arange(len(signal)), -1))
+        state = np.where(last >= 0, set_mask[np.maximum(last, 0)], self.active[index])
+        changes = np.flatnonzero(np.diff(np.concatenate(([self.active[index]], state))))
+        self.active[index] = bool(state[-1])
+
+        return [{
+            'time': round(float(t0 + (offset + i) / self.sample_rate), 6),
+            'rule': rule['name'],
+            'channel': rule['channel'],
+            'kind': "start" if state[i] else "end",
+            'value': float(signal[i])
+        } for i in changes]
@@ -1,42 +1,55 @@
 """
 Gestor de fitxers Excel per emmagatzemar i carregar dades
-Amb suport per columnes d'alçada
+Amb suport per columnes d'alçada i metadades de la mesura
 """
+import json
 import pandas as pd
-from typing import Optional
+from typing import List, Optional
+
+from data.processor import RunSummary
+from utils.config import SUMMARY_BLOCK_DURATION, COMPRESSED_FILE_EXTENSION, MANIFEST_EXTENSION
 
 
 class FileHandler:
     """Gestiona l'escriptura i lectura de fitxers Excel amb dades d'adquisició."""
     
-    def __init__(self, filepath: str):
+    COLUMNS = [
+        'time_seconds',
+        'voltage_sensor1',
+        'voltage_sensor2',
+        'height_sensor1',
+        'height_sensor2'
+    ]
+    
+    # Full amb les metadades (parells clau → valor JSON), després del full de dades
+    METADATA_SHEET = 'metadades'
+    # Full amb les estadístiques per blocs del resum (una fila per bloc): una mesura
+    # llarga en té massa per a una sola cel·la (màxim 32767 caràcters)
+    BLOCKS_SHEET = 'resum_blocs'
+    BLOCK_STATISTICS = ('count', 'mean', 'min', 'max', 'std')
+    
+    def __init__(self, filepath: str, columns: Optional[List[str]] = None):
         """
         Inicialitza el gestor de fitxers.
         
         Args:
             filepath: Camí complet del fitxer Excel
+            columns: Columnes del fitxer (per defecte COLUMNS); la primera ha de ser el temps
         """
         self.filepath = filepath
+        self.columns = list(columns) if columns else list(self.COLUMNS)
         self.data_buffer = []
+        # Metadades addicionals de la mesura (inici, període, calibratge...)
+        self.metadata = {}
+        # Estadístiques calculades incrementalment durant l'adquisició
+        self.summary = RunSummary(self.columns[1:], SUMMARY_BLOCK_DURATION)
         
     def create_file(self):
         """Crea un nou fitxer Excel amb les capçaleres adequades."""
-        df = pd.DataFrame(columns=[
-            'time_seconds', 
-            'voltage_sensor1', 
-            'voltage_sensor2',
-            'height_sensor1',
-            'height_sensor2'
-        ])
+        df = pd.DataFrame(columns=self.columns)
         # Especificar dtypes per evitar warnings
-        df = df.astype({
-            'time_seconds': 'float64',
-            'voltage_sensor1': 'float64',
-            'voltage_sensor2': 'float64',
-            'height_sensor1': 'float64',
-            'height_sensor2': 'float64'
-        })
-        df.to_excel(self.filepath, index=False, engine='openpyxl')
+        df = df.astype({column: 'float64' for column in self.columns})
+        self._write_workbook(df)
         
     def append_data(self, time: float, voltage1: float, voltage2: float, 
                     height1: Optional[float] = None, height2: Optional[float] = None):
@@ -50,13 +63,24 @@ class FileHandler:
             height1: Alçada del sensor 1 (cm) - opcional
             height2: Alçada del sensor 2 (cm) - opcional
         """
-        self.data_buffer.append({
+        row = {
             'time_seconds': time,
             'voltage_sensor1': voltage1,
             'voltage_sensor2': voltage2,
             'height_sensor1': height1 if height1 is not None else float('nan'),
             'height_sensor2': height2 if height2 is not None else float('nan')
-        })
+        }
+        self.append_row(row)
+    
+    def append_row(self, row: dict):
+        """
+        Afegeix una fila genèrica (columna → valor) al buffer.
+        
+        Args:
+            row: Diccionari amb un valor per cada columna del fitxer
+        """
+        self.data_buffer.append(row)
+        self.summary.update(row[self.columns[0]], row)
         
     def flush_to_file(self):
         """Escriu el buffer de dades al fitxer Excel."""
@@ -82,23 +106,147 @@ class FileHandler:
             df_combined = df_new
         
         # Assegurar que els tipus de dades són correctes
-        df_combined = df_combined.astype({
-            'time_seconds': 'float64',
-            'voltage_sensor1': 'float64',
-            'voltage_sensor2': 'float64',
-            'height_sensor1': 'float64',
-            'height_sensor2': 'float64'
-        })
+        df_combined = df_combined.astype({column: 'float64' for column in self.columns})
         
         # Guardar
-        df_combined.to_excel(self.filepath, index=False, engine='openpyxl')
+        self._write_workbook(df_combined)
         
         # Netejar buffer
         self.data_buffer.clear()
         
     def close(self):
-        """Tanca el fitxer i assegura que totes les dades estan guardades."""
-        self.flush_to_file()
+        """Tanca el fitxer i assegura que totes les dades i metadades estan guardades."""
+        if self.data_buffer:
+            self.flush_to_file()
+        else:
+            # Reescriure només per actualitzar les metadades finals
+            df = pd.read_excel(self.filepath, engine='openpyxl')
+            self._write_workbook(df[self.columns])
+    
+    def get_metadata(self) -> dict:
+        """Retorna totes les metadades de la mesura, incloent el resum estadístic."""
+        metadata = dict(self.metadata)
+        metadata['summary'] = self.summary.to_dict()
+        return metadata
+    
+    def _write_workbook(self, df: pd.DataFrame):
+        """Escriu el full de dades, el de metadades i el de blocs del resum al fitxer Excel."""
+        values = self.get_metadata()
+        summary = dict(values['summary'])
+        blocks = self._blocks_table(summary.pop('blocks'))
+        values['summary'] = summary
+        metadata = pd.DataFrame(
+            [(key, json.dumps(value)) for key, value in values.items()],
+            columns=['key', 'value']
+        )
+        with pd.ExcelWriter(self.filepath, engine='openpyxl') as writer:
+            # El full de dades ha de ser el primer (compatibilitat amb load_file)
+            df.to_excel(writer, index=False)
+            metadata.to_excel(writer, sheet_name=self.METADATA_SHEET, index=False)
+            blocks.to_excel(writer, sheet_name=self.BLOCKS_SHEET, index=False)
+    
+    def _blocks_table(self, blocks: list) -> pd.DataFrame:
+        """Converteix els blocs del resum en una taula (start, columna_estadística...)."""
+        columns = ['start'] + [f'{column}_{name}' for column in self.summary.columns
+                               for name in self.BLOCK_STATISTICS]
+        rows = [
+            [block['start']] + [block['stats'][column][name] for column in self.summary.columns
+                                for name in self.BLOCK_STATISTICS]
+            for block in blocks
+        ]
+        return pd.DataFrame(rows, columns=columns, dtype='float64')
+    
+    @classmethod
+    def _blocks_from_table(cls, df: pd.DataFrame) -> list:
+        """Reconstrueix els blocs del resum a partir del full de blocs."""
+        value_columns = []
+        for name in df.columns[1:]:
+            column = name.rsplit('_', 1)[0]
+            if column not in value_columns:
+                value_columns.append(column)
+        blocks = []
+        for row in df.to_dict('records'):
+            stats = {}
+            for column in value_columns:
+                stats[column] = {name: float(row[f'{column}_{name}']) for name in cls.BLOCK_STATISTICS}
+                stats[column]['count'] = int(stats[column]['count'])
+            blocks.append({'start': float(row['start']), 'stats': stats})
+        return blocks
+    
+    @staticmethod
+    def load_metadata(filepath: str) -> Optional[dict]:
+        """
+        Carrega només les metadades d'una mesura, sense llegir les dades.
+        
+        Args:
+            filepath: Camí complet del fitxer Excel
+            
+        Returns:
+            Diccionari de metadades, o None si el fitxer no en té (fitxers antics)
+        """
+        if filepath.endswith(COMPRESSED_FILE_EXTENSION):
+            from data.compressed_file_handler import CompressedFileHandler
+            return CompressedFileHandler.load_metadata(filepath)
+        if filepath.endswith(MANIFEST_EXTENSION):
+            from data.segments import load_segmented_metadata
+            return load_segmented_metadata(filepath)
+        
+        try:
+            with pd.ExcelFile(filepath, engine='openpyxl') as workbook:
+                df = workbook.parse(FileHandler.METADATA_SHEET)
+                metadata = {row['key']: json.loads(row['value']) for _, row in df.iterrows()}
+                # Els fitxers antics tenen els blocs dins del resum, al full de metadades
+                if 'summary' in metadata and FileHandler.BLOCKS_SHEET in workbook.sheet_names:
+                    blocks = workbook.parse(FileHandler.BLOCKS_SHEET)
+                    metadata['summary']['blocks'] = FileHandler._blocks_from_table(blocks)
+            return metadata
+        except Exception:
+            return None
+    
+    @staticmethod
+    def load_table(filepath: str) -> pd.DataFrame:
+        """
+        Carrega totes les columnes d'un fitxer de dades, sense validar-les.
+        
+        Args:
+            filepath: Camí complet del fitxer
+            
+        Returns:
+            DataFrame amb les dades (llança una excepció si hi ha error)
+        """
+        if filepath.endswith(COMPRESSED_FILE_EXTENSION):
+            from data.compressed_file_handler import CompressedFileHandler
+            return CompressedFileHandler.load_table(filepath)
+        if filepath.endswith(MANIFEST_EXTENSION):
+            from data.segments import iter_segments
+            return pd.concat([df for _, df in iter_segments(filepath)], ignore_index=True)
+        return pd.read_excel(filepath, engine='openpyxl')
+    
+    @staticmethod
+    def load_time_range(filepath: str, t_from: float, t_to: float) -> pd.DataFrame:
+        """
+        Carrega només les files d'un interval de temps.
+        
+        Els formats comprimit i segmentat només llegeixen les trames o segments que
+        se solapen amb l'interval; l'Excel s'ha de llegir sencer i després es filtra.
+        
+        Args:
+            filepath: Camí complet del fitxer
+            t_from: Temps inicial (s)
+            t_to: Temps final (s)
+            
+        Returns:
+            DataFrame amb les files de l'interval (llança una excepció si hi ha error)
+        """
+        if filepath.endswith(COMPRESSED_FILE_EXTENSION):
+            from data.compressed_file_handler import CompressedFileHandler
+            return CompressedFileHandler.load_time_range(filepath, t_from, t_to)
+        if filepath.endswith(MANIFEST_EXTENSION):
+            from data.segments import load_segmented_range
+            return load_segmented_range(filepath, t_from, t_to)
+        df = pd.read_excel(filepath, engine='openpyxl')
+        mask = (df['time_seconds'] >= t_from) & (df['time_seconds'] <= t_to)
+        return df[mask].reset_index(drop=True)
         
     @staticmethod
     def load_file(filepath: str) -> Optional[pd.DataFrame]:
@@ -111,6 +259,13 @@ class FileHandler:
         Returns:
             DataFrame amb les dades o None si hi ha error
         """
+        if filepath.endswith(COMPRESSED_FILE_EXTENSION):
+            from data.compressed_file_handler import CompressedFileHandler
+            return CompressedFileHandler.load_file(filepath)
+        if filepath.endswith(MANIFEST_EXTENSION):
+            from data.segments import load_segmented
+            return load_segmented(filepath)
+        
         try:
             df = pd.read_excel(filepath, engine='openpyxl')
             
@@ -130,3 +285,20 @@ class FileHandler:
         except Exception as e:
             print(f"Error carregant fitxer: {e}")
             return None
+
+
+def create_file_handler(filepath: str, columns: Optional[List[str]] = None) -> FileHandler:
+    """
+    Crea el gestor de fitxers adequat segons l'extensió del fitxer.
+    
+    Args:
+        filepath: Camí complet del fitxer (.xlsx o format comprimit)
+        columns: Columnes del fitxer (per defecte FileHandler.COLUMNS)
+        
+    Returns:
+        FileHandler (Excel) o CompressedFileHandler
+    """
+    if filepath.endswith(COMPRESSED_FILE_EXTENSION):
+        from data.compressed_file_handler import CompressedFileHandler
+        return CompressedFileHandler(filepath, columns)
+    return FileHandler(filepath, columns)
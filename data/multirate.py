@@ -0,0 +1,109 @@
+"""
+Emmagatzematge multi-taxa: fitxer de dades complet + fitxer de resum decimat
+El fitxer de resum (min/mitjana/max per interval) permet l'anàlisi ràpida i la
+vista general de la gràfica sense haver de llegir el fitxer complet.
+"""
+import os
+from typing import Optional
+
+import pandas as pd
+
+from data.file_handler import FileHandler, create_file_handler
+from data.processor import SummaryDecimator
+from utils.config import OVERVIEW_INTERVAL, OVERVIEW_SUFFIX, MANIFEST_EXTENSION
+
+
+def overview_path(filepath: str) -> str:
+    """Retorna el camí del fitxer de resum associat a una mesura."""
+    base, extension = os.path.splitext(filepath)
+    return f"{base}{OVERVIEW_SUFFIX}{extension}"
+
+
+def is_overview_file(filepath: str) -> bool:
+    """Comprova si un fitxer és un fitxer de resum."""
+    return os.path.splitext(filepath)[0].endswith(OVERVIEW_SUFFIX)
+
+
+def load_overview(filepath: str) -> Optional[pd.DataFrame]:
+    """
+    Carrega el fitxer de resum d'una mesura. Per a una mesura segmentada (manifest),
+    uneix els resums de tots els segments.
+
+    Args:
+        filepath: Camí de la mesura (no del resum)
+
+    Returns:
+        DataFrame amb el resum, o None si la mesura no en té
+    """
+    if filepath.endswith(MANIFEST_EXTENSION):
+        from data.segments import load_segmented_overview
+        return load_segmented_overview(filepath)
+    path = overview_path(filepath)
+    if not os.path.exists(path):
+        return None
+    try:
+        return FileHandler.load_table(path)
+    except Exception as e:
+        print(f"Error carregant resum: {e}")
+        return None
+
+
+class MultiRateWriter:
+    """Escriu simultàniament les dades completes i un resum decimat sincronitzat."""
+
+    def __init__(self, filepath: str, interval: float = OVERVIEW_INTERVAL):
+        """
+        Inicialitza els dos fitxers de sortida.
+
+        Args:
+            filepath: Camí del fitxer de dades complet
+            interval: Interval del resum (s)
+        """
+        self.raw = create_file_handler(filepath)
+        value_columns = self.raw.columns[1:]
+        self.decimator = SummaryDecimator(value_columns, interval)
+        self.overview = create_file_handler(
+            overview_path(filepath),
+            SummaryDecimator.output_columns(value_columns)
+        )
+        self.overview.metadata.update({
+            'source': os.path.basename(filepath),
+            'interval': interval
+        })
+        self.raw.metadata['overview_file'] = os.path.basename(self.overview.filepath)
+
+    @property
+    def filepath(self) -> str:
+        """Camí del fitxer de dades complet."""
+        return self.raw.filepath
+
+    @property
+    def metadata(self) -> dict:
+        """Metadades de la mesura (del fitxer de dades complet)."""
+        return self.raw.metadata
+
+    def create_file(self):
+        """Crea els dos fitxers."""
+        self.raw.create_file()
+        self.overview.create_file()
+
+    def append_data(self, time: float, voltage1: float, voltage2: float,
+                    height1: Optional[float] = None, height2: Optional[float] = None):
+        """Afegeix una fila al fitxer complet i l'acumula al resum."""
+        self.raw.append_data(time, voltage1, voltage2, height1, height2)
+        summary = self.decimator.add(time, self.raw.data_buffer[-1])
+        if summary is not None:
+            self.overview.append_row(summary)
+
+    def flush_to_file(self):
+        """Escriu les dades pendents dels dos fitxers."""
+        self.raw.flush_to_file()
+        self.overview.flush_to_file()
+
+    def close(self):
+        """Tanca l'interval en curs i els dos fitxers."""
+        summary = self.decimator.flush()
+        if summary is not None:
+            self.overview.append_row(summary)
+        self.raw.close()
+        self.overview.close()
@@ -0,0 +1,219 @@
+"""
+Memòria cau multiresolució de les sèries de la gràfica
+Cada nivell agrupa FACTOR entrades del nivell anterior guardant-ne el mínim i el
+màxim, de manera que qualsevol interval de temps es pot servir amb un nombre de
+punts proporcional a l'amplada de la gràfica i no a la durada de la mesura.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class _Level:
+    """Un nivell de resolució: temps inicial/final i mínim/màxim de cada entrada."""
+
+    def __init__(self, num_series: int, raw: bool, capacity: int = 1024):
+        self.num_series = num_series
+        self.raw = raw  # Al nivell base mínim = màxim i temps inicial = final
+        self.offset = 0  # Índex absolut de la primera entrada conservada
+        self.size = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        self.t_first = np.empty(capacity, dtype=np.float64)
+        self.y_min = np.empty((self.num_series, capacity), dtype=np.float64)
+        if self.raw:
+            self.t_last, self.y_max = self.t_first, self.y_min
+        else:
+            self.t_last = np.empty(capacity, dtype=np.float64)
+            self.y_max = np.empty((self.num_series, capacity), dtype=np.float64)
+
+    @property
+    def end(self) -> int:
+        """Índex absolut següent a l'última entrada."""
+        return self.offset + self.size
+
+    def extend(self, t_first, t_last, y_min, y_max):
+        count = len(t_first)
+        if self.size + count > len(self.t_first):
+            capacity = len(self.t_first)
+            while capacity < self.size + count:
+                capacity *= 2
+            self._resize(capacity)
+        end = self.size + count
+        self.t_first[self.size:end] = t_first
+        self.y_min[:, self.size:end] = y_min
+        if not self.raw:
+            self.t_last[self.size:end] = t_last
+            self.y_max[:, self.size:end] = y_max
+        self.size = end
+
+    def discard(self, count: int):
+        """Descarta les count entrades més antigues."""
+        if count <= 0:
+            return
+        self.t_first[:self.size - count] = self.t_first[count:self.size]
+        self.y_min[:, :self.size - count] = self.y_min[:, count:self.size]
+        if not self.raw:
+            self.t_last[:self.size - count] = self.t_last[count:self.size]
+            self.y_max[:, :self.size - count] = self.y_max[:, count:self.size]
+        self.offset += count
+        self.size -= count
+
+    def _resize(self, capacity: int):
+        old = (self.t_first, self.t_last, self.y_min, self.y_max)
+        self._allocate(capacity)
+        self.t_first[:self.size] = old[0][:self.size]
+        self.y_min[:, :self.size] = old[2][:, :self.size]
+        if not self.raw:
+            self.t_last[:self.size] = old[1][:self.size]
+            self.y_max[:, :self.size] = old[3][:, :self.size]
+
+    def span(self, t_from: float, t_to: float) -> Tuple[int, int]:
+        """Índexs locals de les entrades que se solapen amb l'interval (més una a cada costat)."""
+        start = int(np.searchsorted(self.t_last[:self.size], t_from, side='left'))
+        stop = int(np.searchsorted(self.t_first[:self.size], t_to, side='right'))
+        return max(0, start - 1), min(self.size, stop + 1)
+
+
+class MultiResolutionCache:
+    """Sèries temporals amb nivells de mínim/màxim per servir qualsevol zoom ràpidament."""
+
+    FACTOR = 8
+
+    def __init__(self, num_series: int, max_raw_points: Optional[int] = None):
+        """
+        Inicialitza la memòria cau.
+
+        Args:
+            num_series: Nombre de sèries (a més de l'eix de temps)
+            max_raw_points: Mostres originals màximes a conservar; les més antigues
+                            només queden als nivells agregats (None = sense límit)
+        """
+        self.num_series = num_series
+        self.max_raw_points = max_raw_points
+        self.clear()
+
+    def __len__(self) -> int:
+        return self.levels[0].end
+
+    def clear(self):
+        """Buida la memòria cau."""
+        self.levels = [_Level(self.num_series, raw=True)]
+        # Entrades de cada nivell ja agregades al nivell superior (índex absolut)
+        self.consumed = [0]
+
+    def append(self, t: float, *values: float):
+        """Afegeix una mostra (un valor per sèrie)."""
+        self.extend([t], *[[value] for value in values])
+
+    def extend(self, t, *series):
+        """
+        Afegeix un bloc de mostres.
+
+        Args:
+            t: Temps de les mostres (creixents)
+            series: Un array de valors per cada sèrie
+        """
+        t = np.asarray(t, dtype=np.float64)
+        if len(t) == 0:
+            return
+        y = np.array(series, dtype=np.float64).reshape(self.num_series, len(t))
+        self.levels[0].extend(t, t, y, y)
+        self._aggregate(0)
+
+        raw = self.levels[0]
+        if self.max_raw_points and raw.size > self.max_raw_points * 3 // 2:
+            # Només es descarten mostres ja resumides al nivell superior
+            raw.discard(min(raw.size - self.max_raw_points, self.consumed[0] - raw.offset))
+
+    def _aggregate(self, index: int):
+        """Agrupa les entrades completes d'un nivell al nivell superior."""
+        level = self.levels[index]
+        blocks = (level.end - self.consumed[index]) // self.FACTOR
+        if blocks == 0:
+            return
+        if index + 1 == len(self.levels):
+            self.levels.append(_Level(self.num_series, raw=False))
+            self.consumed.append(0)
+
+        start = self.consumed[index] - level.offset
+        stop = start + blocks * self.FACTOR
+        shape = (self.num_series, blocks, self.FACTOR)
+        # fmin/fmax ignoren els NaN (p.ex. alçades sense calibrar)
+        self.levels[index + 1].extend(
+            level.t_first[start:stop:self.FACTOR],
+            level.t_last[start + self.FACTOR - 1:stop:self.FACTOR],
+            np.fmin.reduce(level.y_min[:, start:stop].reshape(shape), axis=2),
+            np.fmax.reduce(level.y_max[:, start:stop].reshape(shape), axis=2)
+        )
+        self.consumed[index] += blocks * self.FACTOR
+        self._aggregate(index + 1)
+
+    def time_range(self) -> Optional[Tuple[float, float]]:
+        """Retorna (primer temps, últim temps), o None si no hi ha dades."""
+        if len(self) == 0:
+            return None
+        top = self.levels[-1]
+        return float(top.t_first[0]), float(self.levels[0].t_first[self.levels[0].size - 1])
+
+    def raw_start(self) -> Optional[float]:
+        """Temps de la mostra original més antiga conservada."""
+        raw = self.levels[0]
+        return float(raw.t_first[0]) if raw.size else None
+
+    def select_level(self, t_from: float, t_to: float, max_points: int) -> int:
+        """Nivell més detallat amb el qual l'interval cap en max_points punts."""
+        for index, level in enumerate(self.levels):
+            start, stop = level.span(t_from, t_to)
+            points = (stop - start) * (1 if level.raw else 2)
+            if points <= max_points:
+                return index
+        return len(self.levels) - 1
+
+    def query(self, t_from: float, t_to: float,
+              max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Retorna les dades d'un interval amb com a molt uns max_points punts.
+
+        Als nivells agregats cada entrada es dibuixa com dos punts (mínim i màxim),
+        de manera que els pics no desapareixen en reduir la resolució.
+
+        Args:
+            t_from: Temps inicial (s)
+            t_to: Temps final (s)
+            max_points: Punts màxims aproximats
+
+        Returns:
+            Tuple (temps, valors) amb valors de forma (num_series, n)
+        """
+        index = self.select_level(t_from, t_to, max_points)
+        raw = self.levels[0]
+        if index == 0 and raw.offset > 0 and raw.size and raw.t_first[0] > t_from:
+            # Les mostres originals de l'inici ja s'han descartat
+            index = min(1, len(self.levels) - 1)
+        pieces = self._gather(index, t_from, t_to, None)
+        if not pieces:
+            return np.empty(0), np.empty((self.num_series, 0))
+        return (np.concatenate([x for x, _ in pieces]),
+                np.concatenate([y for _, y in pieces], axis=1))
+
+    def _gather(self, index: int, t_from: float, t_to: float, first: Optional[int]) -> list:
+        """Entrades d'un nivell a l'interval, seguides de les encara no agregades dels inferiors."""
+        level = self.levels[index]
+        start, stop = level.span(t_from, t_to)
+        if first is not None:
+            start = max(start, first - level.offset)
+        pieces = []
+        if start < stop:
+            if level.raw:
+                pieces.append((level.t_first[start:stop].copy(),
+                               level.y_min[:, start:stop].copy()))
+            else:
+                x = np.column_stack((level.t_first[start:stop], level.t_last[start:stop])).ravel()
+                y = np.stack((level.y_min[:, start:stop], level.y_max[:, start:stop]),
+                             axis=2).reshape(self.num_series, -1)
+                pieces.append((x, y))
+        if index > 0:
+            pieces.extend(self._gather(index - 1, t_from, t_to, self.consumed[index - 1]))
+        return pieces
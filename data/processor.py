@@ -1,8 +1,19 @@
 """
 Processador de dades per càlculs i transformacions
 """
+import math
 import numpy as np
-from typing import List
+from typing import Dict, List, Optional, Tuple
+
+from utils.config import (
+    BLOCK_AGGREGATOR, HAMPEL_HALF_WINDOW, HAMPEL_THRESHOLD,
+    SIGMA_CLIP_THRESHOLD, SIGMA_CLIP_ITERATIONS
+)
+
+AGGREGATORS = ("mean", "median", "hampel", "sigma_clip")
+
+# Factor que converteix la MAD en desviació típica per a soroll gaussià
+MAD_SCALE = 1.4826
 
 
 class DataProcessor:
@@ -23,6 +34,71 @@ class DataProcessor:
             return 0.0
         return float(np.mean(samples))
     
+    @staticmethod
+    def aggregate_block(data: np.ndarray, method: str = BLOCK_AGGREGATOR,
+                        half_window: int = HAMPEL_HALF_WINDOW,
+                        hampel_threshold: float = HAMPEL_THRESHOLD,
+                        clip_threshold: float = SIGMA_CLIP_THRESHOLD,
+                        clip_iterations: int = SIGMA_CLIP_ITERATIONS) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Redueix un bloc de mostres a un valor per canal amb rebuig de mostres espúries.
+        Tots els mètodes treballen sobre el bloc sencer de forma vectoritzada:
+        - 'mean': mitjana simple (sense rebuig)
+        - 'median': mediana (insensible a pics aïllats; no rebutja mostres)
+        - 'hampel': les mostres que s'allunyen més de hampel_threshold MAD escalades
+          de la mediana de la seva finestra es substitueixen per aquesta mediana
+        - 'sigma_clip': es descarten iterativament les mostres a més de
+          clip_threshold desviacions de la mitjana
+        
+        Args:
+            data: Array de forma (num_channels, num_samples)
+            method: 'mean', 'median', 'hampel' o 'sigma_clip'
+            half_window: Mostres a cada costat de la finestra del filtre de Hampel
+            hampel_threshold: Llindar del filtre de Hampel (en MAD escalades)
+            clip_threshold: Llindar del sigma-clipping (en desviacions típiques)
+            clip_iterations: Iteracions màximes del sigma-clipping
+            
+        Returns:
+            Tupla (valor de cada canal, mostres rebutjades de cada canal)
+        """
+        if method not in AGGREGATORS:
+            raise ValueError(f"Mètode d'agregació desconegut: {method}")
+        data = np.asarray(data, dtype=np.float64)
+        num_channels, n = data.shape
+        rejected = np.zeros(num_channels, dtype=np.int64)
+        if n == 0:
+            return np.zeros(num_channels), rejected
+        
+        if method == "mean":
+            return data.mean(axis=1), rejected
+        if method == "median":
+            return np.median(data, axis=1), rejected
+        
+        if method == "hampel":
+            # Finestra centrada a cada mostra; als marges es reflecteix el bloc (repetir
+            # l'última mostra faria que un pic al final fos la seva pròpia mediana)
+            half_window = min(half_window, n - 1)
+            padded = np.pad(data, ((0, 0), (half_window, half_window)), mode='reflect')
+            windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * half_window + 1, axis=1)
+            local_median = np.median(windows, axis=2)
+            mad = MAD_SCALE * np.median(np.abs(windows - local_median[..., None]), axis=2)
+            outliers = np.abs(data - local_median) > hampel_threshold * mad
+            filtered = np.where(outliers, local_median, data)
+            return filtered.mean(axis=1), outliers.sum(axis=1)
+        
+        # Sigma-clipping: es recalcula mitjana i desviació amb les mostres acceptades
+        keep = np.ones(data.shape, dtype=bool)
+        for _ in range(clip_iterations):
+            count = keep.sum(axis=1)
+            mean = np.where(keep, data, 0.0).sum(axis=1) / count
+            std = np.sqrt(np.where(keep, (data - mean[:, None]) ** 2, 0.0).sum(axis=1) / count)
+            new_keep = np.abs(data - mean[:, None]) <= clip_threshold * std[:, None]
+            if np.array_equal(new_keep, keep):
+                break
+            keep = new_keep
+        count = keep.sum(axis=1)
+        return np.where(keep, data, 0.0).sum(axis=1) / count, n - count
+    
     @staticmethod
     def calculate_statistics(data: List[float]) -> dict:
         """
@@ -44,3 +120,294 @@ class DataProcessor:
             'max': float(np.max(data_array)),
             'std': float(np.std(data_array))
         }
+    
+    @staticmethod
+    def burst_statistics(samples: np.ndarray, segments: int, max_std: float,
+                         max_drift: float) -> dict:
+        """
+        Calcula estadístiques d'una ràfega de mostres i n'avalua l'estabilitat.
+        La ràfega es divideix en trams consecutius: si el nivell encara es mou, les
+        mitjanes dels trams difereixen encara que el soroll sigui petit.
+        
+        Args:
+            samples: Array de mostres d'un canal
+            segments: Nombre de trams per mesurar la deriva
+            max_std: Desviació típica màxima acceptada
+            max_drift: Diferència màxima acceptada entre mitjanes de trams
+            
+        Returns:
+            Diccionari amb estadístiques (count, mean, std, sem, drift, stable)
+        """
+        data_array = np.asarray(samples, dtype=np.float64)
+        count = len(data_array)
+        if count == 0:
+            return {'count': 0, 'mean': 0.0, 'std': 0.0, 'sem': 0.0,
+                    'drift': 0.0, 'stable': False}
+        
+        std = float(np.std(data_array))
+        segment_means = [part.mean() for part in np.array_split(data_array, min(segments, count))]
+        drift = float(np.max(segment_means) - np.min(segment_means))
+        return {
+            'count': count,
+            'mean': float(np.mean(data_array)),
+            'std': std,
+            'sem': std / math.sqrt(count),  # Error estàndard de la mitjana
+            'drift': drift,
+            'stable': std <= max_std and drift <= max_drift
+        }
+
+
+class RunningStatistics:
+    """Estadístiques incrementals d'una sèrie (algorisme de Welford)."""
+    
+    def __init__(self):
+        """Inicialitza l'acumulador buit."""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+    
+    def update(self, value: Optional[float]):
+        """
+        Afegeix un valor a l'acumulador. Els valors None, NaN o ±inf s'ignoren
+        (un sol infinit faria la mitjana i la desviació indefinides).
+        
+        Args:
+            value: Nou valor de la sèrie
+        """
+        if value is None or not math.isfinite(value):
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    @classmethod
+    def from_dict(cls, stats: dict) -> 'RunningStatistics':
+        """
+        Reconstrueix l'acumulador a partir de to_dict().
+        
+        Args:
+            stats: Diccionari amb count, mean, min, max i std
+        """
+        result = cls()
+        if stats['count'] > 0:
+            result.count = int(stats['count'])
+            result.mean = float(stats['mean'])
+            result.m2 = float(stats['std']) ** 2 * result.count
+            result.min = float(stats['min'])
+            result.max = float(stats['max'])
+        return result
+    
+    def merge(self, other: 'RunningStatistics'):
+        """
+        Afegeix les estadístiques d'una altra part de la sèrie (fórmula de Chan).
+        
+        Args:
+            other: Acumulador de l'altra part
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    
+    def to_dict(self) -> dict:
+        """
+        Exporta les estadístiques amb el mateix format que calculate_statistics.
+        
+        Returns:
+            Diccionari amb estadístiques (count, mean, min, max, std)
+        """
+        if self.count == 0:
+            return {'count': 0, 'mean': 0.0, 'min': 0.0, 'max': 0.0, 'std': 0.0}
+        return {
+            'count': self.count,
+            'mean': float(self.mean),
+            'min': float(self.min),
+            'max': float(self.max),
+            'std': float(math.sqrt(self.m2 / self.count))
+        }
+
+
+class RunSummary:
+    """Resum incremental d'una mesura: estadístiques globals i per blocs de temps fixos."""
+    
+    def __init__(self, columns: List[str], block_duration: float):
+        """
+        Inicialitza el resum.
+        
+        Args:
+            columns: Noms de les columnes a resumir
+            block_duration: Durada de cada bloc de temps (s)
+        """
+        self.columns = list(columns)
+        self.block_duration = block_duration
+        self.sample_count = 0
+        self.first_time = None
+        self.last_time = None
+        self.overall = {column: RunningStatistics() for column in self.columns}
+        self.blocks: Dict[int, Dict[str, RunningStatistics]] = {}
+    
+    def update(self, time: float, values: dict):
+        """
+        Afegeix una mostra al resum.
+        
+        Args:
+            time: Temps de la mostra (s)
+            values: Diccionari columna → valor
+        """
+        self.sample_count += 1
+        if self.first_time is None:
+            self.first_time = time
+        self.last_time = time
+        
+        block_index = int(time // self.block_duration)
+        block = self.blocks.get(block_index)
+        if block is None:
+            block = {column: RunningStatistics() for column in self.columns}
+            self.blocks[block_index] = block
+        
+        for column in self.columns:
+            value = values.get(column)
+            self.overall[column].update(value)
+            block[column].update(value)
+    
+    @classmethod
+    def from_dict(cls, summary: dict) -> 'RunSummary':
+        """
+        Reconstrueix el resum a partir de to_dict().
+        
+        Args:
+            summary: Diccionari del resum
+        """
+        result = cls(list(summary['overall']), summary['block_duration'])
+        result.sample_count = summary['sample_count']
+        result.first_time = summary['first_time']
+        result.last_time = summary['last_time']
+        result.overall = {column: RunningStatistics.from_dict(stats)
+                          for column, stats in summary['overall'].items()}
+        for block in summary.get('blocks', []):
+            index = int(round(block['start'] / result.block_duration))
+            result.blocks[index] = {column: RunningStatistics.from_dict(stats)
+                                    for column, stats in block['stats'].items()}
+        return result
+    
+    def merge(self, other: 'RunSummary'):
+        """
+        Afegeix el resum d'una part posterior de la mateixa mesura (p.ex. un altre segment).
+        Els blocs de temps partits entre les dues parts es combinen.
+        
+        Args:
+            other: Resum de l'altra part (mateixes columnes i durada de bloc)
+        """
+        if other.sample_count == 0:
+            return
+        self.sample_count += other.sample_count
+        if self.first_time is None:
+            self.first_time = other.first_time
+        self.last_time = other.last_time
+        for column, stats in other.overall.items():
+            self.overall[column].merge(stats)
+        for index, block in other.blocks.items():
+            if index not in self.blocks:
+                self.blocks[index] = {column: RunningStatistics() for column in self.columns}
+            for column, stats in block.items():
+                self.blocks[index][column].merge(stats)
+    
+    def to_dict(self) -> dict:
+        """Exporta el resum a diccionari (serialitzable a JSON)."""
+        return {
+            'sample_count': self.sample_count,
+            'first_time': self.first_time,
+            'last_time': self.last_time,
+            'block_duration': self.block_duration,
+            'overall': {column: stats.to_dict() for column, stats in self.overall.items()},
+            'blocks': [
+                {
+                    'start': index * self.block_duration,
+                    'stats': {column: stats.to_dict() for column, stats in block.items()}
+                }
+                for index, block in sorted(self.blocks.items())
+            ]
+        }
+
+
+class SummaryDecimator:
+    """Redueix una sèrie de files a intervals fixos amb mínim, mitjana i màxim per columna."""
+    
+    STATISTICS = ('min', 'mean', 'max')
+    
+    def __init__(self, columns: List[str], interval: float):
+        """
+        Inicialitza el decimador.
+        
+        Args:
+            columns: Columnes de valors a resumir (sense la de temps)
+            interval: Durada de cada interval de resum (s)
+        """
+        self.columns = list(columns)
+        self.interval = interval
+        self.bucket_index = None
+        self.bucket = None
+    
+    @staticmethod
+    def output_columns(columns: List[str]) -> List[str]:
+        """Retorna les columnes de sortida: temps + (min, mean, max) per cada columna."""
+        return ['time_seconds'] + [
+            f'{column}_{stat}' for column in columns for stat in SummaryDecimator.STATISTICS
+        ]
+    
+    def add(self, time: float, row: dict) -> Optional[dict]:
+        """
+        Afegeix una fila al decimador.
+        
+        Args:
+            time: Temps de la fila (s)
+            row: Diccionari columna → valor
+            
+        Returns:
+            La fila de resum de l'interval anterior si aquesta fila l'ha tancat, o None
+        """
+        index = int(time // self.interval)
+        completed = None
+        if self.bucket_index is not None and index != self.bucket_index:
+            completed = self.flush()
+        
+        if self.bucket is None:
+            self.bucket_index = index
+            self.bucket = {column: RunningStatistics() for column in self.columns}
+        for column in self.columns:
+            self.bucket[column].update(row.get(column))
+        
+        return completed
+    
+    def flush(self) -> Optional[dict]:
+        """
+        Tanca l'interval en curs.
+        
+        Returns:
+            Fila de resum de l'interval, o None si no hi havia dades
+        """
+        if self.bucket is None:
+            return None
+        
+        summary = {'time_seconds': self.bucket_index * self.interval}
+        for column, stats in self.bucket.items():
+            empty = stats.count == 0
+            summary[f'{column}_min'] = float('nan') if empty else stats.min
+            summary[f'{column}_mean'] = float('nan') if empty else stats.mean
+            summary[f'{column}_max'] = float('nan') if empty else stats.max
+        
+        self.bucket_index = None
+        self.bucket = None
+        return summary
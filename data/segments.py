@@ -0,0 +1,345 @@
+"""
+Segmentació de mesures molt llargues en fitxers numerats amb un manifest
+
+Una mesura "mesura.xlsx" es guarda com:
+    mesura.manifest.json          llista de segments, metadades i resum global
+    mesura_seg0001.xlsx, ...      segments amb temps continus
+
+Cada segment es tanca quan supera la durada o la mida màxima, de manera que les
+operacions sobre fitxers només depenen de la mida del segment actual. Els
+segments tancats es poden arxivar (p.ex. convertir a .lvz) mentre l'adquisició
+continua: el carregador els busca també amb l'extensió comprimida.
+"""
+import json
+import os
+import re
+from typing import Callable, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from data.file_handler import FileHandler, create_file_handler
+from data.multirate import load_overview
+from data.processor import RunSummary
+from utils.config import (
+    SEGMENT_MAX_DURATION, SEGMENT_MAX_SIZE, MANIFEST_EXTENSION,
+    COMPRESSED_FILE_EXTENSION, SUMMARY_BLOCK_DURATION
+)
+
+_SEGMENT_PATTERN = re.compile(r'_seg\d{4}$')
+
+
+def manifest_path(filepath: str) -> str:
+    """Retorna el camí del manifest associat a una mesura segmentada."""
+    return os.path.splitext(filepath)[0] + MANIFEST_EXTENSION
+
+
+def segment_path(filepath: str, index: int) -> str:
+    """Retorna el camí del segment número index (començant per 1)."""
+    base, extension = os.path.splitext(filepath)
+    return f"{base}_seg{index:04d}{extension}"
+
+
+def is_segment_file(filepath: str) -> bool:
+    """Comprova si un fitxer és un segment d'una mesura segmentada."""
+    name = os.path.basename(filepath)
+    return bool(_SEGMENT_PATTERN.search(os.path.splitext(name)[0]))
+
+
+class SegmentedFileHandler:
+    """Escriu una mesura en segments que roten per durada o per mida."""
+
+    def __init__(self, filepath: str, max_duration: float = SEGMENT_MAX_DURATION,
+                 max_size: int = SEGMENT_MAX_SIZE,
+                 handler_factory: Callable[[str], FileHandler] = create_file_handler):
+        """
+        Inicialitza el gestor de segments.
+
+        Args:
+            filepath: Camí base de la mesura (els segments en deriven el nom)
+            max_duration: Durada màxima d'un segment (s)
+            max_size: Mida màxima d'un segment (bytes)
+            handler_factory: Funció que crea el gestor de cada segment a partir del camí
+        """
+        self.base_path = filepath
+        self.filepath = manifest_path(filepath)
+        self.max_duration = max_duration
+        self.max_size = max_size
+        self.handler_factory = handler_factory
+
+        self.metadata = {}
+        self.summary = RunSummary(FileHandler.COLUMNS[1:], SUMMARY_BLOCK_DURATION)
+        self.segments = []
+        self.current = None
+        self.current_entry = None
+
+    def create_file(self):
+        """Crea el manifest i el primer segment."""
+        self._open_segment()
+
+    def append_data(self, time: float, voltage1: float, voltage2: float,
+                    height1: Optional[float] = None, height2: Optional[float] = None):
+        """Afegeix una fila al segment actual, rotant-lo si supera la durada màxima."""
+        entry = self.current_entry
+        if entry['first_time'] is not None and time - entry['first_time'] >= self.max_duration:
+            self._rotate()
+            entry = self.current_entry
+
+        self.current.append_data(time, voltage1, voltage2, height1, height2)
+        if entry['first_time'] is None:
+            entry['first_time'] = time
+        entry['last_time'] = time
+        entry['rows'] += 1
+
+        self.summary.update(time, {
+            'voltage_sensor1': voltage1,
+            'voltage_sensor2': voltage2,
+            'height_sensor1': height1,
+            'height_sensor2': height2
+        })
+
+    def flush_to_file(self):
+        """Escriu les dades pendents i rota el segment si supera la mida màxima."""
+        self.current.flush_to_file()
+        try:
+            if os.path.getsize(self.current.filepath) >= self.max_size:
+                self._rotate()
+        except OSError:
+            pass
+
+    def close(self):
+        """Tanca el segment actual i escriu el manifest final."""
+        if self.current is not None:
+            self.current.close()
+            self.current_entry['closed'] = True
+            self.current = None
+        self._write_manifest()
+
+    def get_metadata(self) -> dict:
+        """Retorna les metadades de la mesura, incloent el resum global."""
+        metadata = dict(self.metadata)
+        metadata['summary'] = self.summary.to_dict()
+        return metadata
+
+    def _open_segment(self):
+        """Obre el següent segment i l'afegeix al manifest."""
+        index = len(self.segments) + 1
+        path = segment_path(self.base_path, index)
+        self.current = self.handler_factory(path)
+        self.current.metadata.update(self.metadata)
+        self.current.metadata.update({
+            'segment_index': index,
+            'manifest': os.path.basename(self.filepath)
+        })
+        self.current.create_file()
+
+        self.current_entry = {
+            'index': index,
+            'file': os.path.basename(path),
+            'first_time': None,
+            'last_time': None,
+            'rows': 0,
+            'closed': False
+        }
+        self.segments.append(self.current_entry)
+        self._write_manifest()
+
+    def _rotate(self):
+        """Tanca el segment actual i n'obre un de nou."""
+        self.current.close()
+        self.current_entry['closed'] = True
+        self._open_segment()
+
+    def _write_manifest(self):
+        """Escriu el manifest de forma atòmica."""
+        manifest = {
+            'version': 1,
+            'base': os.path.basename(self.base_path),
+            'metadata': self.get_metadata(),
+            'segments': self.segments
+        }
+        temp_path = self.filepath + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, self.filepath)
+
+
+def load_manifest(path: str) -> dict:
+    """Carrega el manifest d'una mesura segmentada."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def resolve_segment(manifest_file: str, entry: dict) -> Optional[str]:
+    """
+    Troba el fitxer d'un segment, tenint en compte si s'ha arxivat en format comprimit.
+
+    Returns:
+        Camí del segment, o None si no es troba
+    """
+    path = os.path.join(os.path.dirname(manifest_file), entry['file'])
+    if os.path.exists(path):
+        return path
+    archived = os.path.splitext(path)[0] + COMPRESSED_FILE_EXTENSION
+    if os.path.exists(archived):
+        return archived
+    return None
+
+
+def iter_segments(path: str) -> Iterator[Tuple[dict, pd.DataFrame]]:
+    """
+    Carrega els segments d'una mesura d'un en un (només quan es demanen).
+
+    Args:
+        path: Camí del manifest
+
+    Yields:
+        Tuples (entrada del manifest, DataFrame del segment)
+    """
+    manifest = load_manifest(path)
+    for entry in manifest['segments']:
+        segment_file = resolve_segment(path, entry)
+        if segment_file is None:
+            print(f"Segment no trobat: {entry['file']}")
+            continue
+        df = FileHandler.load_file(segment_file)
+        if df is not None:
+            yield entry, df
+
+
+def load_segmented(path: str) -> Optional[pd.DataFrame]:
+    """
+    Carrega i uneix tots els segments d'una mesura.
+
+    Args:
+        path: Camí del manifest
+
+    Returns:
+        DataFrame amb totes les dades o None si hi ha error
+    """
+    try:
+        frames = [df for _, df in iter_segments(path)]
+        if not frames:
+            return pd.DataFrame(columns=FileHandler.COLUMNS, dtype='float64')
+        return pd.concat(frames, ignore_index=True)
+    except Exception as e:
+        print(f"Error carregant mesura segmentada: {e}")
+        return None
+
+
+def load_segmented_metadata(path: str) -> Optional[dict]:
+    """
+    Carrega les metadades d'una mesura segmentada.
+
+    El manifest només es reescriu en rotar o tancar un segment, i el seu resum queda
+    enrere mentre la mesura continua (o si s'ha interromput). En aquest cas el resum
+    es reconstrueix combinant els resums dels segments, que s'actualitzen a cada escriptura.
+
+    Args:
+        path: Camí del manifest
+
+    Returns:
+        Diccionari de metadades, o None si el manifest no es pot llegir
+    """
+    try:
+        manifest = load_manifest(path)
+    except Exception:
+        return None
+    metadata = dict(manifest['metadata'])
+    if all(entry['closed'] for entry in manifest['segments']) and 'summary' in metadata:
+        return metadata
+
+    summary = None
+    for entry in manifest['segments']:
+        segment_file = resolve_segment(path, entry)
+        segment_metadata = FileHandler.load_metadata(segment_file) if segment_file else None
+        if segment_metadata is None or 'summary' not in segment_metadata:
+            # Sense tots els segments no es pot refer: es manté el resum del manifest
+            return metadata
+        part = RunSummary.from_dict(segment_metadata['summary'])
+        if summary is None:
+            summary = part
+        else:
+            summary.merge(part)
+    if summary is not None:
+        metadata['summary'] = summary.to_dict()
+    return metadata
+
+
+def load_segmented_overview(path: str) -> Optional[pd.DataFrame]:
+    """
+    Carrega i uneix els resums decimats dels segments (fitxers _resum de cada segment).
+
+    Args:
+        path: Camí del manifest
+
+    Returns:
+        DataFrame amb el resum de tota la mesura, o None si algun segment no en té
+    """
+    try:
+        segments = load_manifest(path)['segments']
+    except Exception as e:
+        print(f"Error carregant manifest: {e}")
+        return None
+    frames = []
+    for entry in segments:
+        # El resum conserva el nom original encara que el segment s'hagi arxivat
+        overview = load_overview(os.path.join(os.path.dirname(path), entry['file']))
+        if overview is None:
+            return None
+        frames.append(overview)
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_segmented_range(path: str, t_from: float, t_to: float) -> pd.DataFrame:
+    """
+    Carrega les files d'un interval de temps llegint només els segments que s'hi solapen.
+
+    Args:
+        path: Camí del manifest
+        t_from: Temps inicial (s)
+        t_to: Temps final (s)
+
+    Returns:
+        DataFrame amb les files de l'interval (llança una excepció si hi ha error)
+    """
+    frames = []
+    for entry in load_manifest(path)['segments']:
+        # El segment obert encara no té el temps final escrit al manifest
+        if entry['first_time'] is not None and entry['first_time'] > t_to:
+            continue
+        if entry['last_time'] is not None and entry['closed'] and entry['last_time'] < t_from:
+            continue
+        segment_file = resolve_segment(path, entry)
+        if segment_file is None:
+            continue
+        frames.append(FileHandler.load_time_range(segment_file, t_from, t_to))
+    if not frames:
+        return pd.DataFrame(columns=FileHandler.COLUMNS, dtype='float64')
+    return pd.concat(frames, ignore_index=True)
+
+
+def archive_closed_segments(path: str) -> int:
+    """
+    Converteix al format comprimit els segments tancats que encara no ho estan.
+    Es pot executar mentre l'adquisició continua (el segment obert no es toca).
+
+    Args:
+        path: Camí del manifest
+
+    Returns:
+        Nombre de segments arxivats
+    """
+    from data.compressed_file_handler import CompressedFileHandler
+
+    archived = 0
+    for entry in load_manifest(path)['segments']:
+        segment_file = resolve_segment(path, entry)
+        if (not entry['closed'] or segment_file is None
+                or segment_file.endswith(COMPRESSED_FILE_EXTENSION)):
+            continue
+        CompressedFileHandler.archive_file(segment_file)
+        os.remove(segment_file)
+        archived += 1
+    return archived
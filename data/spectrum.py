@@ -0,0 +1,100 @@
+"""
+Estimació de l'espectre de les dades brutes dels sensors (mètode de Welch)
+Les dades arriben en blocs de mida arbitrària; cada segment complet (amb
+solapament) es transforma una sola vegada i l'espectre és la mitjana dels
+últims segments, de manera que el cost per bloc només depèn de les mostres noves.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.config import SPECTRUM_SEGMENT_LENGTH, SPECTRUM_OVERLAP, SPECTRUM_AVERAGES
+
+
+class WelchEstimator:
+    """Densitat espectral de potència incremental de diversos canals."""
+
+    def __init__(self, sample_rate: float, num_channels: int = 2,
+                 segment_length: int = SPECTRUM_SEGMENT_LENGTH,
+                 overlap: float = SPECTRUM_OVERLAP, averages: int = SPECTRUM_AVERAGES):
+        """
+        Inicialitza l'estimador.
+
+        Args:
+            sample_rate: Freqüència de mostreig de les dades (Hz)
+            num_channels: Nombre de canals de cada bloc
+            segment_length: Mostres per segment de la FFT
+            overlap: Fracció de solapament entre segments consecutius (0-1)
+            averages: Nombre de segments recents que es promitgen
+        """
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.segment_length = segment_length
+        self.hop = max(1, int(round(segment_length * (1 - overlap))))
+
+        self.window = np.hanning(segment_length)
+        # Escalat a densitat (V²/Hz) d'un sol costat
+        self.scale = 1.0 / (sample_rate * np.sum(self.window ** 2))
+        self.frequencies = np.fft.rfftfreq(segment_length, d=1.0 / sample_rate)
+
+        self.periodograms = np.zeros((averages, num_channels, len(self.frequencies)))
+        self.reset()
+
+    def reset(self):
+        """Descarta les dades i els segments acumulats."""
+        self.pending = np.empty((self.num_channels, 0))
+        self.count = 0  # Segments calculats des de l'últim reset
+
+    def push(self, block: np.ndarray) -> int:
+        """
+        Afegeix un bloc de mostres i calcula els segments que s'hagin completat.
+
+        Args:
+            block: Array de forma (num_channels, n)
+
+        Returns:
+            Nombre de segments nous
+        """
+        block = np.asarray(block, dtype=np.float64).reshape(self.num_channels, -1)
+        pending = np.concatenate((self.pending, block), axis=1)
+        if pending.shape[1] < self.segment_length:
+            self.pending = pending
+            return 0
+
+        # Tots els segments complets de cop: (canals, segments, mostres)
+        segments = sliding_window_view(pending, self.segment_length, axis=1)[:, ::self.hop]
+        new = segments.shape[1]
+        segments = segments - segments.mean(axis=2, keepdims=True)
+        spectra = np.abs(np.fft.rfft(segments * self.window, axis=2)) ** 2 * self.scale
+        spectra[:, :, 1:-1] *= 2  # Potència de les freqüències negatives
+
+        # Només cal guardar els últims segments (memòria circular)
+        averages = len(self.periodograms)
+        for index in range(max(0, new - averages), new):
+            self.periodograms[self.count % averages] = spectra[:, index]
+            self.count += 1
+
+        self.pending = pending[:, new * self.hop:].copy()
+        return new
+
+    def psd(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Retorna l'espectre mitjà actual.
+
+        Returns:
+            Tuple (freqüències, densitat de forma (num_channels, n)), o None si encara
+            no hi ha cap segment complet
+        """
+        if self.count == 0:
+            return None
+        used = min(self.count, len(self.periodograms))
+        return self.frequencies, self.periodograms[:used].mean(axis=0)
+
+    def dominant_frequencies(self) -> Optional[np.ndarray]:
+        """Freqüència amb més potència de cada canal (sense la component contínua)."""
+        result = self.psd()
+        if result is None:
+            return None
+        frequencies, density = result
+        return frequencies[1 + np.argmax(density[:, 1:], axis=1)]
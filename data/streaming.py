@@ -0,0 +1,332 @@
+"""
+Servidor de dades en directe per a la xarxa local
+Publica les files processades i els esdeveniments de la mesura en curs a tots
+els clients TCP connectats, perquè altres equips del laboratori puguin seguir
+el nivell sense executar la interfície. El bucle d'adquisició només afegeix les
+files a una llista; un fil propi les agrupa a intervals fixos en trames binàries
+i les envia amb sòcols no bloquejants, de manera que els clients lents o
+nombrosos no frenen l'adquisició (els que acumulen massa dades es desconnecten).
+
+Format de les trames: capçalera de 5 bytes (tipus, longitud del contingut en
+uint32 little-endian) seguida del contingut:
+- b'M': missatge JSON ({'type': 'hello' | 'start' | 'stop', ...})
+- b'S': files de mostres, float64 little-endian de forma (n, columnes)
+- b'E': llista JSON d'esdeveniments (vegeu data.events)
+"""
+import json
+import selectors
+import socket
+import struct
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from data.file_handler import FileHandler
+from utils.config import (
+    STREAM_HOST, STREAM_PORT, STREAM_BATCH_INTERVAL, STREAM_MAX_CLIENT_BUFFER
+)
+
+FRAME_HEADER = struct.Struct('<cI')
+FRAME_MESSAGE = b'M'
+FRAME_SAMPLES = b'S'
+FRAME_EVENTS = b'E'
+
+STREAM_COLUMNS = list(FileHandler.COLUMNS)
+SAMPLE_DTYPE = np.dtype('<f8')
+
+
+def encode_frame(kind: bytes, payload: bytes) -> bytes:
+    """Afegeix la capçalera (tipus i longitud) a un contingut."""
+    return FRAME_HEADER.pack(kind, len(payload)) + payload
+
+
+def encode_json(kind: bytes, value) -> bytes:
+    """Codifica un valor JSON en una trama."""
+    return encode_frame(kind, json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+
+class StreamServer:
+    """Servidor TCP que difon les mostres i els esdeveniments a molts clients."""
+
+    def __init__(self, host: str = STREAM_HOST, port: int = STREAM_PORT,
+                 batch_interval: float = STREAM_BATCH_INTERVAL,
+                 max_client_buffer: int = STREAM_MAX_CLIENT_BUFFER):
+        """
+        Inicialitza el servidor (s'obre a start()).
+
+        Args:
+            host: Adreça on escoltar ('127.0.0.1' només local, '0.0.0.0' tota la xarxa)
+            port: Port TCP (0 per triar-ne un de lliure)
+            batch_interval: Interval d'agrupació i enviament de les files (s)
+            max_client_buffer: Bytes pendents màxims per client abans de desconnectar-lo
+        """
+        self.host = host
+        self.port = port
+        self.batch_interval = batch_interval
+        self.max_client_buffer = max_client_buffer
+        self.run_info: Optional[dict] = None  # Mesura en curs (s'envia als clients nous)
+        self._rows: List[Tuple[float, ...]] = []
+        self._frames: List[bytes] = []
+        self._lock = threading.Lock()
+        self._clients = {}  # sòcol → bytes pendents d'enviar
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._listener: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        """Indica si el servidor està escoltant."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def client_count(self) -> int:
+        """Nombre de clients connectats."""
+        return len(self._clients)
+
+    def start(self) -> Tuple[bool, str]:
+        """
+        Obre el port i engega el fil del servidor.
+
+        Returns:
+            Tupla (success, error_message)
+        """
+        if self.is_running:
+            return True, ""
+        try:
+            listener = socket.create_server((self.host, self.port))
+            listener.setblocking(False)
+        except OSError as e:
+            return False, f"Error obrint el servidor de dades a {self.host}:{self.port}: {e}"
+        self._listener = listener
+        self.port = listener.getsockname()[1]
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(listener, selectors.EVENT_READ)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="StreamServer", daemon=True)
+        self._thread.start()
+        return True, ""
+
+    def stop(self, timeout: float = 5.0):
+        """Desconnecta els clients i tanca el port."""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join(timeout)
+            self._thread = None
+
+    def publish_row(self, t: float, *values: Optional[float]):
+        """
+        Afegeix una fila processada (es pot cridar des de qualsevol fil; cost negligible).
+
+        Args:
+            t: Temps de la fila (s des de l'inici)
+            values: Valors de la resta de columnes (None s'envia com a NaN)
+        """
+        row = (t,) + tuple(float('nan') if value is None else value for value in values)
+        with self._lock:
+            self._rows.append(row)
+
+    def publish_events(self, events: List[dict]):
+        """Envia esdeveniments nous (després de les files ja publicades)."""
+        self._publish_frame(encode_json(FRAME_EVENTS, events))
+
+    def publish_message(self, kind: str, **fields):
+        """
+        Envia un missatge de control ('start' amb les dades de la mesura, 'stop'...).
+        El missatge 'start' es recorda per als clients que es connectin més tard.
+        """
+        message = dict(fields, type=kind)
+        self.run_info = message if kind == 'start' else None
+        self._publish_frame(encode_json(FRAME_MESSAGE, message))
+
+    def _publish_frame(self, frame: bytes):
+        """Afegeix una trama a la cua mantenint l'ordre respecte de les files."""
+        with self._lock:
+            self._pack_rows()
+            self._frames.append(frame)
+
+    def _pack_rows(self):
+        """Converteix les files pendents en una trama de mostres (cal tenir el bloqueig)."""
+        if self._rows:
+            rows = np.asarray(self._rows, dtype=SAMPLE_DTYPE)
+            self._frames.append(encode_frame(FRAME_SAMPLES, rows.tobytes()))
+            self._rows = []
+
+    def _run(self):
+        """Bucle del fil: accepta clients i hi envia les trames agrupades."""
+        next_batch = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                for key, mask in self._selector.select(max(0.0, next_batch - time.monotonic())):
+                    if key.fileobj is self._listener:
+                        self._accept()
+                    elif mask & selectors.EVENT_READ:
+                        self._receive(key.fileobj)
+                    elif mask & selectors.EVENT_WRITE:
+                        self._send(key.fileobj)
+                if time.monotonic() < next_batch:
+                    continue
+                next_batch = time.monotonic() + self.batch_interval
+
+                # Totes les trames de l'interval s'envien juntes a cada client
+                with self._lock:
+                    self._pack_rows()
+                    frames, self._frames = self._frames, []
+                if frames and self._clients:
+                    data = b''.join(frames)
+                    for client in list(self._clients):
+                        self._queue(client, data)
+        finally:
+            for client in list(self._clients):
+                self._disconnect(client)
+            self._selector.close()
+            self._listener.close()
+
+    def _accept(self):
+        """Accepta un client nou i li envia la salutació."""
+        try:
+            client, _ = self._listener.accept()
+        except OSError:
+            return
+        client.setblocking(False)
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._clients[client] = bytearray()
+        self._selector.register(client, selectors.EVENT_READ)
+        self._queue(client, encode_json(FRAME_MESSAGE, {
+            'type': 'hello',
+            'columns': STREAM_COLUMNS,
+            'run': self.run_info
+        }))
+
+    def _receive(self, client: socket.socket):
+        """Els clients no envien res: una lectura buida vol dir que s'han desconnectat."""
+        try:
+            if client.recv(4096):
+                return
+        except BlockingIOError:
+            return
+        except OSError:
+            pass
+        self._disconnect(client)
+
+    def _queue(self, client: socket.socket, data: bytes):
+        """Afegeix dades al buffer d'un client i n'intenta l'enviament."""
+        buffer = self._clients.get(client)
+        if buffer is None:
+            return
+        if len(buffer) + len(data) > self.max_client_buffer:
+            # Client massa lent: no es deixa que acumuli memòria indefinidament
+            self._disconnect(client)
+            return
+        buffer.extend(data)
+        self._send(client)
+
+    def _send(self, client: socket.socket):
+        """Envia tot el que el sòcol accepti sense bloquejar."""
+        buffer = self._clients.get(client)
+        if buffer is None:
+            return
+        try:
+            sent = client.send(buffer)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._disconnect(client)
+            return
+        del buffer[:sent]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if buffer else 0)
+        self._selector.modify(client, events)
+
+    def _disconnect(self, client: socket.socket):
+        """Tanca la connexió amb un client."""
+        if self._clients.pop(client, None) is None:
+            return
+        self._selector.unregister(client)
+        client.close()
+
+
+class StreamClient:
+    """Client del servidor de dades (p.ex. per a un altre equip del laboratori)."""
+
+    def __init__(self, host: str = STREAM_HOST, port: int = STREAM_PORT,
+                 timeout: Optional[float] = None):
+        """
+        Inicialitza el client (es connecta a connect()).
+
+        Args:
+            host: Adreça del servidor
+            port: Port del servidor
+            timeout: Temps màxim d'espera de cada lectura (s), None per esperar sempre
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.columns = list(STREAM_COLUMNS)
+        self.run_info: Optional[dict] = None
+        self._socket: Optional[socket.socket] = None
+
+    def connect(self):
+        """Es connecta al servidor."""
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+
+    def close(self):
+        """Tanca la connexió."""
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        """Itera sobre les trames rebudes fins que el servidor tanca la connexió."""
+        while True:
+            frame = self.receive()
+            if frame is None:
+                return
+            yield frame
+
+    def receive(self) -> Optional[Tuple[str, object]]:
+        """
+        Llegeix la trama següent.
+
+        Returns:
+            ('message', dict), ('samples', array (n, columnes)) o ('events', list);
+            None si el servidor ha tancat la connexió
+        """
+        header = self._receive_exact(FRAME_HEADER.size)
+        if header is None:
+            return None
+        kind, length = FRAME_HEADER.unpack(header)
+        payload = self._receive_exact(length)
+        if payload is None:
+            return None
+
+        if kind == FRAME_SAMPLES:
+            rows = np.frombuffer(payload, dtype=SAMPLE_DTYPE).reshape(-1, len(self.columns))
+            return 'samples', rows
+        value = json.loads(payload.decode('utf-8'))
+        if kind == FRAME_EVENTS:
+            return 'events', value
+        if value.get('type') == 'hello':
+            self.columns = value['columns']
+            self.run_info = value.get('run')
+        elif value.get('type') in ('start', 'stop'):
+            self.run_info = value if value['type'] == 'start' else None
+        return 'message', value
+
+    def _receive_exact(self, size: int) -> Optional[bytes]:
+        """Llegeix exactament size bytes, o None si la connexió es tanca."""
+        data = bytearray()
+        while len(data) < size:
+            chunk = self._socket.recv(size - len(data))
+            if not chunk:
+                return None
+            data.extend(chunk)
+        return bytes(data)
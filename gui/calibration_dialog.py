@@ -4,35 +4,50 @@ Disseny horitzontal amb sensors un al costat de l'altre
 """
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                                QPushButton, QDoubleSpinBox, QGroupBox, 
-                               QMessageBox, QGridLayout)
-from PySide6.QtCore import Qt, QTimer
+                               QMessageBox, QGridLayout, QWidget, QComboBox,
+                               QSpinBox)
+from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont
+from daq.live_values import LiveValueBus
+from daq.monitor import MonitorReader
+from data.processor import DataProcessor
 from utils.calibration import CalibrationManager
+from utils.config import (
+    CALIBRATION_BURST_SAMPLES, CALIBRATION_SEGMENTS, CALIBRATION_MAX_STD,
+    CALIBRATION_MAX_DRIFT, CALIBRATION_MAX_ATTEMPTS, CALIBRATION_MAX_POINTS,
+    CALIBRATION_METHOD_PIECEWISE, CALIBRATION_METHOD_POLYNOMIAL, CALIBRATION_POLY_DEGREE
+)
 
 
 class CalibrationDialog(QDialog):
     """Diàleg per calibrar els sensors."""
     
-    def __init__(self, parent=None, daq=None):
+    burst_finished = Signal(object)  # Future de la ràfega (es resol al fil del monitor)
+    
+    def __init__(self, parent=None, live_values: LiveValueBus = None,
+                 monitor: MonitorReader = None):
         super().__init__(parent)
         self.setWindowTitle("Calibratge de Sensors")
         self.setMinimumSize(1100, 420)  # Reduït alçada de 480 a 420
-        self.setMaximumHeight(520)  # Reduït de 580 a 520
         
-        self.daq = daq
+        self.live_values = live_values
+        self.monitor = monitor
         self.calibration_manager = CalibrationManager()
         
         # Valors actuals llegits
         self.current_voltage1 = 0.0
         self.current_voltage2 = 0.0
         
+        # Captura en curs: (sensor_id, fila del punt, intent) o None
+        self.capture = None
+        self.burst_finished.connect(self.on_burst_finished)
+        
         self.setup_ui()
         self.load_current_calibrations()
         
-        # Timer per actualitzar voltatges contínuament
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_current_voltages)
-        self.update_timer.start(500)  # Actualitzar cada 500ms
+        # Actualitzar voltatges contínuament (mitjana dels valors en directe)
+        if self.live_values is not None:
+            self.live_values.subscribe(self.update_current_voltages)
     
     def setup_ui(self):
         """Configura la interfície del diàleg."""
@@ -77,10 +92,11 @@ class CalibrationDialog(QDialog):
         software_label = QLabel(
             "Per calibrar la conversió <b>voltatge → alçada</b>:<br>"
             "<b>1.</b> Col·loca el sensor a una alçada coneguda (ex: 0 cm)<br>"
-            "<b>2.</b> Prem <b>'Llegir'</b> per capturar el voltatge actual<br>"
+            "<b>2.</b> Prem <b>'Llegir'</b> i espera que la lectura sigui <b>estable</b><br>"
             "<b>3.</b> Introdueix l'alçada al camp 'Alçada (cm)'<br>"
             "<b>4.</b> Repeteix per un segon punt a <b>diferent alçada</b> (ex: 20 cm)<br>"
-            "<b>5.</b> Prem <b>'Desa i Tanca'</b> quan hagis calibrat ambdós punts"
+            "<b>5.</b> Si el sensor no és lineal, afegeix més punts i tria l'ajust<br>"
+            "<b>6.</b> Prem <b>'Desa i Tanca'</b> quan hagis calibrat tots els punts"
         )
         software_label.setWordWrap(True)
         software_label.setStyleSheet("QLabel { font-size: 10px; color: #333; line-height: 1.4; }")  # Reduït de 1.8 a 1.4
@@ -130,6 +146,12 @@ class CalibrationDialog(QDialog):
         
         # Sensors en horitzontal
         sensors_layout = QHBoxLayout()
+        self.capture_buttons = []  # Botons de les files de punts (es desactiven durant una captura)
+        self.point_rows = {}       # sensor_id → files de punts
+        self.points_layouts = {}
+        self.add_buttons = {}
+        self.method_combos = {}
+        self.degree_spins = {}
         
         # Sensor 1
         self.sensor1_group = self.create_sensor_group(0, "Sensor #1")
@@ -191,55 +213,48 @@ class CalibrationDialog(QDialog):
         
         layout.addWidget(voltage_label, row, 1, 1, 2)
         
-        # Punt 1
-        row += 1
-        layout.addWidget(QLabel("<b>Punt 1:</b>"), row, 0, 1, 3)
-        
+        # Punts de calibratge (una fila per punt: voltatge, 'Llegir', alçada)
         row += 1
-        layout.addWidget(QLabel("Voltatge (V):"), row, 0)
-        v1_spin = QDoubleSpinBox()
-        v1_spin.setRange(-10, 10)
-        v1_spin.setDecimals(4)
-        v1_spin.setReadOnly(True)
-        v1_spin.setStyleSheet("QDoubleSpinBox { background-color: #f0f0f0; }")
-        layout.addWidget(v1_spin, row, 1)
-        
-        btn_read1 = QPushButton("Llegir")
-        btn_read1.setMaximumWidth(80)
-        btn_read1.clicked.connect(lambda: self.read_current_voltage(sensor_id, 1))
-        layout.addWidget(btn_read1, row, 2)
+        layout.addWidget(QLabel("<b>Punts (voltatge → alçada):</b>"), row, 0, 1, 3)
         
         row += 1
-        layout.addWidget(QLabel("Alçada (cm):"), row, 0)
-        h1_spin = QDoubleSpinBox()
-        h1_spin.setRange(0, 1000)
-        h1_spin.setDecimals(2)
-        layout.addWidget(h1_spin, row, 1, 1, 2)
+        points_layout = QVBoxLayout()
+        points_layout.setSpacing(4)
+        layout.addLayout(points_layout, row, 0, 1, 3)
+        self.points_layouts[sensor_id] = points_layout
+        self.point_rows[sensor_id] = []
+        for _ in range(2):
+            self.add_point_row(sensor_id)
         
-        # Punt 2
         row += 1
-        layout.addWidget(QLabel("<b>Punt 2:</b>"), row, 0, 1, 3)
-        
-        row += 1
-        layout.addWidget(QLabel("Voltatge (V):"), row, 0)
-        v2_spin = QDoubleSpinBox()
-        v2_spin.setRange(-10, 10)
-        v2_spin.setDecimals(4)
-        v2_spin.setReadOnly(True)
-        v2_spin.setStyleSheet("QDoubleSpinBox { background-color: #f0f0f0; }")
-        layout.addWidget(v2_spin, row, 1)
-        
-        btn_read2 = QPushButton("Llegir")
-        btn_read2.setMaximumWidth(80)
-        btn_read2.clicked.connect(lambda: self.read_current_voltage(sensor_id, 2))
-        layout.addWidget(btn_read2, row, 2)
+        btn_add = QPushButton("+ Afegeix punt")
+        btn_add.clicked.connect(lambda: self.add_point_row(sensor_id))
+        layout.addWidget(btn_add, row, 0)
+        self.add_buttons[sensor_id] = btn_add
+        
+        # Mètode d'ajust
+        method_combo = QComboBox()
+        method_combo.addItem("Lineal a trams", CALIBRATION_METHOD_PIECEWISE)
+        method_combo.addItem("Polinomi", CALIBRATION_METHOD_POLYNOMIAL)
+        layout.addWidget(method_combo, row, 1)
+        
+        degree_spin = QSpinBox()
+        degree_spin.setRange(1, CALIBRATION_MAX_POINTS - 1)
+        degree_spin.setValue(CALIBRATION_POLY_DEGREE)
+        degree_spin.setPrefix("grau ")
+        degree_spin.setEnabled(False)
+        method_combo.currentIndexChanged.connect(
+            lambda: degree_spin.setEnabled(method_combo.currentData() == CALIBRATION_METHOD_POLYNOMIAL)
+        )
+        layout.addWidget(degree_spin, row, 2)
+        self.method_combos[sensor_id] = method_combo
+        self.degree_spins[sensor_id] = degree_spin
         
+        # Resultat de l'última captura (mitjana ± error, soroll i deriva)
         row += 1
-        layout.addWidget(QLabel("Alçada (cm):"), row, 0)
-        h2_spin = QDoubleSpinBox()
-        h2_spin.setRange(0, 1000)
-        h2_spin.setDecimals(2)
-        layout.addWidget(h2_spin, row, 1, 1, 2)
+        capture_label = QLabel("")
+        capture_label.setStyleSheet("QLabel { font-size: 10px; color: #555; }")
+        layout.addWidget(capture_label, row, 0, 1, 3, Qt.AlignmentFlag.AlignCenter)
         
         # Estat calibratge
         row += 1
@@ -252,108 +267,250 @@ class CalibrationDialog(QDialog):
         # Guardar referències als widgets
         if sensor_id == 0:
             self.voltage1_label = voltage_label
-            self.s1_v1_spin = v1_spin
-            self.s1_h1_spin = h1_spin
-            self.s1_v2_spin = v2_spin
-            self.s1_h2_spin = h2_spin
             self.s1_status = status_label
+            self.s1_capture = capture_label
         else:
             self.voltage2_label = voltage_label
-            self.s2_v1_spin = v1_spin
-            self.s2_h1_spin = h1_spin
-            self.s2_v2_spin = v2_spin
-            self.s2_h2_spin = h2_spin
             self.s2_status = status_label
+            self.s2_capture = capture_label
         
         return group
     
-    def read_current_voltage(self, sensor_id: int, point: int):
-        """Llegeix el voltatge actual del sensor."""
-        if self.daq is None:
-            QMessageBox.warning(self, "Error", "Sistema d'adquisició no disponible")
+    def add_point_row(self, sensor_id: int, voltage: float = 0.0, height: float = 0.0):
+        """
+        Afegeix una fila de punt de calibratge a un sensor.
+        
+        Args:
+            sensor_id: Índex del sensor (0 o 1)
+            voltage: Voltatge inicial (V)
+            height: Alçada inicial (cm)
+        """
+        rows = self.point_rows[sensor_id]
+        if len(rows) >= CALIBRATION_MAX_POINTS:
             return
         
-        try:
-            success, msg, values = self.daq.read_current_values()
-            if success and values is not None:
-                # values és una tupla (voltage1, voltage2)
-                voltage = float(values[sensor_id])
-                
-                # Actualitzar el spin corresponent
-                if sensor_id == 0:
-                    self.current_voltage1 = voltage
-                    self.voltage1_label.setText(f"{voltage:.4f} V")
-                    if point == 1:
-                        self.s1_v1_spin.setValue(voltage)
-                    else:
-                        self.s1_v2_spin.setValue(voltage)
-                else:
-                    self.current_voltage2 = voltage
-                    self.voltage2_label.setText(f"{voltage:.4f} V")
-                    if point == 1:
-                        self.s2_v1_spin.setValue(voltage)
-                    else:
-                        self.s2_v2_spin.setValue(voltage)
-            else:
-                QMessageBox.warning(self, "Error", f"No s'ha pogut llegir el sensor: {msg}")
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Error llegint sensor: {str(e)}")
+        row_widget = QWidget()
+        row_layout = QHBoxLayout(row_widget)
+        row_layout.setContentsMargins(0, 0, 0, 0)
+        
+        label = QLabel()
+        label.setMinimumWidth(25)
+        row_layout.addWidget(label)
+        
+        v_spin = QDoubleSpinBox()
+        v_spin.setRange(-10, 10)
+        v_spin.setDecimals(4)
+        v_spin.setSuffix(" V")
+        v_spin.setReadOnly(True)
+        v_spin.setStyleSheet("QDoubleSpinBox { background-color: #f0f0f0; }")
+        v_spin.setValue(voltage)
+        row_layout.addWidget(v_spin)
+        
+        btn_read = QPushButton("Llegir")
+        btn_read.setMaximumWidth(80)
+        row_layout.addWidget(btn_read)
+        
+        h_spin = QDoubleSpinBox()
+        h_spin.setRange(0, 1000)
+        h_spin.setDecimals(2)
+        h_spin.setSuffix(" cm")
+        h_spin.setValue(height)
+        row_layout.addWidget(h_spin)
+        
+        btn_remove = QPushButton("✕")
+        btn_remove.setMaximumWidth(30)
+        btn_remove.setToolTip("Elimina el punt")
+        row_layout.addWidget(btn_remove)
+        
+        point_row = {'widget': row_widget, 'label': label, 'voltage': v_spin,
+                     'height': h_spin, 'buttons': (btn_read, btn_remove)}
+        # La captura es refereix a la fila i no a la posició, perquè les files es poden eliminar
+        btn_read.clicked.connect(lambda: self.read_current_voltage(sensor_id, point_row))
+        btn_remove.clicked.connect(lambda: self.remove_point_row(sensor_id, point_row))
+        # Una fila afegida durant una captura queda desactivada fins que acabi
+        for button in point_row['buttons']:
+            button.setEnabled(self.capture is None)
+        
+        rows.append(point_row)
+        self.capture_buttons.extend(point_row['buttons'])
+        self.points_layouts[sensor_id].addWidget(row_widget)
+        self.update_point_rows(sensor_id)
     
-    def load_current_calibrations(self):
-        """Carrega les calibracions actuals."""
-        # Sensor 1
-        cal1 = self.calibration_manager.get_calibration(0)
-        if cal1.is_calibrated():
-            self.s1_v1_spin.setValue(cal1.point1[0])
-            self.s1_h1_spin.setValue(cal1.point1[1])
-            self.s1_v2_spin.setValue(cal1.point2[0])
-            self.s1_h2_spin.setValue(cal1.point2[1])
-            self.s1_status.setText("✓ Calibrat")
-            self.s1_status.setStyleSheet("QLabel { color: #4CAF50; font-weight: bold; }")
-        
-        # Sensor 2
-        cal2 = self.calibration_manager.get_calibration(1)
-        if cal2.is_calibrated():
-            self.s2_v1_spin.setValue(cal2.point1[0])
-            self.s2_h1_spin.setValue(cal2.point1[1])
-            self.s2_v2_spin.setValue(cal2.point2[0])
-            self.s2_h2_spin.setValue(cal2.point2[1])
-            self.s2_status.setText("✓ Calibrat")
-            self.s2_status.setStyleSheet("QLabel { color: #4CAF50; font-weight: bold; }")
+    def remove_point_row(self, sensor_id: int, point_row: dict):
+        """Elimina una fila de punt (en queden com a mínim 2)."""
+        rows = self.point_rows[sensor_id]
+        if len(rows) <= 2 or point_row not in rows:
+            return
+        rows.remove(point_row)
+        for button in point_row['buttons']:
+            self.capture_buttons.remove(button)
+        point_row['widget'].deleteLater()
+        self.update_point_rows(sensor_id)
     
-    def save_and_close(self):
-        """Valida i desa les calibracions."""
-        # Validar Sensor 1
-        v1_1 = self.s1_v1_spin.value()
-        h1_1 = self.s1_h1_spin.value()
-        v1_2 = self.s1_v2_spin.value()
-        h1_2 = self.s1_h2_spin.value()
-        
-        if abs(v1_2 - v1_1) < 0.001:
+    def update_point_rows(self, sensor_id: int):
+        """Renumera les files i activa els botons segons el nombre de punts."""
+        rows = self.point_rows[sensor_id]
+        for index, point_row in enumerate(rows):
+            point_row['label'].setText(f"P{index + 1}")
+            point_row['buttons'][1].setVisible(len(rows) > 2)
+        if sensor_id in self.add_buttons:
+            self.add_buttons[sensor_id].setEnabled(
+                self.capture is None and len(rows) < CALIBRATION_MAX_POINTS
+            )
+    
+    def set_point_rows(self, sensor_id: int, points):
+        """Substitueix les files d'un sensor pels punts donats (mínim 2 files)."""
+        for point_row in list(self.point_rows[sensor_id]):
+            self.point_rows[sensor_id].remove(point_row)
+            for button in point_row['buttons']:
+                self.capture_buttons.remove(button)
+            point_row['widget'].deleteLater()
+        for voltage, height in points:
+            self.add_point_row(sensor_id, voltage, height)
+        while len(self.point_rows[sensor_id]) < 2:
+            self.add_point_row(sensor_id)
+    
+    def get_points(self, sensor_id: int):
+        """Retorna els punts (voltatge, alçada) introduïts per un sensor."""
+        return [(row['voltage'].value(), row['height'].value())
+                for row in self.point_rows[sensor_id]]
+    
+    def read_current_voltage(self, sensor_id: int, point_row: dict):
+        """Comença la captura d'un punt: una ràfega de mostres en segon pla."""
+        if self.monitor is None or not self.monitor.is_running:
             QMessageBox.warning(
-                self,
-                "Error de validació",
-                "Sensor #1: Els dos voltatges han de ser diferents (mínim 0.001V de diferència)"
+                self, "Error",
+                "Captura no disponible: els sensors només es poden llegir quan no s'està gravant"
             )
             return
         
-        # Validar Sensor 2
-        v2_1 = self.s2_v1_spin.value()
-        h2_1 = self.s2_h1_spin.value()
-        v2_2 = self.s2_v2_spin.value()
-        h2_2 = self.s2_h2_spin.value()
+        self.start_capture(sensor_id, point_row, 1)
+    
+    def start_capture(self, sensor_id: int, point_row: dict, attempt: int):
+        """
+        Demana una ràfega al fil de monitorització sense bloquejar la interfície.
+        
+        Args:
+            sensor_id: Índex del sensor (0 o 1)
+            point_row: Fila del punt de calibratge
+            attempt: Número d'intent (es repeteix si la lectura no és estable)
+        """
+        self.capture = (sensor_id, point_row, attempt)
+        for button in self.capture_buttons:
+            button.setEnabled(False)
+        for button in self.add_buttons.values():
+            button.setEnabled(False)
+        point = self.point_rows[sensor_id].index(point_row) + 1
+        capture_label = self.s1_capture if sensor_id == 0 else self.s2_capture
+        capture_label.setText(f"Capturant punt {point}... (intent {attempt}/{CALIBRATION_MAX_ATTEMPTS})")
+        
+        future = self.monitor.request_burst(CALIBRATION_BURST_SAMPLES)
+        future.add_done_callback(self.burst_finished.emit)
+    
+    def on_burst_finished(self, future):
+        """Avalua la ràfega capturada (s'executa al fil de la interfície)."""
+        if self.capture is None:
+            return
+        sensor_id, point_row, attempt = self.capture
         
-        if abs(v2_2 - v2_1) < 0.001:
-            QMessageBox.warning(
+        try:
+            data = future.result()
+        except Exception as e:
+            self.finish_capture()
+            QMessageBox.warning(self, "Error", f"Error llegint sensor: {str(e)}")
+            return
+        
+        stats = DataProcessor.burst_statistics(
+            data[sensor_id], CALIBRATION_SEGMENTS, CALIBRATION_MAX_STD, CALIBRATION_MAX_DRIFT
+        )
+        capture_label = self.s1_capture if sensor_id == 0 else self.s2_capture
+        state = "✓ estable" if stats['stable'] else "⚠ inestable"
+        capture_label.setText(
+            f"{stats['mean']:.4f} ± {stats['sem']:.4f} V · σ {stats['std']:.4f} V · "
+            f"deriva {stats['drift']:.4f} V · {state}"
+        )
+        
+        if not stats['stable']:
+            if attempt < CALIBRATION_MAX_ATTEMPTS:
+                self.start_capture(sensor_id, point_row, attempt + 1)
+                return
+            
+            self.finish_capture()
+            reply = QMessageBox.question(
                 self,
-                "Error de validació",
-                "Sensor #2: Els dos voltatges han de ser diferents (mínim 0.001V de diferència)"
+                "Lectura inestable",
+                f"La lectura no s'ha estabilitzat després de {attempt} intents "
+                f"(σ {stats['std']:.4f} V, deriva {stats['drift']:.4f} V).\n"
+                "Vols acceptar-la igualment?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
             )
-            return
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+        
+        self.finish_capture()
+        self.set_point_voltage(sensor_id, point_row, stats['mean'])
+    
+    def finish_capture(self):
+        """Dona per acabada la captura en curs i reactiva els botons."""
+        self.capture = None
+        for button in self.capture_buttons:
+            button.setEnabled(True)
+        for sensor_id in self.add_buttons:
+            self.update_point_rows(sensor_id)
+    
+    def set_point_voltage(self, sensor_id: int, point_row: dict, voltage: float):
+        """Desa el voltatge capturat al camp de la fila (si encara existeix)."""
+        if point_row in self.point_rows[sensor_id]:
+            point_row['voltage'].setValue(voltage)
+    
+    def load_current_calibrations(self):
+        """Carrega les calibracions actuals."""
+        for sensor_id, status in ((0, self.s1_status), (1, self.s2_status)):
+            cal = self.calibration_manager.get_calibration(sensor_id)
+            if not cal.is_calibrated():
+                continue
+            self.set_point_rows(sensor_id, cal.points)
+            combo = self.method_combos[sensor_id]
+            combo.setCurrentIndex(max(0, combo.findData(cal.method)))
+            self.degree_spins[sensor_id].setValue(cal.degree)
+            status.setText("✓ Calibrat")
+            status.setStyleSheet("QLabel { color: #4CAF50; font-weight: bold; }")
+    
+    def save_and_close(self):
+        """Valida i desa les calibracions."""
+        calibrations = []
+        for sensor_id in (0, 1):
+            name = f"Sensor #{sensor_id + 1}"
+            points = self.get_points(sensor_id)
+            method = self.method_combos[sensor_id].currentData()
+            degree = self.degree_spins[sensor_id].value()
+            
+            # Els voltatges han de ser tots diferents (mínim 0.001V entre punts)
+            voltages = sorted(voltage for voltage, _ in points)
+            if any(b - a < 0.001 for a, b in zip(voltages, voltages[1:])):
+                QMessageBox.warning(
+                    self,
+                    "Error de validació",
+                    f"{name}: Els voltatges dels punts han de ser diferents (mínim 0.001V de diferència)"
+                )
+                return
+            
+            if method == CALIBRATION_METHOD_POLYNOMIAL and len(points) <= degree:
+                QMessageBox.warning(
+                    self,
+                    "Error de validació",
+                    f"{name}: Un polinomi de grau {degree} necessita almenys {degree + 1} punts"
+                )
+                return
+            
+            calibrations.append((sensor_id, points, method, degree))
         
-        # Desar calibracions
-        self.calibration_manager.set_calibration(0, v1_1, h1_1, v1_2, h1_2)
-        self.calibration_manager.set_calibration(1, v2_1, h2_1, v2_2, h2_2)
+        # Desar calibracions (una sola versió nova per als dos sensors)
+        for sensor_id, points, method, degree in calibrations:
+            self.calibration_manager.set_calibration_points(sensor_id, points, method, degree,
+                                                            save=False)
+        self.calibration_manager.save()
         
         QMessageBox.information(
             self,
@@ -377,10 +534,10 @@ class CalibrationDialog(QDialog):
             self.calibration_manager.reset()
             
             # Netejar tots els camps
-            for spin in [self.s1_v1_spin, self.s1_v2_spin, self.s2_v1_spin, self.s2_v2_spin]:
-                spin.setValue(0)
-            for spin in [self.s1_h1_spin, self.s1_h2_spin, self.s2_h1_spin, self.s2_h2_spin]:
-                spin.setValue(0)
+            for sensor_id in (0, 1):
+                self.set_point_rows(sensor_id, [])
+                self.method_combos[sensor_id].setCurrentIndex(0)
+                self.degree_spins[sensor_id].setValue(CALIBRATION_POLY_DEGREE)
             
             self.s1_status.setText("No calibrat")
             self.s1_status.setStyleSheet("QLabel { color: #f44336; font-weight: bold; }")
@@ -389,27 +546,18 @@ class CalibrationDialog(QDialog):
             
             QMessageBox.information(self, "Resetejat", "Calibracions esborrades")
     
-    def update_current_voltages(self):
-        """Actualitza els voltatges actuals contínuament."""
-        if self.daq is None:
-            return
-        
-        try:
-            success, msg, values = self.daq.read_current_values()
-            if success and values is not None:
-                v1 = float(values[0])
-                v2 = float(values[1])
-                
-                self.current_voltage1 = v1
-                self.current_voltage2 = v2
-                
-                # Actualitzar labels
-                self.voltage1_label.setText(f"{v1:.4f} V")
-                self.voltage2_label.setText(f"{v2:.4f} V")
-        except Exception:
-            pass  # Ignorar errors silenciosament
+    def update_current_voltages(self, v1: float, v2: float):
+        """Actualitza els voltatges actuals (subscriptor dels valors en directe)."""
+        self.current_voltage1 = v1
+        self.current_voltage2 = v2
+        
+        # Actualitzar labels
+        self.voltage1_label.setText(f"{v1:.4f} V")
+        self.voltage2_label.setText(f"{v2:.4f} V")
     
-    def closeEvent(self, event):
-        """Aturar timer en tancar."""
-        self.update_timer.stop()
-        event.accept()
+    def done(self, result):
+        """Deixar de rebre valors en tancar (per acceptar, cancel·lar o tancar la finestra)."""
+        if self.live_values is not None:
+            self.live_values.unsubscribe(self.update_current_voltages)
+        self.capture = None  # Ignorar una ràfega que arribi després de tancar
+        super().done(result)
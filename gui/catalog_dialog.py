@@ -0,0 +1,128 @@
+"""
+Diàleg per navegar i cercar les mesures indexades al catàleg
+"""
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
+                               QPushButton, QTableWidget, QTableWidgetItem,
+                               QAbstractItemView, QHeaderView, QFileDialog)
+from PySide6.QtCore import Qt
+
+from data.catalog import MeasurementCatalog
+
+
+class CatalogDialog(QDialog):
+    """Diàleg per seleccionar una mesura a partir del catàleg."""
+
+    COLUMNS = ['Fitxer', 'Inici', 'Durada (s)', 'Mostres', 'Període (s)',
+               'Mitjana S1', 'Mitjana S2']
+
+    def __init__(self, parent=None, catalog: MeasurementCatalog = None, directory: str = ""):
+        super().__init__(parent)
+        self.setWindowTitle("Carregar mesura")
+        self.setMinimumSize(900, 450)
+
+        self.catalog = catalog
+        self.directory = directory
+        self.selected_path = None
+        self.entries = []
+
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        """Configura la interfície del diàleg."""
+        layout = QVBoxLayout(self)
+
+        # Cerca per nom de fitxer
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(QLabel("Cerca:"))
+        self.edit_search = QLineEdit()
+        self.edit_search.setPlaceholderText("Part del nom del fitxer...")
+        self.edit_search.textChanged.connect(self.refresh)
+        search_layout.addWidget(self.edit_search)
+        layout.addLayout(search_layout)
+
+        # Taula de mesures
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.doubleClicked.connect(self.accept_selection)
+        layout.addWidget(self.table)
+
+        self.label_count = QLabel("")
+        self.label_count.setStyleSheet("QLabel { color: #666; font-size: 10px; }")
+        layout.addWidget(self.label_count)
+
+        # Botons
+        button_layout = QHBoxLayout()
+
+        self.btn_browse = QPushButton("Navega...")
+        self.btn_browse.clicked.connect(self.browse)
+        button_layout.addWidget(self.btn_browse)
+
+        button_layout.addStretch()
+
+        self.btn_cancel = QPushButton("Cancel·la")
+        self.btn_cancel.clicked.connect(self.reject)
+        button_layout.addWidget(self.btn_cancel)
+
+        self.btn_open = QPushButton("Obre")
+        self.btn_open.setDefault(True)
+        self.btn_open.clicked.connect(self.accept_selection)
+        button_layout.addWidget(self.btn_open)
+
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        """Actualitza la taula amb el resultat de la cerca."""
+        self.entries = self.catalog.search(text=self.edit_search.text().strip())
+        self.table.setRowCount(len(self.entries))
+
+        for row, entry in enumerate(self.entries):
+            stats = entry['stats'] or {}
+            values = [
+                entry['filename'],
+                (entry['start_time'] or '').replace('T', ' '),
+                self._format_number(entry['duration'], 1),
+                str(entry['sample_count']),
+                self._format_number(entry['period'], 3),
+                self._format_number(stats.get('voltage_sensor1', {}).get('mean'), 3),
+                self._format_number(stats.get('voltage_sensor2', {}).get('mean'), 3),
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column > 0:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+        self.label_count.setText(f"{len(self.entries)} mesures al catàleg")
+
+    def accept_selection(self):
+        """Accepta la mesura seleccionada."""
+        row = self.table.currentRow()
+        if row < 0 or row >= len(self.entries):
+            return
+        self.selected_path = self.entries[row]['filepath']
+        self.accept()
+
+    def browse(self):
+        """Permet seleccionar un fitxer manualment (fora del catàleg)."""
+        filename, _ = QFileDialog.getOpenFileName(
+            self,
+            'Carregar mesura',
+            self.directory,
+            'Mesures (*.xlsx *.lvz *.manifest.json);;Fitxers Excel (*.xlsx);;'
+            'Fitxers comprimits (*.lvz);;Mesures segmentades (*.manifest.json)'
+        )
+        if filename:
+            self.selected_path = filename
+            self.accept()
+
+    @staticmethod
+    def _format_number(value, decimals: int) -> str:
+        """Formata un valor numèric o retorna un guió si no existeix."""
+        if value is None:
+            return '-'
+        return f"{value:.{decimals}f}"
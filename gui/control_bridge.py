@@ -0,0 +1,59 @@
+"""
+Pont entre l'API de control i el fil de la interfície
+Les ordres arriben des dels fils del servidor (vegeu utils.control_server) i
+s'han d'executar al fil de la interfície, que és el propietari dels widgets,
+dels timers i de l'adquisició. El pont les hi envia amb un senyal (connexió
+encuada) i retorna el resultat amb un Future.
+"""
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+
+class ControlBridge(QObject):
+    """Executa ordres de qualsevol fil al fil de la interfície."""
+
+    command_requested = Signal(str, object, object)
+
+    def __init__(self, commands: Dict[str, Callable[[dict], dict]], parent=None):
+        """
+        Inicialitza el pont (s'ha de crear al fil de la interfície).
+
+        Args:
+            commands: Ordre → funció (paràmetres) → diccionari de resultat
+            parent: Objecte pare
+        """
+        super().__init__(parent)
+        self.commands = commands
+        self.command_requested.connect(self._execute)
+
+    def execute(self, command: str, params: dict, timeout: float) -> dict:
+        """
+        Executa una ordre al fil de la interfície i n'espera el resultat.
+        No s'ha de cridar des del mateix fil de la interfície (es bloquejaria).
+
+        Args:
+            command: Nom de l'ordre
+            params: Paràmetres de l'ordre
+            timeout: Temps màxim d'espera (s)
+
+        Returns:
+            Resultat de l'ordre
+        """
+        future = Future()
+        self.command_requested.emit(command, params, future)
+        try:
+            return future.result(timeout)
+        finally:
+            future.cancel()  # Si encara no s'ha començat, ja no s'executarà
+
+    @Slot(str, object, object)
+    def _execute(self, command: str, params: dict, future: Future):
+        """Executa l'ordre (al fil de la interfície)."""
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(self.commands[command](params))
+        except Exception as e:
+            future.set_exception(e)
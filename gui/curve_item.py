@@ -0,0 +1,246 @@
+"""
+Corba de pyqtgraph que admet afegir mostres sense reconstruir tota la sèrie
+Les mostres es guarden en trossos de QPainterPath ja construïts: afegir dades
+només construeix el camí dels punts nous i només es repinta la zona de la cua.
+Quan un tros té més punts que columnes de píxels (vista general, seguiment en
+directe, autoescalat), es dibuixa el seu mínim/màxim per columna, calculat una
+sola vegada per a cada escala: el cost de repintar depèn de l'amplada en píxels
+i no del total de mostres.
+"""
+import math
+
+import numpy as np
+import pyqtgraph as pg
+from PySide6.QtCore import QRectF
+from PySide6.QtWidgets import QGraphicsItem
+
+
+class _Chunk:
+    """Tros de corba ja construït."""
+
+    __slots__ = ('path', 'x_min', 'x_max', 'y_min', 'y_max', 'count',
+                 'pieces', 'data', 'decimated')
+
+    def __init__(self):
+        self.path = None
+        self.x_min = self.y_min = float('inf')
+        self.x_max = self.y_max = float('-inf')
+        self.count = 0
+        self.pieces = []       # Arrays (x, y) afegits, per poder-los delmar
+        self.data = None       # Arrays (x, y) concatenats (es descarten en afegir-ne)
+        self.decimated = None  # (amplada de columna, camí delmat)
+
+    def rect(self) -> QRectF:
+        return QRectF(self.x_min, self.y_min, self.x_max - self.x_min, self.y_max - self.y_min)
+
+    def arrays(self):
+        """Totes les mostres del tros."""
+        if self.data is None:
+            self.data = (np.concatenate([x for x, _ in self.pieces]),
+                         np.concatenate([y for _, y in self.pieces]))
+            self.pieces = [self.data]
+        return self.data
+
+
+class AppendableCurveItem(pg.GraphicsObject):
+    """Corba amb cost d'actualització proporcional a les mostres noves."""
+
+    # Punts màxims per tros: limita el cost de repintar i permet descartar trossos antics
+    CHUNK_POINTS = 2048
+
+    def __init__(self, pen=None):
+        """
+        Inicialitza la corba buida.
+
+        Args:
+            pen: Llapis de la corba (qualsevol argument acceptat per pg.mkPen)
+        """
+        super().__init__()
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+        self.pen = pg.mkPen(pen)
+        # Opcions mínimes perquè LegendItem pugui dibuixar la mostra de la corba
+        self.opts = {'pen': self.pen, 'antialias': False, 'fillLevel': None, 'symbol': None}
+        self.chunks = []
+        self.last_point = None
+        self.bounds = None  # (x_min, x_max, y_min, y_max)
+
+    def clear(self):
+        """Elimina totes les mostres."""
+        self.prepareGeometryChange()
+        self.chunks = []
+        self.last_point = None
+        self.bounds = None
+        self.informViewBoundsChanged()
+        self.update()
+
+    def setData(self, x, y):
+        """Substitueix totes les mostres de la corba."""
+        self.clear()
+        self.append(x, y)
+
+    def append(self, x, y):
+        """
+        Afegeix mostres al final de la corba.
+
+        Args:
+            x: Temps de les noves mostres
+            y: Valors de les noves mostres
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        start = 0
+        while start < len(x):
+            chunk = self.chunks[-1] if self.chunks else None
+            if chunk is None or chunk.count >= self.CHUNK_POINTS:
+                chunk = _Chunk()
+                self.chunks.append(chunk)
+            end = min(len(x), start + self.CHUNK_POINTS - chunk.count)
+            self._append_to_chunk(chunk, x[start:end], y[start:end])
+            start = end
+
+    def _append_to_chunk(self, chunk: _Chunk, x: np.ndarray, y: np.ndarray):
+        """Construeix el camí dels punts nous i l'afegeix al tros."""
+        # Enllaçar amb l'últim punt perquè la línia sigui contínua entre blocs
+        if self.last_point is not None:
+            x = np.concatenate(([self.last_point[0]], x))
+            y = np.concatenate(([self.last_point[1]], y))
+        self.last_point = (x[-1], y[-1])
+        if len(x) < 2:
+            if chunk.path is None:
+                chunk.path = pg.QtGui.QPainterPath()
+            return
+
+        path = pg.arrayToQPath(x, y, connect='finite')
+        if chunk.path is None:
+            chunk.path = path
+        else:
+            chunk.path.addPath(path)
+        chunk.count += len(x) - 1
+        chunk.pieces.append((x, y))
+        chunk.data = None
+        chunk.decimated = None
+
+        finite = np.isfinite(y)
+        if not finite.any():
+            return
+        x_min, x_max = float(np.min(x)), float(np.max(x))
+        y_min, y_max = float(np.min(y[finite])), float(np.max(y[finite]))
+        chunk.x_min, chunk.x_max = min(chunk.x_min, x_min), max(chunk.x_max, x_max)
+        chunk.y_min, chunk.y_max = min(chunk.y_min, y_min), max(chunk.y_max, y_max)
+
+        tail = QRectF(x_min, y_min, x_max - x_min, y_max - y_min)
+        if self.bounds is None:
+            self.bounds = (x_min, x_max, y_min, y_max)
+            changed = True
+        else:
+            bx0, bx1, by0, by1 = self.bounds
+            new_bounds = (min(bx0, x_min), max(bx1, x_max), min(by0, y_min), max(by1, y_max))
+            changed = new_bounds != self.bounds
+            self.bounds = new_bounds
+        if changed:
+            self.prepareGeometryChange()
+            self.informViewBoundsChanged()
+        # Només cal repintar la zona de la cua
+        self.update(self._padded(tail))
+
+    def trim_before(self, x: float):
+        """
+        Descarta els trossos sencers anteriors a un temps (per a finestres mòbils).
+
+        Args:
+            x: Temps a partir del qual cal conservar les dades
+        """
+        keep = [chunk for chunk in self.chunks if chunk.x_max >= x or chunk is self.chunks[-1]]
+        if len(keep) == len(self.chunks):
+            return
+        self.prepareGeometryChange()
+        self.chunks = keep
+        finite = [chunk for chunk in keep if chunk.count > 0 and chunk.x_min <= chunk.x_max]
+        if finite:
+            self.bounds = (
+                min(chunk.x_min for chunk in finite), max(chunk.x_max for chunk in finite),
+                min(chunk.y_min for chunk in finite), max(chunk.y_max for chunk in finite)
+            )
+        else:
+            self.bounds = None
+        self.informViewBoundsChanged()
+        self.update()
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        """Límits de les dades en un eix (utilitzat per l'autoescalat del ViewBox)."""
+        if self.bounds is None:
+            return None, None
+        if ax == 0:
+            return self.bounds[0], self.bounds[1]
+        return self.bounds[2], self.bounds[3]
+
+    def viewTransformChanged(self):
+        """El marge en píxels depèn del zoom: recalcular el rectangle."""
+        self.prepareGeometryChange()
+
+    def _padding(self):
+        """Gruix del llapis en unitats de dades (x, y)."""
+        px = self.pixelWidth() or 0.0
+        py = self.pixelHeight() or 0.0
+        width = max(self.pen.widthF(), 1.0) + 1.0
+        return px * width, py * width
+
+    def _padded(self, rect: QRectF) -> QRectF:
+        """Amplia un rectangle de dades amb el gruix del llapis en píxels."""
+        dx, dy = self._padding()
+        return rect.adjusted(-dx, -dy, dx, dy)
+
+    def boundingRect(self) -> QRectF:
+        if self.bounds is None:
+            return QRectF()
+        x_min, x_max, y_min, y_max = self.bounds
+        return self._padded(QRectF(x_min, y_min, x_max - x_min, y_max - y_min))
+
+    def paint(self, p, opt, widget):
+        if not self.chunks:
+            return
+        p.setPen(self.pen)
+        exposed = opt.exposedRect
+        px = self.pixelWidth() or 0.0
+        dx, dy = self._padding()
+        for chunk in self.chunks:
+            if chunk.path is None or chunk.count == 0:
+                continue
+            # Els trossos fora de la zona a repintar no es dibuixen
+            if exposed.isValid() and not chunk.rect().adjusted(-dx, -dy, dx, dy).intersects(exposed):
+                continue
+            p.drawPath(self._chunk_path(chunk, px))
+
+    @staticmethod
+    def _chunk_path(chunk: _Chunk, px: float):
+        """
+        Camí a dibuixar d'un tros: el complet, o el delmat si té més de dos punts
+        per columna de píxels.
+
+        Args:
+            chunk: Tros de corba
+            px: Amplada d'un píxel en unitats de dades
+        """
+        if px <= 0 or chunk.count <= 2 * (chunk.x_max - chunk.x_min) / px:
+            return chunk.path
+        # Columnes de mida potència de 2: la mateixa escala serveix mentre el zoom
+        # (p.ex. l'autoescalat en directe) no canviï més d'un factor 2
+        width = 2.0 ** math.ceil(math.log2(px))
+        if chunk.decimated is None or chunk.decimated[0] != width:
+            chunk.decimated = (width, AppendableCurveItem._min_max_path(*chunk.arrays(), width))
+        return chunk.decimated[1]
+
+    @staticmethod
+    def _min_max_path(x: np.ndarray, y: np.ndarray, width: float):
+        """
+        Camí amb el mínim i el màxim de cada columna d'amplada width (sense perdre pics).
+        Les columnes sense cap valor finit tallen la línia, com connect='finite'.
+        """
+        columns = np.floor(x / width)
+        starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+        with np.errstate(invalid='ignore'):
+            y_min = np.fmin.reduceat(y, starts)
+            y_max = np.fmax.reduceat(y, starts)
+        xs = np.repeat(x[starts], 2)
+        ys = np.column_stack((y_min, y_max)).ravel()
+        return pg.arrayToQPath(xs, ys, connect='finite')
@@ -0,0 +1,84 @@
+"""
+Planificador del refresc de la pantalla
+Desacobla la freqüència de redibuix del nombre de mostres: es refresca a un
+nombre fix d'imatges per segon, només si han arribat dades noves, i s'alenteix
+automàticament si el redibuix triga massa.
+"""
+import time
+from typing import Callable
+
+from PySide6.QtCore import QObject, QTimer
+
+from utils.config import PLOT_TARGET_FPS, PLOT_MIN_FPS
+
+
+class DisplayScheduler(QObject):
+    """Crida una funció de refresc a freqüència limitada quan hi ha dades noves."""
+
+    # Fracció del temps de cada imatge que pot ocupar el redibuix abans d'alentir-lo
+    MAX_FRAME_LOAD = 0.5
+    BACKOFF_FACTOR = 1.5
+    RECOVERY_FACTOR = 0.9
+
+    def __init__(self, callback: Callable[[], None], target_fps: float = PLOT_TARGET_FPS,
+                 min_fps: float = PLOT_MIN_FPS, parent=None):
+        """
+        Inicialitza el planificador.
+
+        Args:
+            callback: Funció que redibuixa la pantalla
+            target_fps: Imatges per segon desitjades
+            min_fps: Imatges per segon mínimes (límit de l'alentiment)
+            parent: QObject pare
+        """
+        super().__init__(parent)
+        self.callback = callback
+        self.base_interval = 1000.0 / target_fps
+        self.max_interval = 1000.0 / min_fps
+        self.interval = self.base_interval
+        self.dirty = False
+        self.last_frame_ms = 0.0
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.on_timeout)
+
+    def start(self):
+        """Comença a refrescar (reinicia l'alentiment)."""
+        self.interval = self.base_interval
+        self.timer.start(int(self.interval))
+
+    def stop(self):
+        """Atura el refresc periòdic."""
+        self.timer.stop()
+
+    def mark_dirty(self):
+        """Indica que hi ha dades noves per mostrar al proper refresc."""
+        self.dirty = True
+
+    @property
+    def fps(self) -> float:
+        """Imatges per segon actuals."""
+        return 1000.0 / self.interval
+
+    def on_timeout(self):
+        """Redibuixa si cal i adapta l'interval segons el cost del redibuix."""
+        if not self.dirty:
+            return
+        self.dirty = False
+
+        start = time.perf_counter()
+        self.callback()
+        self.last_frame_ms = (time.perf_counter() - start) * 1000.0
+
+        if self.last_frame_ms > self.MAX_FRAME_LOAD * self.interval:
+            # El redibuix s'ha menjat massa temps: espaiar les imatges
+            interval = min(self.interval * self.BACKOFF_FACTOR, self.max_interval)
+        elif self.last_frame_ms < 0.25 * self.interval:
+            # Hi ha marge: tornar gradualment a la freqüència desitjada
+            interval = max(self.interval * self.RECOVERY_FACTOR, self.base_interval)
+        else:
+            interval = self.interval
+
+        if int(interval) != int(self.interval):
+            self.timer.setInterval(int(interval))
+        self.interval = interval
@@ -5,22 +5,48 @@ Amb suport per calibratge voltatge → alçada
 """
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QLabel, QLineEdit, QDoubleSpinBox,
-                             QFileDialog, QMessageBox, QFrame, QDialog)
+                             QMessageBox, QFrame, QDialog, QCheckBox, QScrollBar)
 from PySide6.QtCore import QTimer, Qt
 from PySide6.QtGui import QFont
+import numpy as np
 import pyqtgraph as pg
 from datetime import datetime
+from typing import Tuple
 import os
 
 from daq.acquisition import DAQAcquisition
 from daq.sensor import SensorManager
-from data.file_handler import FileHandler
+from daq.monitor import MonitorReader
+from daq.live_values import LiveValueBus
+from daq.process import AcquisitionProcess
+from data.file_handler import FileHandler, create_file_handler
+from data.catalog import MeasurementCatalog
+from data.multirate import MultiRateWriter, load_overview
+from data.segments import SegmentedFileHandler, manifest_path
+from data.multires import MultiResolutionCache
+from data.events import EventEngine
+from data.burst import BurstRecorder
+from data.adaptive import AdaptiveSampler
+from data.streaming import StreamServer
 from gui.calibration_dialog import CalibrationDialog
+from gui.catalog_dialog import CatalogDialog
+from gui.spectrum_dialog import SpectrumDialog
+from gui.plot_buffer import PlotBuffer
+from gui.curve_item import AppendableCurveItem
+from gui.display_scheduler import DisplayScheduler
+from gui.control_bridge import ControlBridge
 from utils.calibration import CalibrationManager
+from utils.control_server import ControlServer
 from utils.config import (
     WINDOW_TITLE, INSTITUTION_FOOTER, DEFAULT_SAMPLING_PERIOD,
     MIN_SAMPLING_PERIOD, MAX_SAMPLING_PERIOD, DEFAULT_FILENAME_PATTERN,
-    PLOT_COLORS, AI_CHANNEL_NAMES, DEVICE_NAME, PLOT_UPDATE_INTERVAL
+    PLOT_COLORS, AI_CHANNEL_NAMES, DEVICE_NAME,
+    MESURES_DIR, CATALOG_FILENAME, LIVE_VALUE_DISPATCH_INTERVAL, OVERVIEW_ENABLED, PLOT_MAX_LOAD_POINTS,
+    SEGMENT_ROTATION_ENABLED, PLOT_USE_OPENGL, LIVE_WINDOW_ENABLED, LIVE_WINDOW_SPAN,
+    PLOT_OVERVIEW_POINTS, PLOT_DETAIL_MAX_POINTS, PLOT_CACHE_MAX_RAW_POINTS,
+    DRIFT_COMPENSATION_MODE, BURST_ENABLED, BURST_TRIGGER_RULES, ADAPTIVE_SAMPLING_ENABLED,
+    ADAPTIVE_MAX_FACTOR, ADAPTIVE_THRESHOLD, ADAPTIVE_QUIET_TIME, BLOCK_AGGREGATOR,
+    ACQUISITION_PROCESS_ENABLED, SAMPLE_RATE, STREAM_ENABLED, CONTROL_API_ENABLED
 )
 from utils.validators import validate_sampling_period, validate_filename, check_file_exists
 
@@ -36,9 +62,49 @@ class MainWindow(QMainWindow):
         
         # Components del sistema
         self.daq = DAQAcquisition()
+        # Valors en directe: un sol lector hi publica i la interfície s'hi subscriu
+        self.live_values = LiveValueBus()
+        self.monitor = MonitorReader(self.daq, self.live_values)  # Lector quan no es grava
+        self.acquisition_process = AcquisitionProcess()  # Lector en un altre procés (opcional)
+        self.event_engine = EventEngine()  # Regles d'esdeveniments (EVENT_RULES)
+        self.event_alert = None
+        self.event_alert_lines = []
+        self.burst_recorder = None  # Ràfegues al voltant dels esdeveniments (BURST_ENABLED)
+        self.adaptive_sampler = None  # Agrupador de files (període adaptatiu)
+        self.rejected_totals = np.zeros(2, dtype=np.int64)  # Mostres rebutjades a la mesura
+        self.rejected_blocks = 0  # Blocs amb alguna mostra rebutjada
+        self.stored_rows = 0
         self.sensor_manager = SensorManager()
         self.file_handler = None
         self.calibration_manager = CalibrationManager()
+        self.catalog = MeasurementCatalog(os.path.join(MESURES_DIR, CATALOG_FILENAME))
+        self.spectrum_dialog = None  # Es crea en obrir-la per primer cop
+        
+        # Servidor de dades en directe per a altres equips (STREAM_ENABLED)
+        self.stream_server = None
+        if STREAM_ENABLED:
+            server = StreamServer()
+            success, msg = server.start()
+            if success:
+                self.stream_server = server
+            else:
+                print(msg)
+        
+        # API de control per a scripts (CONTROL_API_ENABLED); les ordres s'executen en aquest fil
+        self.control_server = None
+        if CONTROL_API_ENABLED:
+            self.control_bridge = ControlBridge({
+                'status': self.control_status,
+                'metrics': self.control_metrics,
+                'start': self.control_start,
+                'stop': self.control_stop
+            }, parent=self)
+            server = ControlServer(self.control_bridge.execute)
+            success, msg = server.start()
+            if success:
+                self.control_server = server
+            else:
+                print(msg)
         
         # Afegir [SIMULACIÓ] al títol si està en mode simulació
         if self.daq.using_simulation:
@@ -48,19 +114,29 @@ class MainWindow(QMainWindow):
         self.is_acquiring = False
         self.start_time = None
         self.sample_count = 0
-        self.plot_update_counter = 0  # Comptador per actualitzar gràfica menys sovint
+        self.latest_values = None  # Últims voltatges adquirits (pendents de mostrar)
         self.acquisition_timer = QTimer()
         self.acquisition_timer.timeout.connect(self.on_acquisition_tick)
         
-        # Timer per llegir valors contínuament quan no s'està gravant
+        # Timer que distribueix els valors en directe als subscriptors (fil de la interfície)
         self.monitor_timer = QTimer()
-        self.monitor_timer.timeout.connect(self.on_monitor_tick)
-        self.monitor_timer.start(500)
-        
-        # Dades per a la gràfica
-        self.time_data = []
-        self.voltage1_data = []
-        self.voltage2_data = []
+        self.monitor_timer.timeout.connect(self.live_values.dispatch)
+        self.monitor_timer.start(int(LIVE_VALUE_DISPATCH_INTERVAL * 1000))
+        self.live_values.subscribe(self.on_live_values)
+        
+        # Refresc de gràfica i displays a FPS fix durant l'adquisició
+        self.display_scheduler = DisplayScheduler(self.refresh_display, parent=self)
+        
+        # Dades per a la gràfica (arrays persistents, sense recrear-los a cada refresc)
+        self.plot_buffer = PlotBuffer(2)
+        # Mostres del buffer ja enviades a les corbes
+        self.plotted_count = 0
+        # Historial de la mesura en curs (finestra mòbil)
+        self.history_path = None
+        self.following_live = True
+        # Tota la mesura a diverses resolucions (vista general i navegació pel detall)
+        self.plot_cache = MultiResolutionCache(2, max_raw_points=PLOT_CACHE_MAX_RAW_POINTS)
+        self.syncing_range = False
         
         # Crear interfície
         self.setup_ui()
@@ -70,9 +146,6 @@ class MainWindow(QMainWindow):
         
         # Activar sensors per llegir valors contínuament
         self.setup_monitoring()
-        
-        # Fer una primera lectura després d'un petit delay
-        QTimer.singleShot(1000, self.on_monitor_tick)
     
     def setup_ui(self):
         """Configura la interfície gràfica."""
@@ -90,6 +163,15 @@ class MainWindow(QMainWindow):
         left_layout.setSpacing(0)
         self.setup_plot()
         left_layout.addWidget(self.plot_widget)
+        left_layout.addWidget(self.overview_widget)
+        
+        # Barra per recórrer l'historial en mode finestra mòbil (carrega del disc)
+        self.history_scrollbar = QScrollBar(Qt.Orientation.Horizontal)
+        self.history_scrollbar.setTracking(False)
+        self.history_scrollbar.setRange(0, 0)
+        self.history_scrollbar.setVisible(LIVE_WINDOW_ENABLED)
+        self.history_scrollbar.valueChanged.connect(self.on_history_scrolled)
+        left_layout.addWidget(self.history_scrollbar)
         
         # Part dreta: Controls (1/6 - més estret)
         right_widget = QWidget()
@@ -105,42 +187,54 @@ class MainWindow(QMainWindow):
     
     def setup_plot(self):
         """Configura la gràfica temporal."""
-        self.plot_widget = pg.PlotWidget()
+        if PLOT_USE_OPENGL:
+            # Renderitzat de les corbes per GPU (també funciona amb OpenGL per software)
+            pg.setConfigOptions(enableExperimental=True)
+        self.plot_widget = pg.PlotWidget(useOpenGL=PLOT_USE_OPENGL)
         self.plot_widget.setBackground('w')
         
+        self.plot_widget.setLabel('bottom', 'Temps', units='s')
+        self.plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        self.legend = self.plot_widget.addLegend()
+        
+        # Corbes incrementals: cada refresc només afegeix les mostres noves
+        self.plot_line1 = AppendableCurveItem(pen=pg.mkPen(color=PLOT_COLORS[0], width=2))
+        self.plot_line2 = AppendableCurveItem(pen=pg.mkPen(color=PLOT_COLORS[1], width=2))
+        self.plot_widget.addItem(self.plot_line1)
+        self.plot_widget.addItem(self.plot_line2)
+        
+        self.update_plot_labels()
+        
+        # Vista general de tota la mesura: la regió seleccionada es mostra a dalt
+        self.overview_widget = pg.PlotWidget()
+        self.overview_widget.setBackground('w')
+        self.overview_widget.setMaximumHeight(110)
+        self.overview_widget.setMouseEnabled(x=False, y=False)
+        self.overview_widget.hideButtons()
+        self.overview_widget.getPlotItem().hideAxis('left')
+        self.overview_line1 = self.overview_widget.plot(pen=pg.mkPen(color=PLOT_COLORS[0], width=1))
+        self.overview_line2 = self.overview_widget.plot(pen=pg.mkPen(color=PLOT_COLORS[1], width=1))
+        
+        self.region = pg.LinearRegionItem()
+        self.region.setZValue(10)
+        self.overview_widget.addItem(self.region, ignoreBounds=True)
+        self.region.sigRegionChanged.connect(self.on_region_changed)
+        self.plot_widget.sigXRangeChanged.connect(self.on_detail_range_changed)
+    
+    def update_plot_labels(self):
+        """Actualitza l'etiqueta Y i la llegenda segons el calibratge."""
         # Etiqueta Y - mostrar què s'està graficant
         if self.calibration_manager.are_all_calibrated():
             self.plot_widget.setLabel('left', 'Alçada (cm)', color='#333', size='11pt')
-            # Afegir nota explicativa
-            note = pg.TextItem(text='Nota: Valors convertits de voltatge a alçada segons calibratge', 
-                              color='#666', anchor=(0, 0))
-            note.setPos(0, 0)
+            unit = " (cm)"
         else:
             self.plot_widget.setLabel('left', 'Voltatge (V)', color='#333', size='11pt')
+            unit = " (V)"
         
-        self.plot_widget.setLabel('bottom', 'Temps', units='s')
-        self.plot_widget.showGrid(x=True, y=True, alpha=0.3)
-        self.plot_widget.addLegend()
-        
-        # Crear línies per cada sensor amb noms que indiquin la unitat
-        sensor1_name = AI_CHANNEL_NAMES[0]
-        sensor2_name = AI_CHANNEL_NAMES[1]
-        
-        if self.calibration_manager.are_all_calibrated():
-            sensor1_name += " (cm)"
-            sensor2_name += " (cm)"
-        else:
-            sensor1_name += " (V)"
-            sensor2_name += " (V)"
-        
-        self.plot_line1 = self.plot_widget.plot(
-            [], [], pen=pg.mkPen(color=PLOT_COLORS[0], width=2),
-            name=sensor1_name
-        )
-        self.plot_line2 = self.plot_widget.plot(
-            [], [], pen=pg.mkPen(color=PLOT_COLORS[1], width=2),
-            name=sensor2_name
-        )
+        # Noms de les línies amb la unitat de cada sensor
+        self.legend.clear()
+        self.legend.addItem(self.plot_line1, AI_CHANNEL_NAMES[0] + unit)
+        self.legend.addItem(self.plot_line2, AI_CHANNEL_NAMES[1] + unit)
     
     def setup_controls(self, layout):
         """Configura els controls de la interfície."""
@@ -255,6 +349,49 @@ class MainWindow(QMainWindow):
         self.btn_calibration.clicked.connect(self.on_calibration_clicked)
         layout.addWidget(self.btn_calibration)
         
+        # Botó Espectre
+        self.btn_spectrum = QPushButton('Espectre')
+        self.btn_spectrum.setMinimumHeight(35)
+        self.btn_spectrum.setStyleSheet("""
+            QPushButton {
+                background-color: #9C27B0;
+                color: white;
+                font-size: 12px;
+                border: none;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #7B1FA2;
+            }
+        """)
+        self.btn_spectrum.clicked.connect(self.on_spectrum_clicked)
+        layout.addWidget(self.btn_spectrum)
+        
+        # Botó Zero (comprovació de zero per compensar la deriva)
+        self.btn_zero_check = QPushButton('Zero')
+        self.btn_zero_check.setMinimumHeight(35)
+        self.btn_zero_check.setToolTip('Prem-lo amb el nivell a l\'estat de referència per mesurar la deriva')
+        self.btn_zero_check.setStyleSheet("""
+            QPushButton {
+                background-color: #607D8B;
+                color: white;
+                font-size: 12px;
+                border: none;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #455A64;
+            }
+            QPushButton:disabled {
+                background-color: #555;
+                color: #999;
+            }
+        """)
+        self.btn_zero_check.setEnabled(False)
+        self.btn_zero_check.setVisible(DRIFT_COMPENSATION_MODE == 'zero_check')
+        self.btn_zero_check.clicked.connect(self.on_zero_check_clicked)
+        layout.addWidget(self.btn_zero_check)
+        
         # Separador
         line = QFrame()
         line.setFrameShape(QFrame.Shape.HLine)
@@ -297,6 +434,16 @@ class MainWindow(QMainWindow):
         """)
         layout.addWidget(self.spin_period)
         
+        # Període adaptatiu (el període de mostreig passa a ser el mínim)
+        self.check_adaptive = QCheckBox('Període adaptatiu')
+        self.check_adaptive.setChecked(ADAPTIVE_SAMPLING_ENABLED)
+        self.check_adaptive.setToolTip(
+            f'Es desa una fila cada període quan el nivell canvia i fins a '
+            f'{ADAPTIVE_MAX_FACTOR} períodes per fila quan està quiet'
+        )
+        self.check_adaptive.setStyleSheet(label_style.replace('QLabel', 'QCheckBox'))
+        layout.addWidget(self.check_adaptive)
+        
         # Nom del fitxer
         filename_label = QLabel('Nom del fitxer:')
         filename_label.setStyleSheet(label_style)
@@ -318,6 +465,13 @@ class MainWindow(QMainWindow):
         """)
         layout.addWidget(self.edit_filename)
         
+        # Finestra mòbil
+        self.check_live_window = QCheckBox(f'Finestra mòbil ({LIVE_WINDOW_SPAN:.0f} s)')
+        self.check_live_window.setChecked(LIVE_WINDOW_ENABLED)
+        self.check_live_window.setStyleSheet(label_style.replace('QLabel', 'QCheckBox'))
+        self.check_live_window.toggled.connect(self.on_live_window_toggled)
+        layout.addWidget(self.check_live_window)
+        
         # Etiqueta d'estat
         estat_label = QLabel('Estat:')
         estat_label.setStyleSheet(label_style)
@@ -391,31 +545,27 @@ class MainWindow(QMainWindow):
         sensors_layout.addLayout(sensor2_container)
         layout.addLayout(sensors_layout)
         
+        # Mostres rebutjades per l'agregador robust a l'últim cicle
+        self.label_rejected = QLabel('Rebutjades: - / -')
+        self.label_rejected.setStyleSheet('QLabel { font-size: 11px; color: #bbb; }')
+        self.label_rejected.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.label_rejected.setToolTip(f'Mostres espúries descartades a cada bloc ({BLOCK_AGGREGATOR})')
+        self.label_rejected.setVisible(BLOCK_AGGREGATOR in ('hampel', 'sigma_clip'))
+        layout.addWidget(self.label_rejected)
+        
         # Footer institucional (final - ja no cal, està a dalt)
         layout.addStretch()
     
     def on_calibration_clicked(self):
         """Obre el diàleg de calibratge."""
-        dialog = CalibrationDialog(self, self.daq)
+        dialog = CalibrationDialog(self, self.live_values, self.monitor)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             # Recarregar calibracions
             self.calibration_manager.load()
             
-            # Netejar i recrear gràfica amb noves etiquetes
+            # Netejar la gràfica i actualitzar-ne les etiquetes (sense recrear el widget)
             self.clear_plot()
-            
-            # Recrear plot widget amb etiquetes actualitzades
-            old_plot = self.plot_widget
-            parent = old_plot.parent()
-            layout = parent.layout()
-            
-            # Eliminar plot antic
-            layout.removeWidget(old_plot)
-            old_plot.deleteLater()
-            
-            # Crear plot nou
-            self.setup_plot()
-            layout.addWidget(self.plot_widget)
+            self.update_plot_labels()
             
             QMessageBox.information(
                 self,
@@ -424,31 +574,23 @@ class MainWindow(QMainWindow):
                 'La gràfica mostra ara alçada en cm.'
             )
     
+    def on_spectrum_clicked(self):
+        """Obre la finestra de l'espectre en directe (no modal)."""
+        if self.spectrum_dialog is None:
+            self.spectrum_dialog = SpectrumDialog(self)
+        self.spectrum_dialog.show()
+        self.spectrum_dialog.raise_()
+    
     def setup_monitoring(self):
-        """Configura el sistema per llegir valors contínuament."""
-        try:
-            success, msg = self.daq.setup_tasks()
-            if success:
-                self.daq.activate_sensors()
-        except Exception:
-            pass
+        """Engega la lectura contínua dels sensors en segon pla."""
+        # La configuració del hardware i les reconnexions es fan al fil de fons
+        self.monitor.start()
     
-    def on_monitor_tick(self):
-        """Llegeix valors actuals quan no s'està gravant."""
+    def on_live_values(self, voltage1: float, voltage2: float):
+        """Mostra els valors en directe quan no s'està gravant."""
+        # Durant l'adquisició els displays segueixen les dades gravades
         if not self.is_acquiring:
-            try:
-                success, msg, values = self.daq.read_current_values()
-                if success and values is not None:
-                    voltage1, voltage2 = values
-                    self.update_voltage_labels(voltage1, voltage2)
-                elif not success and "no inicialitzada" not in msg.lower():
-                    try:
-                        self.daq.setup_tasks()
-                        self.daq.activate_sensors()
-                    except Exception:
-                        pass
-            except Exception:
-                pass
+            self.update_voltage_labels(voltage1, voltage2)
     
     def check_hardware(self):
         """Comprova si el hardware està disponible."""
@@ -474,15 +616,12 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, 'Error de validació', msg_filename)
             return
         
-        # Crear directori Mesures si no existeix
-        mesures_dir = "Mesures"
-        if not os.path.exists(mesures_dir):
-            os.makedirs(mesures_dir)
-        
         # Camí complet del fitxer dins del directori Mesures
-        full_filepath = os.path.join(mesures_dir, filename)
+        full_filepath = os.path.join(MESURES_DIR, filename)
         
-        if check_file_exists(full_filepath):
+        # Amb rotació, la mesura s'identifica pel seu manifest
+        existing_path = manifest_path(full_filepath) if SEGMENT_ROTATION_ENABLED else full_filepath
+        if check_file_exists(existing_path):
             reply = QMessageBox.question(
                 self,
                 'Fitxer existent',
@@ -493,65 +632,232 @@ class MainWindow(QMainWindow):
             if reply == QMessageBox.StandardButton.No:
                 return
         
+        success, msg = self.start_run(period, filename, overwrite=True)
+        if not success:
+            QMessageBox.critical(self, 'Error iniciant adquisició', msg)
+    
+    def start_run(self, period: float, filename: str, overwrite: bool = False) -> Tuple[bool, str]:
+        """
+        Inicia una mesura (la mateixa lògica per al botó Start i per a l'API de control).
+        
+        Args:
+            period: Període de mostreig (s)
+            filename: Nom del fitxer dins del directori de mesures
+            overwrite: Sobreescriure el fitxer si ja existeix
+            
+        Returns:
+            Tupla (success, error_message)
+        """
+        if self.is_acquiring:
+            return False, "Ja hi ha una adquisició en curs"
+        for valid, msg in (validate_sampling_period(period), validate_filename(filename)):
+            if not valid:
+                return False, msg
+        
+        if not os.path.exists(MESURES_DIR):
+            os.makedirs(MESURES_DIR)
+        full_filepath = os.path.join(MESURES_DIR, filename)
+        existing_path = manifest_path(full_filepath) if SEGMENT_ROTATION_ENABLED else full_filepath
+        if check_file_exists(existing_path) and not overwrite:
+            return False, f'El fitxer "{filename}" ja existeix'
+        
+        # Els controls mostren la configuració de la mesura (també si ve de l'API)
+        self.spin_period.setValue(period)
+        self.edit_filename.setText(filename)
+        period = self.spin_period.value()
+        
         self.clear_plot()
         
-        success, msg = self.daq.setup_tasks()
-        if not success:
-            QMessageBox.critical(self, 'Error DAQmx', msg)
-            return
+        # Recuperar el control del hardware del fil de monitorització
+        if not self.monitor.stop():
+            # P.ex. una ràfega de calibratge en curs: el fil encara fa servir el hardware
+            self.monitor.start()
+            return False, "El hardware està ocupat (lectura en curs); torneu-ho a provar"
         
-        success, msg = self.daq.activate_sensors()
-        if not success:
-            QMessageBox.critical(self, 'Error activant sensors', msg)
+        if ACQUISITION_PROCESS_ENABLED:
+            # El procés d'adquisició serà l'únic usuari del hardware
             self.daq.cleanup()
-            return
+        else:
+            success, msg = self.daq.setup_tasks()
+            if not success:
+                self.setup_monitoring()
+                return False, msg
+            
+            success, msg = self.daq.activate_sensors()
+            if not success:
+                self.daq.cleanup()
+                self.setup_monitoring()
+                return False, msg
         
         try:
-            self.file_handler = FileHandler(full_filepath)
+            if SEGMENT_ROTATION_ENABLED:
+                # Segments numerats amb manifest per a campanyes molt llargues
+                self.file_handler = SegmentedFileHandler(
+                    full_filepath, handler_factory=self.create_storage
+                )
+            else:
+                self.file_handler = self.create_storage(full_filepath)
+            self.file_handler.metadata.update({
+                'start_time': datetime.now().isoformat(timespec='seconds'),
+                'period': period,
+                'calibration': self.get_calibration_snapshot(),
+                'calibration_version': self.calibration_manager.version
+            })
+            if self.check_adaptive.isChecked():
+                # El període desat és el mínim; les files quietes n'agrupen fins a max_factor
+                self.file_handler.metadata['adaptive_sampling'] = {
+                    'max_factor': ADAPTIVE_MAX_FACTOR,
+                    'threshold': ADAPTIVE_THRESHOLD,
+                    'quiet_time': ADAPTIVE_QUIET_TIME
+                }
             self.file_handler.create_file()
         except Exception as e:
-            QMessageBox.critical(self, 'Error creant fitxer', str(e))
+            self.file_handler = None
             self.daq.cleanup()
-            return
+            self.setup_monitoring()
+            return False, f"Error creant fitxer: {str(e)}"
         
-        success, msg = self.daq.start_acquisition()
+        if ACQUISITION_PROCESS_ENABLED:
+            success, msg = self.acquisition_process.start(int(SAMPLE_RATE * period), period)
+        else:
+            success, msg = self.daq.start_acquisition()
         if not success:
-            QMessageBox.critical(self, 'Error iniciant adquisició', msg)
+            self.file_handler = None
             self.daq.cleanup()
-            return
+            self.setup_monitoring()
+            return False, msg
         
         self.is_acquiring = True
+        self.history_path = self.file_handler.filepath
+        if self.spectrum_dialog is not None:
+            self.spectrum_dialog.reset()
+        self.following_live = True
         self.start_time = datetime.now()
         self.sample_count = 0
-        self.plot_update_counter = 0  # Reiniciar comptador de refresc
+        self.latest_values = None
+        self.sensor_manager.compensator.reset()
+        self.event_engine.reset()
+        self.burst_recorder = BurstRecorder(self.file_handler.filepath) if BURST_ENABLED else None
+        self.adaptive_sampler = AdaptiveSampler(period) if self.check_adaptive.isChecked() else None
+        self.stored_rows = 0
+        self.rejected_totals[:] = 0
+        self.rejected_blocks = 0
+        if self.event_alert is not None:
+            self.event_alert.hide()
+            self.event_alert_lines = []
+        if self.stream_server is not None:
+            self.stream_server.publish_message(
+                'start', file=os.path.basename(self.file_handler.filepath), period=period,
+                start_time=self.file_handler.metadata['start_time'],
+                calibration_version=self.calibration_manager.version
+            )
         
         timer_interval = int(period * 1000)
         self.acquisition_timer.start(timer_interval)
+        self.display_scheduler.start()
         
         self.update_ui_for_acquisition(True)
         self.label_status.setText('Adquirint dades...')
         self.label_status.setStyleSheet('QLabel { font-weight: bold; color: #4CAF50; font-size: 11px; }')
+        return True, ""
     
     def on_stop_clicked(self):
         """Gestiona el clic al botó Stop."""
         self.stop_acquisition()
     
+    def control_start(self, params: dict) -> dict:
+        """
+        Ordre 'start' de l'API de control.
+        
+        Args:
+            params: {'period', 'filename', 'adaptive', 'overwrite'} (tots opcionals)
+            
+        Returns:
+            Resultat amb 'success', 'message' i el fitxer de la mesura
+        """
+        period = float(params.get('period', self.spin_period.value()))
+        filename = params.get('filename') or datetime.now().strftime(DEFAULT_FILENAME_PATTERN)
+        if not isinstance(filename, str) or os.path.basename(filename) != filename:
+            raise ValueError("El nom del fitxer no pot contenir directoris")
+        if 'adaptive' in params and not self.is_acquiring:
+            self.check_adaptive.setChecked(bool(params['adaptive']))
+        success, msg = self.start_run(period, filename, overwrite=bool(params.get('overwrite', False)))
+        return {'success': success, 'message': msg,
+                'file': os.path.basename(self.file_handler.filepath) if success else None}
+    
+    def control_stop(self, params: dict) -> dict:
+        """Ordre 'stop' de l'API de control."""
+        if not self.is_acquiring:
+            return {'success': False, 'message': "No hi ha cap adquisició en curs"}
+        filepath = self.file_handler.filepath
+        self.stop_acquisition()
+        return {'success': True, 'message': "", 'file': os.path.basename(filepath)}
+    
+    def control_status(self, params: dict) -> dict:
+        """Ordre 'status' de l'API de control: estat i últimes lectures."""
+        period = self.spin_period.value()
+        values = self.latest_values if self.is_acquiring else self.live_values.latest()
+        latest = None
+        if values is not None:
+            latest = {
+                'voltage': list(values),
+                'height': [self.calibration_manager.voltage_to_height(sensor_id, value)
+                           for sensor_id, value in enumerate(values)]
+            }
+        return {
+            'success': True,
+            'acquiring': self.is_acquiring,
+            'file': os.path.basename(self.file_handler.filepath) if self.file_handler else None,
+            'period': period,
+            'adaptive': self.check_adaptive.isChecked(),
+            'start_time': self.start_time.isoformat(timespec='seconds') if self.is_acquiring else None,
+            'elapsed': self.sample_count * period if self.is_acquiring else None,
+            'latest': latest,
+            'status': self.label_status.text(),
+            'simulation': self.daq.using_simulation,
+            'calibration_version': self.calibration_manager.version
+        }
+    
+    def control_metrics(self, params: dict) -> dict:
+        """Ordre 'metrics' de l'API de control: comptadors de la mesura en curs o l'última."""
+        return {
+            'success': True,
+            'acquiring': self.is_acquiring,
+            'blocks': self.sample_count,
+            'stored_rows': self.stored_rows,
+            'lost_blocks': self.acquisition_process.lost_blocks,
+            'rejected_samples': self.rejected_totals.tolist(),
+            'rejected_blocks': self.rejected_blocks,
+            'events': len(self.event_engine.events),
+            'bursts': len(self.burst_recorder.bursts) if self.burst_recorder is not None else 0,
+            'stream_clients': self.stream_server.client_count if self.stream_server is not None else 0
+        }
+    
     def on_load_clicked(self):
         """Gestiona el clic al botó Carregar mesura."""
         # Crear directori Mesures si no existeix
-        mesures_dir = "Mesures"
-        if not os.path.exists(mesures_dir):
-            os.makedirs(mesures_dir)
-        
-        filename, _ = QFileDialog.getOpenFileName(
-            self,
-            'Carregar mesura',
-            mesures_dir,  # Obrir directament al directori Mesures
-            'Fitxers Excel (*.xlsx)'
-        )
+        if not os.path.exists(MESURES_DIR):
+            os.makedirs(MESURES_DIR)
         
-        if not filename:
+        # Indexar només els fitxers nous o modificats des de l'última vegada
+        try:
+            self.catalog.sync_directory(MESURES_DIR)
+        except Exception as e:
+            print(f"Error sincronitzant el catàleg: {e}")
+        
+        dialog = CatalogDialog(self, self.catalog, MESURES_DIR)
+        if dialog.exec() != QDialog.DialogCode.Accepted or not dialog.selected_path:
             return
+        filename = dialog.selected_path
+        
+        # Les mesures molt llargues es mostren a partir del resum decimat
+        metadata = FileHandler.load_metadata(filename) or {}
+        sample_count = metadata.get('summary', {}).get('sample_count', 0)
+        if sample_count > PLOT_MAX_LOAD_POINTS:
+            overview = load_overview(filename)
+            if overview is not None:
+                self.show_overview(overview, filename)
+                return
         
         df = FileHandler.load_file(filename)
         if df is None:
@@ -565,21 +871,13 @@ class MainWindow(QMainWindow):
         self.clear_plot()
         
         try:
-            self.time_data = df['time_seconds'].tolist()
-            
-            # Decidir si mostrar alçada o voltatge segons calibratge
-            if self.calibration_manager.are_all_calibrated() and 'height_sensor1' in df.columns:
-                # Mostrar alçada si està disponible i calibrat
-                self.voltage1_data = df['height_sensor1'].fillna(df['voltage_sensor1']).tolist()
-                self.voltage2_data = df['height_sensor2'].fillna(df['voltage_sensor2']).tolist()
-            else:
-                # Mostrar voltatge
-                self.voltage1_data = df['voltage_sensor1'].tolist()
-                self.voltage2_data = df['voltage_sensor2'].tolist()
+            series1, series2 = self.select_plot_series(df)
+            self.plot_cache.extend(df['time_seconds'].to_numpy(),
+                                   series1.to_numpy(), series2.to_numpy())
+            self.history_path = filename
+            self.show_whole_measurement()
             
-            self.update_plot()
-            
-            if len(self.voltage1_data) > 0 and len(self.voltage2_data) > 0:
+            if len(self.plot_cache) > 0:
                 # Mostrar últims valors (sempre en voltatge + alçada als displays)
                 v1 = df['voltage_sensor1'].iloc[-1]
                 v2 = df['voltage_sensor2'].iloc[-1]
@@ -591,6 +889,43 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, 'Error visualitzant dades', str(e))
     
+    def select_plot_series(self, df):
+        """Tria les columnes a graficar: alçada si està calibrat, sinó voltatge."""
+        if self.calibration_manager.are_all_calibrated() and 'height_sensor1' in df.columns:
+            # Mostrar alçada si està disponible i calibrat; les alçades que falten es
+            # calculen de cop amb el calibratge actual
+            series = []
+            for sensor_id, suffix in ((0, 'sensor1'), (1, 'sensor2')):
+                heights = df[f'height_{suffix}']
+                if heights.isna().any():
+                    converted = self.calibration_manager.voltages_to_heights(
+                        sensor_id, df[f'voltage_{suffix}'].to_numpy())
+                    heights = heights.where(heights.notna(), converted)
+                series.append(heights)
+            return tuple(series)
+        # Mostrar voltatge
+        return df['voltage_sensor1'], df['voltage_sensor2']
+    
+    def show_overview(self, overview, filename: str):
+        """Mostra a la gràfica la mitjana de cada interval del fitxer de resum."""
+        self.clear_plot()
+        
+        if self.calibration_manager.are_all_calibrated():
+            column1, column2 = 'height_sensor1_mean', 'height_sensor2_mean'
+        else:
+            column1, column2 = 'voltage_sensor1_mean', 'voltage_sensor2_mean'
+        
+        self.plot_cache.extend(overview['time_seconds'].to_numpy(),
+                               overview[column1].to_numpy(), overview[column2].to_numpy())
+        self.show_whole_measurement()
+        
+        if len(overview) > 0:
+            self.update_voltage_labels(overview['voltage_sensor1_mean'].iloc[-1],
+                                       overview['voltage_sensor2_mean'].iloc[-1])
+        
+        self.label_status.setText(f'Carregat (resum): {os.path.basename(filename)}')
+        self.label_status.setStyleSheet('QLabel { font-weight: bold; color: #2196F3; font-size: 11px; }')
+    
     def on_clear_clicked(self):
         """Gestiona el clic al botó Neteja gràfica."""
         self.clear_plot()
@@ -600,68 +935,125 @@ class MainWindow(QMainWindow):
     def on_acquisition_tick(self):
         """Executa cada cicle d'adquisició."""
         period = self.spin_period.value()
-        from utils.config import SAMPLE_RATE
-        num_samples = int(SAMPLE_RATE * period)
         
-        success, msg, data = self.daq.read_samples(num_samples)
+        if self.acquisition_process.is_running:
+            # Tots els blocs arribats des del cicle anterior (vistes de la memòria compartida)
+            success, msg, blocks = self.acquisition_process.read_blocks()
+        else:
+            success, msg, data = self.daq.read_samples(int(SAMPLE_RATE * period))
+            blocks = [(self.sample_count, data)]
         if not success:
             QMessageBox.critical(self, 'Error d\'adquisició', msg)
             self.stop_acquisition()
             return
         
-        try:
-            voltage1, voltage2 = self.sensor_manager.process_multi_channel_data(data)
+        for index, data in blocks:
+            if not self.process_block(index * period, data):
+                # Les vistes de la memòria compartida s'alliberen abans de tancar-la
+                del blocks, data
+                self.stop_acquisition()
+                return
+    
+    def process_block(self, elapsed: float, data: np.ndarray) -> bool:
+        """
+        Processa un bloc d'un període de mostres brutes.
+        
+        Args:
+            elapsed: Temps de la primera mostra del bloc (s des de l'inici)
+            data: Array de forma (num_channels, num_samples)
             
-            # Convertir a alçada
-            height1 = self.calibration_manager.voltage_to_height(0, voltage1)
-            height2 = self.calibration_manager.voltage_to_height(1, voltage2)
+        Returns:
+            True si s'ha processat; False si hi ha hagut un error (cal aturar l'adquisició)
+        """
+        # Les mostres brutes també alimenten els valors en directe (p.ex. el calibratge)
+        self.live_values.publish(data)
+        
+        # Les mostres brutes (abans de promitjar) alimenten l'espectre, en un altre fil:
+        # se n'envia una còpia perquè el bloc pot ser una vista de la memòria compartida
+        if self.spectrum_dialog is not None and self.spectrum_dialog.isVisible():
+            self.spectrum_dialog.push_block(np.array(data))
+        
+        try:
+            # Compensació de deriva (si està activada) i mitjana del bloc
+            block = self.sensor_manager.compensate(data, elapsed)
+            voltage1, voltage2 = self.sensor_manager.process_multi_channel_data(block)
+            rejected = self.sensor_manager.last_rejected
+            if rejected.any():
+                self.rejected_totals += rejected
+                self.rejected_blocks += 1
             
-            elapsed = self.sample_count * period
-            self.sample_count += 1
+            # Memòria circular de mostres brutes per a les ràfegues
+            if self.burst_recorder is not None:
+                self.burst_recorder.push(elapsed, data)
             
-            self.time_data.append(elapsed)
+            # Regles d'esdeveniments sobre totes les mostres del bloc
+            if self.event_engine.enabled:
+                self.check_events(elapsed, block)
             
-            # Graficar alçada si està calibrat, sinó voltatge
-            if height1 is not None:
-                self.voltage1_data.append(height1)
-            else:
-                self.voltage1_data.append(voltage1)
+            self.sample_count += 1
             
-            if height2 is not None:
-                self.voltage2_data.append(height2)
+            # Amb període adaptatiu, els cicles quiets s'agrupen en una sola fila
+            if self.adaptive_sampler is not None:
+                rows = self.adaptive_sampler.add(elapsed, (voltage1, voltage2))
             else:
-                self.voltage2_data.append(voltage2)
-            
-            # Desar voltatge + alçada
-            self.file_handler.append_data(elapsed, voltage1, voltage2, height1, height2)
+                rows = [(elapsed, (voltage1, voltage2))]
+            for row_time, (row_voltage1, row_voltage2) in rows:
+                self.store_row(row_time, row_voltage1, row_voltage2)
             
-            if len(self.time_data) % 10 == 0:
-                self.file_handler.flush_to_file()
-            
-            # Actualitzar gràfica només cada PLOT_UPDATE_INTERVAL mostres
-            self.plot_update_counter += 1
-            if self.plot_update_counter >= PLOT_UPDATE_INTERVAL:
-                self.update_plot()
-                self.plot_update_counter = 0
-            
-            # Actualitzar displays cada mostra (és ràpid)
-            self.update_voltage_labels(voltage1, voltage2)
+            # Gràfica i displays es refresquen al ritme del planificador
+            self.latest_values = (voltage1, voltage2)
+            self.display_scheduler.mark_dirty()
             
         except Exception as e:
             QMessageBox.critical(self, 'Error processant dades', str(e))
-            self.stop_acquisition()
+            return False
+        return True
+    
+    def store_row(self, elapsed: float, voltage1: float, voltage2: float):
+        """Converteix a alçada, grafica i desa una fila de la mesura."""
+        # Convertir a alçada
+        height1 = self.calibration_manager.voltage_to_height(0, voltage1)
+        height2 = self.calibration_manager.voltage_to_height(1, voltage2)
+        
+        # Graficar alçada si està calibrat, sinó voltatge
+        value1 = height1 if height1 is not None else voltage1
+        value2 = height2 if height2 is not None else voltage2
+        self.plot_buffer.append(elapsed, value1, value2)
+        self.plot_cache.append(elapsed, value1, value2)
+        
+        # Desar voltatge + alçada
+        self.file_handler.append_data(elapsed, voltage1, voltage2, height1, height2)
+        if self.stream_server is not None:
+            self.stream_server.publish_row(elapsed, voltage1, voltage2, height1, height2)
+        self.stored_rows += 1
+        
+        if self.stored_rows % 10 == 0:
+            self.update_run_metadata()
+            self.file_handler.flush_to_file()
     
     def stop_acquisition(self):
         """Atura l'adquisició de dades."""
         self.acquisition_timer.stop()
+        self.display_scheduler.stop()
+        self.acquisition_process.stop()
         self.daq.stop_acquisition()
         
         # Actualitzar gràfica una última vegada per mostrar totes les dades
-        self.update_plot()
+        self.refresh_display()
         
         # Flush final de dades
+        if self.adaptive_sampler is not None and self.file_handler:
+            row = self.adaptive_sampler.flush()
+            if row is not None:
+                self.store_row(row[0], *row[1])
+        if self.burst_recorder is not None:
+            self.burst_recorder.close()
+        if self.stream_server is not None:
+            self.stream_server.publish_message('stop')
         if self.file_handler:
+            self.update_run_metadata()
             self.file_handler.close()
+            self.register_measurement(self.file_handler.filepath)
             self.file_handler = None
         
         self.daq.cleanup()
@@ -673,28 +1065,289 @@ class MainWindow(QMainWindow):
         
         self.setup_monitoring()
     
+    @staticmethod
+    def create_storage(filepath: str):
+        """Crea el gestor d'emmagatzematge d'un fitxer de mesura."""
+        if OVERVIEW_ENABLED:
+            # Dades completes + resum decimat sincronitzat
+            return MultiRateWriter(filepath)
+        return create_file_handler(filepath)
+    
+    def update_run_metadata(self):
+        """Guarda amb la mesura les correccions de deriva, els esdeveniments i el rebuig fins ara."""
+        compensator = self.sensor_manager.compensator
+        if compensator.enabled:
+            self.file_handler.metadata['drift_compensation'] = compensator.parameters()
+        if self.event_engine.enabled:
+            self.file_handler.metadata['events'] = self.event_engine.events
+        if self.burst_recorder is not None:
+            self.file_handler.metadata['bursts'] = self.burst_recorder.bursts
+        if ACQUISITION_PROCESS_ENABLED:
+            # Blocs sobreescrits a la memòria compartida abans que la interfície els llegís
+            self.file_handler.metadata['lost_blocks'] = self.acquisition_process.lost_blocks
+        if self.sensor_manager.aggregator != 'mean':
+            self.file_handler.metadata['block_aggregator'] = {
+                'method': self.sensor_manager.aggregator,
+                'rejected_samples': self.rejected_totals.tolist(),
+                'blocks_with_rejections': self.rejected_blocks
+            }
+    
+    def check_events(self, t0: float, block):
+        """Avalua les regles d'esdeveniments sobre un bloc i avisa dels nous."""
+        heights = None
+        if self.event_engine.needs_heights and self.calibration_manager.are_all_calibrated():
+            heights = np.vstack([
+                self.calibration_manager.voltages_to_heights(sensor_id, block[sensor_id])
+                for sensor_id in range(block.shape[0])
+            ])
+        events = self.event_engine.process(t0, block, heights)
+        if not events:
+            return
+        if self.stream_server is not None:
+            self.stream_server.publish_events(events)
+        if self.burst_recorder is not None:
+            for event in events:
+                if event['kind'] == 'start' and (BURST_TRIGGER_RULES is None
+                                                 or event['rule'] in BURST_TRIGGER_RULES):
+                    self.burst_recorder.trigger(event['time'], event['rule'])
+        self.show_event_alert(events)
+    
+    def show_event_alert(self, events):
+        """Mostra els esdeveniments en un avís no modal (l'adquisició continua)."""
+        lines = [
+            f"{event['time']:.3f} s · {event['rule']}: "
+            f"{'inici' if event['kind'] == 'start' else 'final'} ({event['value']:.3f})"
+            for event in events
+        ]
+        if self.event_alert is None:
+            self.event_alert = QMessageBox(QMessageBox.Icon.Warning, 'Esdeveniment detectat', '', 
+                                           QMessageBox.StandardButton.Ok, self)
+            self.event_alert.setModal(False)
+            self.event_alert_lines = []
+        # Es mostren els més recents (l'avís no es multiplica si n'arriben molts)
+        self.event_alert_lines = (self.event_alert_lines + lines)[-10:]
+        self.event_alert.setText('\n'.join(self.event_alert_lines))
+        self.event_alert.show()
+        
+        self.label_status.setText(f'Esdeveniment: {lines[-1]}')
+        self.label_status.setStyleSheet('QLabel { font-weight: bold; color: #f44336; font-size: 11px; }')
+    
+    def on_zero_check_clicked(self):
+        """Registra una comprovació de zero per a la compensació de deriva."""
+        try:
+            drift = self.sensor_manager.compensator.zero_check()
+        except ValueError as e:
+            QMessageBox.warning(self, 'Comprovació de zero', str(e))
+            return
+        self.label_status.setText(
+            f'Zero registrat (deriva: {drift[0]:+.4f} V, {drift[1]:+.4f} V)'
+        )
+        self.label_status.setStyleSheet('QLabel { font-weight: bold; color: #4CAF50; font-size: 11px; }')
+    
+    def get_calibration_snapshot(self) -> dict:
+        """Retorna el calibratge actual de tots els sensors."""
+        return {
+            str(sensor_id): cal.to_dict()
+            for sensor_id, cal in self.calibration_manager.calibrations.items()
+        }
+    
+    def register_measurement(self, filepath: str):
+        """Afegeix la mesura acabada al catàleg (a partir de les metadades del fitxer)."""
+        try:
+            self.catalog.index_file(filepath)
+        except Exception as e:
+            print(f"Error afegint la mesura al catàleg: {e}")
+    
     def update_ui_for_acquisition(self, acquiring: bool):
         """Actualitza l'estat dels controls segons si s'està adquirint."""
         self.btn_start.setEnabled(not acquiring)
         self.btn_stop.setEnabled(acquiring)
         self.spin_period.setEnabled(not acquiring)
+        self.check_adaptive.setEnabled(not acquiring)
         self.edit_filename.setEnabled(not acquiring)
+        self.btn_zero_check.setEnabled(acquiring)
     
     def clear_plot(self):
         """Neteja la gràfica."""
-        self.time_data.clear()
-        self.voltage1_data.clear()
-        self.voltage2_data.clear()
-        self.plot_line1.setData([], [])
-        self.plot_line2.setData([], [])
+        self.plot_buffer.clear()
+        self.plotted_count = 0
+        self.plot_line1.clear()
+        self.plot_line2.clear()
+        self.plot_cache.clear()
+        self.overview_line1.setData([], [])
+        self.overview_line2.setData([], [])
+        self.following_live = True
+        self.plot_widget.enableAutoRange()
+        self.history_scrollbar.blockSignals(True)
+        self.history_scrollbar.setRange(0, 0)
+        self.history_scrollbar.blockSignals(False)
         
         self.label_voltage1.setText('--- V\n-- cm')
         self.label_voltage2.setText('--- V\n-- cm')
     
+    def refresh_display(self):
+        """Redibuixa la gràfica i els displays amb les últimes dades."""
+        self.update_plot()
+        self.update_overview_plot()
+        if self.latest_values is not None:
+            self.update_voltage_labels(*self.latest_values)
+            if not self.label_rejected.isHidden():
+                rejected = self.sensor_manager.last_rejected
+                self.label_rejected.setText(f'Rebutjades: {rejected[0]} / {rejected[1]}')
+    
     def update_plot(self):
         """Actualitza la gràfica amb les dades actuals."""
-        self.plot_line1.setData(self.time_data, self.voltage1_data)
-        self.plot_line2.setData(self.time_data, self.voltage2_data)
+        window_start = None
+        if self.is_live_window() and len(self.plot_buffer) > 0:
+            # En mode finestra mòbil la memòria no creix amb la durada de la mesura
+            latest = self.plot_buffer.x[-1]
+            window_start = latest - LIVE_WINDOW_SPAN
+            discarded = self.plot_buffer.discard_before(window_start)
+            self.plotted_count = max(0, self.plotted_count - discarded)
+            self.update_history_scrollbar(latest)
+        
+        if not self.following_live:
+            # S'està mostrant l'historial: les dades noves es veuran en tornar al directe
+            return
+        
+        if window_start is not None:
+            self.plot_line1.trim_before(window_start)
+            self.plot_line2.trim_before(window_start)
+            self.plot_widget.setXRange(window_start, window_start + LIVE_WINDOW_SPAN, padding=0)
+        
+        # Només s'envien a les corbes les mostres arribades des de l'últim refresc
+        new = slice(self.plotted_count, len(self.plot_buffer))
+        if new.start == new.stop:
+            return
+        x = self.plot_buffer.x[new]
+        self.plot_line1.append(x, self.plot_buffer.y(0)[new])
+        self.plot_line2.append(x, self.plot_buffer.y(1)[new])
+        self.plotted_count = new.stop
+    
+    def is_live_window(self) -> bool:
+        """Indica si la gràfica mostra una finestra mòbil de la mesura en curs."""
+        return self.is_acquiring and self.check_live_window.isChecked()
+    
+    def update_history_scrollbar(self, latest: float):
+        """Amplia la barra d'historial fins al temps actual (i la segueix si és en directe)."""
+        maximum = max(0, int(latest - LIVE_WINDOW_SPAN))
+        if maximum == self.history_scrollbar.maximum():
+            return
+        self.history_scrollbar.blockSignals(True)
+        self.history_scrollbar.setRange(0, maximum)
+        self.history_scrollbar.setPageStep(int(LIVE_WINDOW_SPAN))
+        if self.following_live:
+            self.history_scrollbar.setValue(maximum)
+        self.history_scrollbar.blockSignals(False)
+    
+    def on_live_window_toggled(self, checked: bool):
+        """Activa o desactiva la finestra mòbil."""
+        self.history_scrollbar.setVisible(checked)
+        if not checked:
+            self.return_to_live()
+            self.plot_widget.enableAutoRange()
+    
+    def on_history_scrolled(self, value: int):
+        """Mostra la part de l'historial seleccionada amb la barra."""
+        if value >= self.history_scrollbar.maximum():
+            self.return_to_live()
+        else:
+            self.show_range(float(value), float(value) + LIVE_WINDOW_SPAN)
+    
+    def update_overview_plot(self):
+        """Redibuixa la vista general de tota la mesura a baixa resolució."""
+        time_range = self.plot_cache.time_range()
+        if time_range is None:
+            return
+        x, values = self.plot_cache.query(*time_range, PLOT_OVERVIEW_POINTS)
+        self.overview_line1.setData(x, values[0])
+        self.overview_line2.setData(x, values[1])
+    
+    def show_whole_measurement(self):
+        """Mostra tota la mesura carregada (amb la resolució que cap a la gràfica)."""
+        self.update_overview_plot()
+        time_range = self.plot_cache.time_range()
+        if time_range is not None:
+            self.show_range(*time_range)
+    
+    def show_range(self, t_from: float, t_to: float):
+        """Mostra un interval a la gràfica de detall amb només els punts visibles."""
+        raw_start = self.plot_cache.raw_start()
+        if (self.history_path and raw_start is not None and raw_start > t_from
+                and self.plot_cache.select_level(t_from, t_to, PLOT_DETAIL_MAX_POINTS) == 0):
+            # Les mostres originals d'aquest interval ja no són en memòria
+            self.show_history(t_from, t_to)
+            return
+        
+        self.following_live = False
+        x, values = self.plot_cache.query(t_from, t_to, PLOT_DETAIL_MAX_POINTS)
+        self.plot_line1.setData(x, values[0])
+        self.plot_line2.setData(x, values[1])
+        self.set_detail_range(t_from, t_to)
+    
+    def set_detail_range(self, t_from: float, t_to: float):
+        """Fixa l'interval de la gràfica de detall i de la regió sense reaccionar-hi."""
+        self.syncing_range = True
+        self.plot_widget.setXRange(t_from, t_to, padding=0)
+        self.region.setRegion((t_from, t_to))
+        self.syncing_range = False
+    
+    def on_region_changed(self):
+        """La regió de la vista general s'ha mogut: mostrar-la al detall."""
+        if self.syncing_range:
+            return
+        t_from, t_to = self.region.getRegion()
+        time_range = self.plot_cache.time_range()
+        if self.is_acquiring and time_range is not None and t_to >= time_range[1]:
+            # Regió enganxada al final: seguir les dades en directe
+            self.return_to_live()
+            return
+        self.show_range(t_from, t_to)
+    
+    def on_detail_range_changed(self, _, x_range):
+        """La gràfica de detall s'ha desplaçat o ampliat: actualitzar la regió i les dades."""
+        if self.syncing_range:
+            return
+        if self.following_live:
+            self.syncing_range = True
+            self.region.setRegion(x_range)
+            self.syncing_range = False
+        else:
+            # Navegant: tornar a demanar a la memòria cau només l'interval visible
+            self.show_range(*x_range)
+    
+    def show_history(self, t_from: float, t_to: float):
+        """Carrega del disc i mostra un interval antic de la mesura en curs."""
+        if not self.history_path:
+            return
+        try:
+            df = FileHandler.load_time_range(self.history_path, t_from, t_to)
+        except Exception as e:
+            print(f"Error carregant l'historial: {e}")
+            return
+        
+        # Limitar els punts dibuixats si l'interval és molt dens
+        step = max(1, -(-len(df) // PLOT_MAX_LOAD_POINTS))
+        df = df.iloc[::step]
+        series1, series2 = self.select_plot_series(df)
+        
+        self.following_live = False
+        time = df['time_seconds'].to_numpy()
+        self.plot_line1.setData(time, series1.to_numpy())
+        self.plot_line2.setData(time, series2.to_numpy())
+        self.set_detail_range(t_from, t_to)
+    
+    def return_to_live(self):
+        """Torna a mostrar les dades en directe del buffer en memòria."""
+        if self.following_live:
+            return
+        self.following_live = True
+        self.plotted_count = 0
+        self.plot_line1.clear()
+        self.plot_line2.clear()
+        if not self.is_live_window():
+            self.plot_widget.enableAutoRange()
+        self.update_plot()
     
     def update_voltage_labels(self, voltage1: float, voltage2: float):
         """Actualitza els labels amb voltatge i alçada."""
@@ -714,8 +1367,6 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event):
         """Gestiona el tancament de la finestra."""
-        self.monitor_timer.stop()
-        
         if self.is_acquiring:
             reply = QMessageBox.question(
                 self,
@@ -731,5 +1382,19 @@ class MainWindow(QMainWindow):
             else:
                 event.ignore()
         else:
-            self.daq.cleanup()
             event.accept()
+        
+        if event.isAccepted():
+            # Si es cancel·la el tancament, els valors en directe han de continuar
+            self.monitor_timer.stop()
+            # Aturar el fil de monitorització abans d'alliberar el hardware
+            self.monitor.stop(timeout=None)
+            self.acquisition_process.stop()
+            if self.stream_server is not None:
+                self.stream_server.stop()
+            if self.control_server is not None:
+                self.control_server.stop()
+            self.daq.cleanup()
+            self.catalog.close()
+            if self.spectrum_dialog is not None:
+                self.spectrum_dialog.shutdown()
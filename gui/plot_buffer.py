@@ -0,0 +1,108 @@
+"""
+Buffers persistents per a les dades de la gràfica
+Els arrays es reserven per endavant i creixen per duplicació, de manera que
+afegir mostres no crea llistes noves ni converteix tota la sèrie a cada refresc.
+Les mostres antigues es poden descartar (finestra mòbil) sense moure les dades:
+només es compacten quan cal espai.
+"""
+import numpy as np
+
+
+class PlotBuffer:
+    """Sèrie temporal amb diverses corbes emmagatzemada en arrays numpy que creixen."""
+
+    def __init__(self, num_series: int, capacity: int = 4096):
+        """
+        Inicialitza el buffer.
+
+        Args:
+            num_series: Nombre de corbes (a més de l'eix de temps)
+            capacity: Capacitat inicial en mostres
+        """
+        self.num_series = num_series
+        self._x = np.empty(capacity, dtype=np.float64)
+        self._y = np.empty((num_series, capacity), dtype=np.float64)
+        self.start = 0  # Primera mostra vàlida (les anteriors s'han descartat)
+        self.size = 0   # Final de les mostres vàlides
+
+    def __len__(self) -> int:
+        return self.size - self.start
+
+    @property
+    def x(self) -> np.ndarray:
+        """Vista (sense còpia) dels temps guardats."""
+        return self._x[self.start:self.size]
+
+    def y(self, index: int) -> np.ndarray:
+        """Vista (sense còpia) dels valors guardats d'una corba."""
+        return self._y[index, self.start:self.size]
+
+    def append(self, x: float, *values: float):
+        """
+        Afegeix una mostra.
+
+        Args:
+            x: Temps de la mostra
+            values: Un valor per cada corba
+        """
+        self._reserve(1)
+        self._x[self.size] = x
+        self._y[:, self.size] = values
+        self.size += 1
+
+    def extend(self, x, *series):
+        """
+        Afegeix un bloc de mostres.
+
+        Args:
+            x: Temps de les mostres
+            series: Un array de valors per cada corba
+        """
+        x = np.asarray(x, dtype=np.float64)
+        count = len(x)
+        self._reserve(count)
+        self._x[self.size:self.size + count] = x
+        for index, values in enumerate(series):
+            self._y[index, self.size:self.size + count] = values
+        self.size += count
+
+    def discard_before(self, x: float) -> int:
+        """
+        Descarta les mostres anteriors a un temps.
+
+        Args:
+            x: Temps a partir del qual cal conservar les mostres
+
+        Returns:
+            Nombre de mostres descartades
+        """
+        index = self.start + int(np.searchsorted(self.x, x, side='left'))
+        discarded = index - self.start
+        self.start = index
+        return discarded
+
+    def clear(self):
+        """Buida el buffer (conserva la memòria reservada)."""
+        self.start = 0
+        self.size = 0
+
+    def _reserve(self, count: int):
+        """Garanteix espai per a count mostres més (compactant o duplicant la capacitat)."""
+        capacity = len(self._x)
+        if self.size + count <= capacity:
+            return
+        length = len(self)
+        if length + count <= capacity // 2:
+            # Prou espai si es mouen les mostres vàlides al principi
+            self._x[:length] = self._x[self.start:self.size]
+            self._y[:, :length] = self._y[:, self.start:self.size]
+        else:
+            while capacity < length + count:
+                capacity *= 2
+            x = np.empty(capacity, dtype=np.float64)
+            x[:length] = self._x[self.start:self.size]
+            y = np.empty((self.num_series, capacity), dtype=np.float64)
+            y[:, :length] = self._y[:, self.start:self.size]
+            self._x, self._y = x, y
+        self.start = 0
+        self.size = length
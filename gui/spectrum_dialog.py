@@ -0,0 +1,126 @@
+"""
+Finestra de l'espectre en directe dels sensors
+El càlcul de l'espectre es fa en un fil de treball: la finestra principal només
+li envia els blocs de mostres brutes i rep l'espectre ja calculat.
+"""
+import time
+
+import numpy as np
+import pyqtgraph as pg
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
+from PySide6.QtCore import QObject, QThread, Signal, Slot
+
+from data.spectrum import WelchEstimator
+from utils.config import (
+    SAMPLE_RATE, PLOT_COLORS, AI_CHANNEL_NAMES,
+    SPECTRUM_UPDATE_INTERVAL, SPECTRUM_MAX_FREQUENCY
+)
+
+
+class SpectrumWorker(QObject):
+    """Calcula l'espectre dels blocs rebuts (viu en un fil separat)."""
+
+    spectrum_ready = Signal(object, object, object)  # freqüències, densitat, pics
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.estimator = WelchEstimator(sample_rate)
+        self.last_emit = 0.0
+
+    @Slot(object)
+    def process_block(self, block):
+        """Afegeix un bloc i publica l'espectre com a molt cada SPECTRUM_UPDATE_INTERVAL."""
+        if self.estimator.push(block) == 0:
+            return
+        now = time.monotonic()
+        if now - self.last_emit < SPECTRUM_UPDATE_INTERVAL:
+            return
+        self.last_emit = now
+        frequencies, density = self.estimator.psd()
+        self.spectrum_ready.emit(frequencies, density.copy(),
+                                 self.estimator.dominant_frequencies())
+
+    @Slot()
+    def reset(self):
+        """Comença un espectre nou (p.ex. en iniciar una mesura)."""
+        self.estimator.reset()
+        self.last_emit = 0.0
+
+
+class SpectrumDialog(QDialog):
+    """Finestra no modal amb la densitat espectral de potència de cada sensor."""
+
+    block_available = Signal(object)
+    reset_requested = Signal()
+
+    def __init__(self, parent=None, sample_rate: float = SAMPLE_RATE):
+        super().__init__(parent)
+        self.setWindowTitle("Espectre en directe")
+        self.setMinimumSize(700, 400)
+
+        self.setup_ui()
+
+        # El càlcul es fa fora del fil de la interfície (senyals en cua entre fils)
+        self.worker_thread = QThread(self)
+        self.worker = SpectrumWorker(sample_rate)
+        self.worker.moveToThread(self.worker_thread)
+        self.block_available.connect(self.worker.process_block)
+        self.reset_requested.connect(self.worker.reset)
+        self.worker.spectrum_ready.connect(self.on_spectrum_ready)
+        self.worker_thread.start()
+
+    def setup_ui(self):
+        """Configura la interfície del diàleg."""
+        layout = QVBoxLayout(self)
+
+        self.plot_widget = pg.PlotWidget()
+        self.plot_widget.setBackground('w')
+        self.plot_widget.setLabel('bottom', 'Freqüència', units='Hz')
+        self.plot_widget.setLabel('left', 'Densitat espectral (V²/Hz)')
+        self.plot_widget.getAxis('left').enableAutoSIPrefix(False)
+        self.plot_widget.setLogMode(x=False, y=True)
+        self.plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        self.plot_widget.setXRange(0, SPECTRUM_MAX_FREQUENCY, padding=0)
+        self.plot_widget.addLegend()
+        self.curves = [
+            self.plot_widget.plot(pen=pg.mkPen(color=PLOT_COLORS[i], width=2),
+                                  name=AI_CHANNEL_NAMES[i])
+            for i in range(len(AI_CHANNEL_NAMES))
+        ]
+        layout.addWidget(self.plot_widget)
+
+        bottom_layout = QHBoxLayout()
+        self.label_peaks = QLabel("Esperant dades de l'adquisició...")
+        bottom_layout.addWidget(self.label_peaks)
+        bottom_layout.addStretch()
+
+        self.btn_close = QPushButton("Tanca")
+        self.btn_close.clicked.connect(self.close)
+        bottom_layout.addWidget(self.btn_close)
+        layout.addLayout(bottom_layout)
+
+    def push_block(self, block: np.ndarray):
+        """Envia un bloc de mostres brutes (canals, mostres) al fil de càlcul."""
+        self.block_available.emit(block)
+
+    def reset(self):
+        """Esborra l'espectre acumulat."""
+        self.reset_requested.emit()
+        for curve in self.curves:
+            curve.setData([], [])
+        self.label_peaks.setText("Esperant dades de l'adquisició...")
+
+    @Slot(object, object, object)
+    def on_spectrum_ready(self, frequencies, density, peaks):
+        """Mostra l'espectre calculat (s'executa al fil de la interfície)."""
+        # Sense la component contínua, que no es pot representar en escala logarítmica
+        for curve, values in zip(self.curves, density):
+            curve.setData(frequencies[1:], values[1:])
+        self.label_peaks.setText(" · ".join(
+            f"{name}: pic a {peak:.2f} Hz" for name, peak in zip(AI_CHANNEL_NAMES, peaks)
+        ))
+
+    def shutdown(self):
+        """Atura el fil de càlcul."""
+        self.worker_thread.quit()
+        self.worker_thread.wait()
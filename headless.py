@@ -0,0 +1,186 @@
+"""
+Sistema d'Adquisició de Nivell d'Aigua - SERVEI SENSE INTERFÍCIE
+Universitat de Girona - Departament de Física
+
+Executa una mesura amb el motor asíncron (daq.engine), sense Qt: lectura,
+processament, emmagatzematge, difusió en directe i avisos d'esdeveniments com
+a tasques concurrents. Útil per a equips sense pantalla i campanyes llargues.
+
+Ús:
+    python headless.py --filename mesura.xlsx --period 0.1 --duration 3600
+    python headless.py --simulation --filename prova.xlsx --duration 10 --stream
+
+Author: JCM Technologies, SAU
+Date: 2026
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+from datetime import datetime
+
+
+def parse_args():
+    """Llegeix les opcions de la línia d'ordres."""
+    parser = argparse.ArgumentParser(description="Adquisició de nivell d'aigua sense interfície")
+    parser.add_argument('--filename', required=True, help="Fitxer dins del directori de mesures")
+    parser.add_argument('--period', type=float, default=None, help="Període de mostreig (s)")
+    parser.add_argument('--duration', type=float, default=None,
+                        help="Durada de la mesura (s); sense durada, fins a Ctrl+C")
+    parser.add_argument('--overwrite', action='store_true', help="Sobreescriure el fitxer si existeix")
+    parser.add_argument('--simulation', action='store_true', help="Dades sintètiques, sense hardware")
+    parser.add_argument('--stream', action='store_true', help="Difondre les dades (data.streaming)")
+    parser.add_argument('--control', action='store_true', help="API de control local (utils.control_server)")
+    return parser.parse_args()
+
+
+def create_storage(filepath: str):
+    """Crea el gestor d'emmagatzematge com MainWindow.create_storage (i segments si cal)."""
+    from data.file_handler import create_file_handler
+    from data.multirate import MultiRateWriter
+    from data.segments import SegmentedFileHandler
+    from utils.config import OVERVIEW_ENABLED, SEGMENT_ROTATION_ENABLED
+
+    def factory(path):
+        return MultiRateWriter(path) if OVERVIEW_ENABLED else create_file_handler(path)
+
+    if SEGMENT_ROTATION_ENABLED:
+        return SegmentedFileHandler(filepath, handler_factory=factory)
+    return factory(filepath)
+
+
+def print_event(event: dict):
+    """Sortida d'avisos: un esdeveniment per línia a la consola."""
+    print(f"[{event['time']:.3f} s] {event['rule']}: {event['kind']} "
+          f"(canal {event['channel'] + 1}, {event['value']:.3f})")
+
+
+async def run(args) -> int:
+    """Prepara el motor i les sortides, executa la mesura i la registra al catàleg."""
+    from daq.engine import AcquisitionEngine, storage_output, stream_output, alert_output
+    from data.catalog import MeasurementCatalog
+    from data.segments import manifest_path
+    from data.streaming import StreamServer
+    from utils.calibration import CalibrationManager
+    from utils.control_server import ControlServer
+    from utils.config import (
+        MESURES_DIR, CATALOG_FILENAME, DEFAULT_SAMPLING_PERIOD, SEGMENT_ROTATION_ENABLED
+    )
+    from utils.validators import validate_sampling_period, validate_filename, check_file_exists
+
+    period = args.period if args.period is not None else DEFAULT_SAMPLING_PERIOD
+    for valid, msg in (validate_sampling_period(period), validate_filename(args.filename)):
+        if not valid:
+            print(f"Error: {msg}")
+            return 2
+    os.makedirs(MESURES_DIR, exist_ok=True)
+    filepath = os.path.join(MESURES_DIR, args.filename)
+    existing_path = manifest_path(filepath) if SEGMENT_ROTATION_ENABLED else filepath
+    if check_file_exists(existing_path) and not args.overwrite:
+        print(f'Error: El fitxer "{args.filename}" ja existeix (useu --overwrite)')
+        return 2
+
+    calibration_manager = CalibrationManager()
+    engine = AcquisitionEngine(period=period, calibration_manager=calibration_manager)
+
+    file_handler = create_storage(filepath)
+    file_handler.metadata.update({
+        'start_time': datetime.now().isoformat(timespec='seconds'),
+        'period': period,
+        'calibration': {str(sensor_id): cal.to_dict()
+                        for sensor_id, cal in calibration_manager.calibrations.items()},
+        'calibration_version': calibration_manager.version
+    })
+    try:
+        file_handler.create_file()
+    except Exception as e:
+        print(f"Error creant fitxer: {str(e)}")
+        return 1
+    handler, close = storage_output(file_handler, metadata=engine.run_metadata)
+    engine.add_output('storage', handler, close=close, lossless=True)
+    engine.add_output('alerts', alert_output(print_event))
+
+    stream_server = None
+    if args.stream:
+        stream_server = StreamServer()
+        success, msg = stream_server.start()
+        if success:
+            engine.add_output('stream', stream_output(stream_server))
+            stream_server.publish_message('start', filename=os.path.basename(file_handler.filepath),
+                                          period=period)
+            print(f"Difusió de dades a {stream_server.host}:{stream_server.port}")
+        else:
+            print(msg)
+            stream_server = None
+
+    loop = asyncio.get_running_loop()
+    control_server = None
+    if args.control:
+        control_server = ControlServer(lambda command, params, timeout: asyncio.run_coroutine_threadsafe(
+            control_command(engine, file_handler.filepath, command), loop).result(timeout))
+        success, msg = control_server.start()
+        if success:
+            print(f"API de control a http://{control_server.host}:{control_server.port}")
+        else:
+            print(msg)
+            control_server = None
+
+    # Ctrl+C / aturada del servei: final ordenat (es buiden les cues i es tanca el fitxer)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, engine.stop)
+        except (NotImplementedError, RuntimeError):
+            signal.signal(signum, lambda *_: engine.stop())  # Windows
+
+    print(f"Mesura a {file_handler.filepath} (període {period} s). Ctrl+C per aturar.")
+    try:
+        success, msg = await engine.run(args.duration)
+    finally:
+        if control_server is not None:
+            control_server.stop()
+        if stream_server is not None:
+            stream_server.publish_message('stop')
+            stream_server.stop()
+
+    if success or engine.blocks:
+        try:
+            MeasurementCatalog(os.path.join(MESURES_DIR, CATALOG_FILENAME)).index_file(file_handler.filepath)
+        except Exception as e:
+            print(f"Error afegint la mesura al catàleg: {e}")
+    print(f"Blocs: {engine.blocks}, perduts: {engine.lost_blocks}, "
+          f"descartats per sortida: {engine.metrics()['dropped']}")
+    if not success:
+        print(f"Error: {msg}")
+        return 1
+    return 0
+
+
+async def control_command(engine, filepath: str, command: str) -> dict:
+    """Atén una ordre de l'API de control (al bucle del motor)."""
+    if command == 'status':
+        return {'acquiring': engine.is_running, 'filename': os.path.basename(filepath),
+                'period': engine.period, 'elapsed': engine.blocks * engine.period}
+    if command == 'metrics':
+        return engine.metrics()
+    if command == 'stop':
+        if not engine.is_running:
+            return {'success': False, 'message': "No hi ha cap adquisició en curs"}
+        engine.stop()
+        return {'success': True, 'message': ""}
+    # El servei executa la mesura de la línia d'ordres; no en pot començar d'altres
+    return {'success': False, 'message': "El servei sense interfície no accepta l'ordre 'start'"}
+
+
+def main():
+    """Punt d'entrada del servei."""
+    args = parse_args()
+    if args.simulation:
+        # IMPORTANT: Activar mode simulació ABANS d'importar els mòduls del DAQ
+        from simulation import enable_simulation
+        enable_simulation()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == '__main__':
+    main()
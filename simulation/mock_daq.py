@@ -2,6 +2,7 @@
 Simulador de NI-DAQmx per testejar sense hardware real
 Genera dades sintètiques realistes
 """
+import os
 import numpy as np
 import time
 from typing import Optional, Tuple
@@ -10,11 +11,11 @@ from typing import Optional, Tuple
 class MockTask:
     """Simula una tasca DAQmx."""
     
-    def __init__(self, task_type='analog_input'):
+    def __init__(self, task_type='analog_input', sample_rate=1000):
         self.task_type = task_type
         self.is_started = False
         self.num_channels = 2
-        self.sample_rate = 1000
+        self.sample_rate = sample_rate
         self.samples_generated = 0
         
         # Paràmetres per generar dades sintètiques realistes
@@ -27,6 +28,7 @@ class MockTask:
         """Inicia la tasca."""
         self.is_started = True
         self.start_time = time.time()
+        self.samples_generated = 0
         
     def stop(self):
         """Atura la tasca."""
@@ -47,6 +49,16 @@ class MockTask:
         if not self.is_started:
             raise RuntimeError("Task not started")
         
+        # READ_ALL_AVAILABLE: les mostres que el rellotge hauria generat des de l'última lectura
+        if number_of_samples_per_channel == MockConstants.READ_ALL_AVAILABLE:
+            elapsed_samples = int((time.time() - self.start_time) * self.sample_rate)
+            number_of_samples_per_channel = max(0, elapsed_samples - self.samples_generated)
+        elif PACED_READS:
+            # Com el hardware, la lectura espera que el rellotge hagi generat les mostres
+            due = self.start_time + (self.samples_generated + number_of_samples_per_channel) / self.sample_rate
+            if due > time.time():
+                time.sleep(due - time.time())
+        
         # Generar temps per les mostres
         current_time = time.time() - self.start_time
         time_array = np.linspace(
@@ -107,9 +119,12 @@ class MockDOChannels:
 class MockTiming:
     """Simula la configuració de timing."""
     
+    def __init__(self):
+        self.rate = 1000
+    
     def cfg_samp_clk_timing(self, rate, sample_mode=None, samps_per_chan=1000):
         """Simula configuració del rellotge de mostreig."""
-        pass
+        self.rate = rate
 
 
 class MockDAQTask:
@@ -123,7 +138,8 @@ class MockDAQTask:
         
     def start(self):
         if self._task is None:
-            self._task = MockTask()
+            self._task = MockTask(sample_rate=self.timing.rate)
+        self._task.sample_rate = self.timing.rate  # El timing es pot reconfigurar
         self._task.start()
         
     def stop(self):
@@ -182,6 +198,7 @@ class MockConstants:
     TerminalConfiguration = MockTerminalConfiguration
     AcquisitionType = MockAcquisitionType
     WAIT_INFINITELY = -1
+    READ_ALL_AVAILABLE = -1
 
 
 # Classe Task que simula nidaqmx.Task
@@ -209,13 +226,28 @@ def get_mock_nidaqmx():
 
 
 # Variable global per activar/desactivar mode simulació
-SIMULATION_MODE = False
+# (els processos fills, p.ex. l'adquisició en procés separat, l'hereten per l'entorn)
+SIMULATION_ENV_VAR = "MESURADOR_SIMULATION"
+SIMULATION_MODE = os.environ.get(SIMULATION_ENV_VAR) == "1"
+
+
+# Lectures amb el ritme del hardware (bloquegen fins que el rellotge simulat ha
+# generat les mostres). Només per als lectors amb un fil propi (procés d'adquisició,
+# motor asíncron): al fil de la interfície la lectura ha de tornar de seguida
+PACED_READS = False
+
+
+def enable_paced_reads():
+    """Fa que les lectures amb un nombre de mostres esperin com el hardware real."""
+    global PACED_READS
+    PACED_READS = True
 
 
 def enable_simulation():
     """Activa el mode simulació."""
     global SIMULATION_MODE
     SIMULATION_MODE = True
+    os.environ[SIMULATION_ENV_VAR] = "1"
     print("🎭 MODE SIMULACIÓ ACTIVAT")
     print("   - No es necessita hardware real")
     print("   - Les dades són sintètiques")
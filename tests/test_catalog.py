@@ -0,0 +1,125 @@
+"""
+Proves del catàleg de mesures: indexació, resincronització i migració de l'esquema
+"""
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from data.catalog import MeasurementCatalog
+from data.file_handler import FileHandler
+
+
+def write_measurement(filepath: str, rows: int, **metadata) -> FileHandler:
+    """Escriu una mesura amb FileHandler (una fila cada 0.5 s)."""
+    handler = FileHandler(filepath)
+    handler.metadata.update(metadata)
+    handler.create_file()
+    for i in range(rows):
+        handler.append_data(i * 0.5, 1.0 + i, 2.0)
+    handler.close()
+    return handler
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = MeasurementCatalog(str(tmp_path / "cataleg.db"))
+    yield catalog
+    catalog.close()
+
+
+def test_sync_indexes_measurements_from_their_metadata(tmp_path, catalog):
+    directory = tmp_path / "Mesures"
+    directory.mkdir()
+    write_measurement(str(directory / "assaig.xlsx"), 5, start_time="2026-03-01T10:00:00",
+                      period=0.5, calibration_version=4)
+    write_measurement(str(directory / "mesura_20260302_090000.xlsx"), 3)
+    # Fitxers derivats d'una mesura: no s'indexen per separat
+    for name in ("assaig_resum.xlsx", "llarga_seg0001.xlsx", "assaig_rafaga_001.xlsx"):
+        write_measurement(str(directory / name), 2)
+
+    assert catalog.sync_directory(str(directory)) == 2
+    # Les més recents primer
+    assert [entry['filename'] for entry in catalog.search()] == \
+        ["mesura_20260302_090000.xlsx", "assaig.xlsx"]
+
+    entry = catalog.get(str(directory / "assaig.xlsx"))
+    assert entry['start_time'] == "2026-03-01T10:00:00"
+    assert entry['sample_count'] == 5
+    assert entry['duration'] == 2.0
+    assert entry['period'] == 0.5
+    assert entry['calibration_version'] == "4"
+    assert entry['stats']['voltage_sensor1']['mean'] == pytest.approx(3.0)
+    assert 'height_sensor1' not in entry['stats']  # Columnes sense valors
+
+    # Sense start_time a les metadades, l'inici es dedueix del nom del fitxer
+    entry = catalog.get(str(directory / "mesura_20260302_090000.xlsx"))
+    assert entry['start_time'] == "2026-03-02T09:00:00"
+    assert entry['period'] == 0.5
+
+
+def test_sync_only_reindexes_changed_files(tmp_path, catalog):
+    directory = tmp_path / "Mesures"
+    directory.mkdir()
+    first = str(directory / "a.xlsx")
+    write_measurement(first, 4, start_time="2026-03-01T10:00:00")
+    write_measurement(str(directory / "b.xlsx"), 2, start_time="2026-03-01T11:00:00")
+    assert catalog.sync_directory(str(directory)) == 2
+    assert catalog.sync_directory(str(directory)) == 0
+
+    write_measurement(first, 10, start_time="2026-03-01T10:00:00")
+    assert catalog.sync_directory(str(directory)) == 1
+    assert catalog.get(first)['sample_count'] == 10
+
+    (directory / "b.xlsx").unlink()
+    assert catalog.sync_directory(str(directory)) == 0
+    assert [entry['filename'] for entry in catalog.search()] == ["a.xlsx"]
+
+
+def test_files_without_metadata_are_read_in_full(tmp_path, catalog):
+    filepath = str(tmp_path / "antic.xlsx")
+    pd.DataFrame({'time_seconds': [0.0, 1.0, 2.0], 'voltage_sensor1': [1.0, 2.0, 3.0],
+                  'voltage_sensor2': [0.0, 0.0, 0.0]}).to_excel(filepath, index=False)
+    assert FileHandler.load_metadata(filepath) is None
+    assert catalog.index_file(filepath, start_time=datetime(2025, 1, 1))
+    entry = catalog.get(filepath)
+    assert (entry['sample_count'], entry['duration'], entry['period']) == (3, 2.0, 1.0)
+    assert entry['stats']['voltage_sensor1']['mean'] == pytest.approx(2.0)
+
+
+def test_old_schema_is_migrated(tmp_path):
+    db_path = str(tmp_path / "cataleg.db")
+    # Esquema anterior a calibration_version
+    connection = sqlite3.connect(db_path)
+    connection.execute("""
+        CREATE TABLE measurements (
+            filepath TEXT PRIMARY KEY, filename TEXT NOT NULL, start_time TEXT,
+            duration REAL, sample_count INTEGER, period REAL, calibration TEXT,
+            stats TEXT, file_mtime REAL, file_size INTEGER, indexed_at TEXT
+        )
+    """)
+    connection.execute(
+        "INSERT INTO measurements (filepath, filename, start_time, duration, sample_count) "
+        "VALUES (?, ?, ?, ?, ?)", (str(tmp_path / "vella.xlsx"), "vella.xlsx",
+                                   "2024-05-01T08:00:00", 60.0, 600)
+    )
+    connection.commit()
+    connection.close()
+
+    catalog = MeasurementCatalog(db_path)
+    try:
+        entry = catalog.get(str(tmp_path / "vella.xlsx"))
+        assert entry['sample_count'] == 600
+        assert entry['calibration_version'] is None
+
+        filepath = str(tmp_path / "nova.xlsx")
+        write_measurement(filepath, 2, start_time="2026-01-01T00:00:00", calibration_version=7)
+        assert catalog.index_file(filepath)
+        assert [entry['filename'] for entry in catalog.search(calibration_version="7")] == \
+            ["nova.xlsx"]
+    finally:
+        catalog.close()
+
+    # Tornar a obrir un catàleg ja migrat no el torna a modificar
+    MeasurementCatalog(db_path).close()
@@ -0,0 +1,149 @@
+"""
+Proves del format comprimit: codificació XOR + transposició de bytes i fitxers .lvz
+"""
+import numpy as np
+import pytest
+
+import data.compressed_file_handler as compressed_module
+from data.compressed_file_handler import CompressedFileHandler
+from data.compression import available_codecs, decode_series, encode_series, get_codec
+from data.file_handler import FileHandler
+
+SPECIAL_VALUES = [0.0, -0.0, np.nan, np.inf, -np.inf, 5e-324, -1.7976931348623157e308, 1.0]
+# Als fitxers, les files també passen pel resum de la mesura (RunSummary), on el quadrat
+# de la desviació d'un valor proper al màxim float64 desbordaria
+FILE_VALUES = [0.0, -0.0, np.nan, np.inf, -np.inf, 5e-324, -1.5e150, 1.0]
+
+
+def assert_bit_exact(expected: np.ndarray, actual: np.ndarray):
+    """Compara dues sèries bit a bit (NaN, -0.0 i la càrrega dels NaN inclosos)."""
+    expected = np.ascontiguousarray(expected, dtype='<f8')
+    assert actual.dtype == np.float64
+    assert actual.shape == expected.shape
+    assert np.array_equal(actual.view('<u8'), expected.view('<u8'))
+
+
+@pytest.mark.parametrize("values", [
+    np.array([], dtype=np.float64),
+    np.array([2.5]),
+    np.array(SPECIAL_VALUES),
+    np.array([np.nan] * 5),
+    2.5 + 0.001 * np.sin(np.arange(5000) / 50.0),
+    np.random.default_rng(0).normal(0.0, 1e6, 1000),
+], ids=["buida", "un_valor", "especials", "tot_nan", "nivell", "soroll"])
+def test_series_round_trip_is_bit_exact(values):
+    encoded = encode_series(values)
+    assert len(encoded) == 8 * len(values)
+    assert_bit_exact(values, decode_series(encoded, len(values)))
+
+
+def test_series_round_trip_keeps_nan_payloads():
+    bits = np.array([0x7FF8000000000001, 0xFFF0000000000123, 0x7FF4000000000000], dtype='<u8')
+    values = bits.view('<f8')
+    assert_bit_exact(values, decode_series(encode_series(values), len(values)))
+
+
+def test_slow_series_compresses_better_than_raw_bytes():
+    values = 2.5 + 0.001 * np.sin(np.arange(20000) / 200.0)
+    _, compress, _ = get_codec('zlib')
+    assert len(compress(encode_series(values))) < len(compress(values.tobytes()))
+
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_codecs_round_trip(codec):
+    name, compress, decompress = get_codec(codec)
+    assert name == codec
+    payload = encode_series(np.array(SPECIAL_VALUES * 10))
+    assert decompress(compress(payload)) == payload
+
+
+def test_unknown_codec_raises():
+    with pytest.raises(ValueError):
+        get_codec('brotli')
+
+
+def make_table(rows: int) -> np.ndarray:
+    """Taula (temps, 4 columnes) amb valors especials intercalats."""
+    table = np.empty((rows, len(FileHandler.COLUMNS)))
+    table[:, 0] = np.arange(rows) * 0.1
+    for column in range(1, table.shape[1]):
+        table[:, column] = [FILE_VALUES[(i + column) % len(FILE_VALUES)] for i in range(rows)]
+    return table
+
+
+def write_table(filepath: str, table: np.ndarray, frame_rows: int) -> CompressedFileHandler:
+    """Escriu una taula en trames de frame_rows files i tanca el fitxer."""
+    handler = CompressedFileHandler(filepath, codec='zlib')
+    handler.metadata['period'] = 0.1
+    handler.create_file()
+    for start in range(0, len(table), frame_rows):
+        for row in table[start:start + frame_rows]:
+            handler.append_row(dict(zip(handler.columns, row)))
+        handler.flush_to_file(force=True)
+    handler.close()
+    return handler
+
+
+@pytest.mark.parametrize("rows, frame_rows", [(0, 1), (1, 1), (5, 1), (2500, 1000)],
+                         ids=["sense_dades", "una_fila", "trames_d_una_fila", "diverses_trames"])
+def test_file_round_trip_is_bit_exact(tmp_path, rows, frame_rows):
+    filepath = str(tmp_path / "mesura.lvz")
+    table = make_table(rows)
+    write_table(filepath, table, frame_rows)
+
+    df = CompressedFileHandler.load_table(filepath)
+    assert list(df.columns) == list(FileHandler.COLUMNS)
+    assert len(df) == rows
+    for i, column in enumerate(FileHandler.COLUMNS):
+        assert_bit_exact(table[:, i], df[column].to_numpy(dtype=np.float64))
+    assert CompressedFileHandler.load_metadata(filepath)['period'] == 0.1
+
+
+def test_time_range_skips_frames_outside_the_interval(tmp_path):
+    filepath = str(tmp_path / "mesura.lvz")
+    write_table(filepath, make_table(3000), 1000)
+
+    df = CompressedFileHandler.load_time_range(filepath, 150.0, 160.0)
+    assert df['time_seconds'].iloc[0] == pytest.approx(150.0)
+    assert df['time_seconds'].iloc[-1] == pytest.approx(160.0)
+    assert len(list(CompressedFileHandler.iter_blocks(filepath, 150.0, 160.0))) == 1
+
+
+def test_truncated_last_frame_is_ignored(tmp_path):
+    filepath = str(tmp_path / "mesura.lvz")
+    table = make_table(2000)
+    handler = CompressedFileHandler(filepath, codec='zlib')
+    handler.create_file()
+    for start in (0, 1000):
+        for row in table[start:start + 1000]:
+            handler.append_row(dict(zip(handler.columns, row)))
+        handler.flush_to_file(force=True)
+    with open(filepath, 'rb') as f:
+        content = f.read()
+    # Tall d'alimentació a mitja escriptura de la segona trama de dades
+    with open(filepath, 'wb') as f:
+        f.write(content[:-10])
+
+    df = CompressedFileHandler.load_table(filepath)
+    assert len(df) == 1000
+    assert_bit_exact(table[:1000, 1], df['voltage_sensor1'].to_numpy(dtype=np.float64))
+
+
+def test_small_buffers_wait_for_a_full_frame(tmp_path):
+    handler = CompressedFileHandler(str(tmp_path / "mesura.lvz"), codec='zlib')
+    handler.create_file()
+    handler.append_data(0.0, 1.0, 2.0)
+    handler.flush_to_file()
+    assert len(handler.data_buffer) == 1
+
+
+def test_old_rows_are_written_without_a_full_frame(tmp_path, monkeypatch):
+    filepath = str(tmp_path / "mesura.lvz")
+    handler = CompressedFileHandler(filepath, codec='zlib')
+    handler.create_file()
+    handler.append_data(0.0, 1.0, 2.0)
+    monkeypatch.setattr(compressed_module, 'COMPRESSED_MAX_FRAME_AGE', 0.0)
+    handler.flush_to_file()
+
+    assert handler.data_buffer == []
+    assert len(CompressedFileHandler.load_table(filepath)) == 1
@@ -0,0 +1,91 @@
+"""
+Proves de l'API de control: rutes, codis de resposta i servidor HTTP
+"""
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from utils.control_server import ControlServer
+
+
+class StubExecutor:
+    """Executor que recorda les ordres i respon segons l'ordre."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, command: str, params: dict, timeout: float) -> dict:
+        self.calls.append((command, params, timeout))
+        if command == 'start':
+            if 'period' in params and not isinstance(params['period'], (int, float)):
+                raise TypeError("El període ha de ser un nombre")
+            if params.get('filename') == "existent.xlsx":
+                return {'success': False, 'message': "El fitxer ja existeix"}
+        if command == 'stop':
+            raise FutureTimeoutError()
+        if command == 'metrics':
+            raise RuntimeError("Error intern")
+        return {'success': True, 'message': "", 'command': command}
+
+
+@pytest.fixture
+def control():
+    return ControlServer(StubExecutor(), '127.0.0.1', 0, timeout=2.5)
+
+
+def test_routes_reach_the_executor(control):
+    assert control.handle('GET', '/status', b'') == \
+        (200, {'success': True, 'message': "", 'command': 'status'})
+    status, result = control.handle('POST', '/start', b'{"period": 0.1, "filename": "a.xlsx"}')
+    assert (status, result['command']) == (200, 'start')
+    assert control.execute.calls[-1] == ('start', {'period': 0.1, 'filename': "a.xlsx"}, 2.5)
+    # Un cos buit o només amb espais equival a cap paràmetre
+    assert control.handle('POST', '/start', b' \n')[0] == 200
+    assert control.execute.calls[-1][1] == {}
+
+
+@pytest.mark.parametrize("method, path", [('GET', '/start'), ('POST', '/status'),
+                                          ('GET', '/'), ('DELETE', '/stop')])
+def test_unknown_routes_are_404(control, method, path):
+    status, result = control.handle(method, path, b'')
+    assert status == 404 and result['success'] is False
+    assert control.execute.calls == []
+
+
+@pytest.mark.parametrize("body", [b'{period: 0.1}', b'[1, 2]', b'"start"',
+                                  '{"period": "ràpid"}'.encode('utf-8')],
+                         ids=["json_invalid", "llista", "text", "tipus_incorrecte"])
+def test_bad_requests_are_400(control, body):
+    status, result = control.handle('POST', '/start', body)
+    assert status == 400 and result['success'] is False
+
+
+def test_failures_map_to_status_codes(control):
+    assert control.handle('POST', '/start', b'{"filename": "existent.xlsx"}') == \
+        (409, {'success': False, 'message': "El fitxer ja existeix"})
+    assert control.handle('POST', '/stop', b'')[0] == 503
+    assert control.handle('GET', '/metrics', b'') == \
+        (500, {'success': False, 'message': "Error intern"})
+
+
+def test_http_round_trip(control):
+    success, msg = control.start()
+    assert success, msg
+    try:
+        base = f"http://127.0.0.1:{control.port}"
+        with urllib.request.urlopen(f"{base}/status?verbose=1", timeout=5) as response:
+            assert response.status == 200
+            assert json.load(response)['command'] == 'status'
+
+        request = urllib.request.Request(f"{base}/start", data=b'{"filename": "existent.xlsx"}',
+                                         method='POST')
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request, timeout=5)
+        assert error.value.code == 409
+        assert json.load(error.value)['message'] == "El fitxer ja existeix"
+    finally:
+        control.stop()
+    assert not control.is_running
@@ -0,0 +1,84 @@
+"""
+Proves del motor d'adquisició asíncron amb un DAQ fals (sense hardware)
+"""
+import asyncio
+import time
+
+import numpy as np
+
+from simulation.mock_daq import enable_simulation
+
+enable_simulation()  # daq.acquisition importa nidaqmx si no
+
+from daq.engine import AcquisitionEngine, storage_output  # noqa: E402
+from utils.calibration import CalibrationManager  # noqa: E402
+
+PERIOD = 0.01
+BLOCKS = 100
+
+
+class FakeDAQ:
+    """DAQ que torna blocs constants, una mica més ràpid que el període."""
+
+    using_simulation = False
+
+    def setup_tasks(self):
+        return True, ""
+
+    activate_sensors = start_acquisition = setup_tasks
+
+    def read_samples(self, num_samples: int):
+        time.sleep(PERIOD / 5)
+        return True, "", np.ones((2, num_samples))
+
+    def cleanup(self):
+        pass
+
+
+class SlowFileHandler:
+    """Gestor de fitxers que triga molt més a escriure que el període de lectura."""
+
+    def __init__(self):
+        self.metadata = {}
+        self.data_buffer = []
+        self.rows = []
+
+    def append_data(self, time, *values):
+        self.data_buffer.append(time)
+
+    def flush_to_file(self):
+        time.sleep(0.02)
+        self.rows += self.data_buffer
+        self.data_buffer = []
+
+    close = flush_to_file
+
+
+def make_engine(tmp_path) -> AcquisitionEngine:
+    calibration = CalibrationManager(str(tmp_path / "calibracions.json"))
+    return AcquisitionEngine(FakeDAQ(), period=PERIOD, calibration_manager=calibration)
+
+
+def test_slow_storage_loses_no_rows(tmp_path):
+    engine = make_engine(tmp_path)
+    file_handler = SlowFileHandler()
+    handler, close = storage_output(file_handler, metadata=engine.run_metadata, flush_interval=0.0)
+    storage = engine.add_output('storage', handler, queue_size=2, close=close, lossless=True)
+    received = []
+
+    async def slow_stream(record):
+        received.append(record['index'])
+        await asyncio.sleep(0.02)
+
+    stream = engine.add_output('stream', slow_stream, queue_size=2)
+
+    success, msg = asyncio.run(engine.run(duration=BLOCKS * PERIOD))
+    assert success, msg
+    assert engine.blocks == BLOCKS
+    assert engine.lost_blocks == 0
+    assert storage.dropped == 0
+    assert file_handler.rows == [index * PERIOD for index in range(BLOCKS)]
+    assert file_handler.metadata['lost_blocks'] == 0
+    # Les sortides amb pèrdues continuen descartant en lloc de frenar el motor
+    assert stream.dropped > 0
+    assert len(received) + stream.dropped == BLOCKS
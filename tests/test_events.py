@@ -0,0 +1,154 @@
+"""
+Proves del motor d'esdeveniments: resultats independents de la partició en blocs
+"""
+import numpy as np
+import pytest
+
+from data.events import EventEngine
+
+SAMPLE_RATE = 100.0
+
+RULES = [
+    {'name': "alt", 'type': "above", 'quantity': "voltage", 'threshold': 0.5, 'hysteresis': 0.2,
+     'window': 0.05},
+    {'name': "baix", 'type': "below", 'quantity': "voltage", 'threshold': -0.5, 'hysteresis': 0.1,
+     'window': 0.01},
+    {'name': "puja", 'type': "rate_above", 'quantity': "voltage", 'threshold': 2.0, 'hysteresis': 0.5,
+     'window': 0.1},
+    {'name': "baixa", 'type': "rate_below", 'quantity': "voltage", 'channel': 1, 'threshold': -2.0,
+     'window': 0.03},
+]
+
+
+def make_signal(n: int = 3000, seed: int = 1) -> np.ndarray:
+    """Dos canals amb oscil·lació lenta i soroll, que creuen els llindars moltes vegades."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / SAMPLE_RATE
+    return np.vstack([
+        np.sin(2 * np.pi * 0.3 * t) + rng.normal(0.0, 0.15, n),
+        np.cos(2 * np.pi * 0.5 * t) + rng.normal(0.0, 0.15, n),
+    ])
+
+
+def run_blocks(signal: np.ndarray, sizes, rules=RULES) -> list:
+    """Processa el senyal en blocs consecutius de les mides donades (cíclicament)."""
+    engine = EventEngine(rules, sample_rate=SAMPLE_RATE)
+    start, i = 0, 0
+    while start < signal.shape[1]:
+        size = sizes[i % len(sizes)]
+        engine.process(start / SAMPLE_RATE, signal[:, start:start + size])
+        start += size
+        i += 1
+    return engine.events
+
+
+def reference_events(signal: np.ndarray, rule: dict) -> list:
+    """Implementació directa, mostra a mostra, d'una regla (per comparar)."""
+    w = max(1, int(round(rule['window'] * SAMPLE_RATE)))
+    x = signal[rule.get('channel', 0)]
+    smoothed = {j: x[j - w + 1:j + 1].mean() for j in range(w - 1, len(x))}
+    hysteresis = rule.get('hysteresis', 0.0)
+    active, events = False, []
+    for j in range(len(x)):
+        if rule['type'].startswith("rate_"):
+            if j < 2 * w - 1:
+                continue
+            value = (smoothed[j] - smoothed[j - w]) * SAMPLE_RATE / w
+        else:
+            if j < w - 1:
+                continue
+            value = smoothed[j]
+        if rule['type'] in ("above", "rate_above"):
+            new = True if value > rule['threshold'] else \
+                False if value < rule['threshold'] - hysteresis else active
+        else:
+            new = True if value < rule['threshold'] else \
+                False if value > rule['threshold'] + hysteresis else active
+        if new != active:
+            events.append((round(j / SAMPLE_RATE, 6), "start" if new else "end"))
+        active = new
+    return events
+
+
+def summary(events: list) -> list:
+    """Part exacta dels esdeveniments (el valor es compara a part, amb tolerància)."""
+    return [(event['time'], event['rule'], event['channel'], event['kind']) for event in events]
+
+
+@pytest.mark.parametrize("rule", RULES, ids=[rule['name'] for rule in RULES])
+def test_single_block_matches_reference(rule):
+    signal = make_signal()
+    events = run_blocks(signal, [signal.shape[1]], [rule])
+    assert events, "El senyal de prova ha de generar esdeveniments"
+    assert [(event['time'], event['kind']) for event in events] == reference_events(signal, rule)
+
+
+@pytest.mark.parametrize("sizes", [[1], [2], [7], [10], [99], [100], [101], [1, 50, 3, 200, 9]],
+                         ids=lambda sizes: "-".join(map(str, sizes)))
+def test_events_do_not_depend_on_block_boundaries(sizes):
+    signal = make_signal()
+    whole = run_blocks(signal, [signal.shape[1]])
+    split = run_blocks(signal, sizes)
+    assert summary(split) == summary(whole)
+    assert [event['value'] for event in split] == pytest.approx([event['value'] for event in whole])
+
+
+def test_crossing_on_the_first_sample_of_a_block():
+    rule = {'type': "above", 'quantity': "voltage", 'threshold': 0.5, 'window': 0.01}
+    engine = EventEngine([rule], sample_rate=SAMPLE_RATE)
+    assert engine.process(0.0, np.zeros((2, 50))) == []
+    events = engine.process(0.5, np.ones((2, 50)))
+    assert [(event['time'], event['kind']) for event in events] == [(0.5, "start")]
+
+
+def test_window_longer_than_the_blocks():
+    rule = {'type': "above", 'quantity': "voltage", 'threshold': 0.5, 'window': 0.2}
+    engine = EventEngine([rule], sample_rate=SAMPLE_RATE)
+    events = []
+    for k in range(10):
+        events += engine.process(k * 0.05, np.ones((2, 5)))
+    # La primera mitjana completa (20 mostres) és a la mostra 19
+    assert [(event['time'], event['kind']) for event in events] == [(0.19, "start")]
+
+
+def test_hysteresis_ignores_noise_around_the_threshold():
+    rule = {'type': "above", 'quantity': "voltage", 'threshold': 1.0, 'hysteresis': 0.5,
+            'window': 0.01}
+    engine = EventEngine([rule], sample_rate=SAMPLE_RATE)
+    x = np.concatenate([np.zeros(10), np.full(10, 1.2), np.tile([0.9, 1.1], 20), np.zeros(10)])
+    events = engine.process(0.0, np.vstack([x, x]))
+    assert [(event['time'], event['kind']) for event in events] == [(0.1, "start"), (0.6, "end")]
+
+
+def test_state_carries_over_blocks_without_decisions():
+    rule = {'type': "below", 'quantity': "voltage", 'threshold': 0.0, 'hysteresis': 1.0,
+            'window': 0.01}
+    engine = EventEngine([rule], sample_rate=SAMPLE_RATE)
+    assert [event['kind'] for event in engine.process(0.0, np.full((2, 10), -1.0))] == ["start"]
+    # Dins de la banda d'histèresi: l'esdeveniment continua actiu
+    assert engine.process(0.1, np.full((2, 10), 0.5)) == []
+    assert [event['kind'] for event in engine.process(0.2, np.full((2, 10), 2.0))] == ["end"]
+
+
+def test_height_rules_wait_for_heights():
+    rule = {'type': "above", 'quantity': "height", 'threshold': 1.0, 'window': 0.01}
+    engine = EventEngine([rule], sample_rate=SAMPLE_RATE)
+    assert engine.needs_heights
+    assert engine.process(0.0, np.full((2, 10), 5.0)) == []
+    assert len(engine.process(0.1, np.full((2, 10), 5.0), np.full((2, 10), 5.0))) == 1
+
+
+def test_reset_forgets_state_and_events():
+    signal = make_signal(500)
+    engine = EventEngine(RULES, sample_rate=SAMPLE_RATE)
+    first = engine.process(0.0, signal)
+    engine.reset()
+    assert engine.events == []
+    assert summary(engine.process(0.0, signal)) == summary(first)
+
+
+def test_invalid_rules_raise():
+    with pytest.raises(ValueError):
+        EventEngine([{'type': "between"}])
+    with pytest.raises(ValueError):
+        EventEngine([{'quantity': "pressure"}])
@@ -0,0 +1,61 @@
+"""
+Proves del gestor de fitxers Excel: metadades i resum de mesures llargues
+"""
+import json
+import math
+
+import pandas as pd
+import pytest
+
+from data.file_handler import FileHandler
+
+HOURS = 4
+PERIOD = 10.0
+
+
+def write_long_run(filepath: str) -> FileHandler:
+    """Escriu una mesura de diverses hores (una fila cada PERIOD segons)."""
+    handler = FileHandler(filepath)
+    handler.metadata.update({'start_time': "2026-01-01T00:00:00", 'period': PERIOD,
+                             'calibration_version': 3})
+    handler.create_file()
+    for i in range(int(HOURS * 3600 / PERIOD)):
+        t = i * PERIOD
+        handler.append_data(t, 2.5 + math.sin(t / 600.0), 3.5, 10.0 + i * 0.01)
+        if i % 500 == 0:
+            handler.flush_to_file()
+    handler.close()
+    return handler
+
+
+def test_long_run_metadata_round_trips(tmp_path):
+    filepath = str(tmp_path / "mesura.xlsx")
+    handler = write_long_run(filepath)
+    expected = handler.get_metadata()
+    # Tot junt no cabria en una cel·la d'Excel (32767 caràcters)
+    assert len(json.dumps(expected['summary'])) > 32767
+
+    metadata = FileHandler.load_metadata(filepath)
+    assert metadata is not None
+    assert metadata['start_time'] == "2026-01-01T00:00:00"
+    assert metadata['calibration_version'] == 3
+    summary = metadata['summary']
+    assert summary['sample_count'] == HOURS * 360
+    assert summary['overall'] == expected['summary']['overall']
+    assert len(summary['blocks']) == HOURS * 60
+    for block, expected_block in zip(summary['blocks'], expected['summary']['blocks']):
+        assert block['start'] == expected_block['start']
+        assert block['stats'].keys() == expected_block['stats'].keys()
+        for column, stats in expected_block['stats'].items():
+            assert block['stats'][column] == pytest.approx(stats)
+    # Les estadístiques per blocs van al seu full, no a la cel·la de metadades
+    assert 'blocks' not in json.loads(
+        pd.read_excel(filepath, sheet_name=FileHandler.METADATA_SHEET)
+        .set_index('key').loc['summary', 'value']
+    )
+
+
+def test_empty_file_has_no_blocks(tmp_path):
+    filepath = str(tmp_path / "buit.xlsx")
+    FileHandler(filepath).create_file()
+    assert FileHandler.load_metadata(filepath)['summary']['blocks'] == []
@@ -0,0 +1,118 @@
+"""
+Proves dels agregadors de blocs (mitjana, mediana, Hampel i sigma-clipping)
+"""
+import warnings
+
+import numpy as np
+import pytest
+
+from data.processor import AGGREGATORS, DataProcessor, RunSummary
+
+
+def noisy_block(n: int = 1000, seed: int = 2) -> np.ndarray:
+    """Dos canals amb soroll gaussià al voltant de 2.5 V i 3.5 V."""
+    rng = np.random.default_rng(seed)
+    return np.vstack([2.5 + rng.normal(0.0, 0.01, n), 3.5 + rng.normal(0.0, 0.01, n)])
+
+
+def test_mean_and_median_do_not_reject():
+    block = noisy_block()
+    values, rejected = DataProcessor.aggregate_block(block, "mean")
+    assert values == pytest.approx(block.mean(axis=1))
+    assert rejected.tolist() == [0, 0]
+    values, rejected = DataProcessor.aggregate_block(block, "median")
+    assert values == pytest.approx(np.median(block, axis=1))
+    assert rejected.tolist() == [0, 0]
+
+
+@pytest.mark.parametrize("position", [0, 1, 500, 998, 999], ids=lambda p: f"pic_{p}")
+def test_hampel_replaces_isolated_spikes(position):
+    block = noisy_block()
+    clean, _ = DataProcessor.aggregate_block(block, "mean")
+    block[0, position] += 5.0
+    values, rejected = DataProcessor.aggregate_block(block, "hampel")
+    assert rejected[0] >= 1
+    assert values[0] == pytest.approx(clean[0], abs=1e-3)
+    # L'altre canal no es veu afectat
+    assert values[1] == pytest.approx(clean[1], abs=1e-3)
+
+
+def test_hampel_keeps_a_clean_constant_block():
+    values, rejected = DataProcessor.aggregate_block(np.full((2, 100), 1.25), "hampel")
+    assert values.tolist() == [1.25, 1.25]
+    assert rejected.tolist() == [0, 0]
+
+
+def test_sigma_clip_discards_outliers():
+    block = noisy_block()
+    clean, _ = DataProcessor.aggregate_block(block, "mean")
+    block[1, [10, 20, 30]] = [10.0, -10.0, 8.0]
+    values, rejected = DataProcessor.aggregate_block(block, "sigma_clip")
+    assert rejected[1] >= 3
+    assert values[1] == pytest.approx(clean[1], abs=1e-3)
+    assert values[0] == pytest.approx(clean[0], abs=1e-3)
+
+
+def test_sigma_clip_keeps_a_constant_block():
+    values, rejected = DataProcessor.aggregate_block(np.full((2, 50), -0.5), "sigma_clip")
+    assert values.tolist() == [-0.5, -0.5]
+    assert rejected.tolist() == [0, 0]
+
+
+@pytest.mark.parametrize("method", AGGREGATORS)
+def test_short_blocks(method):
+    values, rejected = DataProcessor.aggregate_block(np.array([[1.0], [2.0]]), method)
+    assert values.tolist() == [1.0, 2.0]
+    assert rejected.tolist() == [0, 0]
+    values, rejected = DataProcessor.aggregate_block(np.empty((2, 0)), method)
+    assert values.tolist() == [0.0, 0.0]
+    assert rejected.tolist() == [0, 0]
+
+
+@pytest.mark.parametrize("method", AGGREGATORS)
+def test_robust_methods_agree_with_the_mean_on_clean_data(method):
+    block = noisy_block()
+    mean, _ = DataProcessor.aggregate_block(block, "mean")
+    values, _ = DataProcessor.aggregate_block(block, method)
+    assert values == pytest.approx(mean, abs=2e-3)
+
+
+def test_run_summary_ignores_non_finite_values():
+    summary = RunSummary(['voltage_sensor1'], 60.0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        for t, value in enumerate([1.0, np.inf, np.nan, -np.inf, 3.0, None]):
+            summary.update(float(t), {'voltage_sensor1': value})
+    stats = summary.to_dict()['overall']['voltage_sensor1']
+    assert summary.sample_count == 6
+    assert stats == {'count': 2, 'mean': 2.0, 'min': 1.0, 'max': 3.0, 'std': 1.0}
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        DataProcessor.aggregate_block(noisy_block(), "trimmed")
+
+
+def test_merged_run_summaries_match_a_single_summary():
+    columns = ['voltage_sensor1', 'voltage_sensor2']
+    whole = RunSummary(columns, 60.0)
+    parts = [RunSummary(columns, 60.0), RunSummary(columns, 60.0)]
+    rng = np.random.default_rng(3)
+    for t in range(300):
+        values = {'voltage_sensor1': rng.normal(2.5, 0.1), 'voltage_sensor2': float(t)}
+        whole.update(float(t), values)
+        # El tall a t=90 parteix un bloc de 60 s entre les dues parts
+        parts[t >= 90].update(float(t), values)
+    merged = RunSummary.from_dict(parts[0].to_dict())
+    merged.merge(RunSummary.from_dict(parts[1].to_dict()))
+
+    expected, result = whole.to_dict(), merged.to_dict()
+    assert result['sample_count'] == 300
+    assert (result['first_time'], result['last_time']) == (0.0, 299.0)
+    for column in columns:
+        assert result['overall'][column] == pytest.approx(expected['overall'][column])
+    assert len(result['blocks']) == len(expected['blocks']) == 5
+    for block, expected_block in zip(result['blocks'], expected['blocks']):
+        assert block['start'] == expected_block['start']
+        for column in columns:
+            assert block['stats'][column] == pytest.approx(expected_block['stats'][column])
@@ -0,0 +1,78 @@
+"""
+Proves de les mesures segmentades: metadades i resum a través del manifest
+"""
+import pytest
+
+from data.file_handler import FileHandler
+from data.multirate import MultiRateWriter, load_overview
+from data.segments import SegmentedFileHandler
+
+SEGMENT_DURATION = 50.0
+
+
+def start_run(tmp_path) -> SegmentedFileHandler:
+    handler = SegmentedFileHandler(str(tmp_path / "mesura.xlsx"), max_duration=SEGMENT_DURATION,
+                                   handler_factory=MultiRateWriter)
+    handler.metadata.update({'start_time': "2026-01-01T00:00:00", 'period': 1.0})
+    handler.create_file()
+    return handler
+
+
+def write_rows(handler: SegmentedFileHandler, start: int, stop: int):
+    for i in range(start, stop):
+        handler.append_data(float(i), 1.0 + i % 7, 2.0, 0.5 * i)
+    handler.flush_to_file()
+
+
+def assert_same_summary(summary: dict, expected: dict):
+    assert summary['sample_count'] == expected['sample_count']
+    assert summary['first_time'] == expected['first_time']
+    assert summary['last_time'] == expected['last_time']
+    for column, stats in expected['overall'].items():
+        assert summary['overall'][column] == pytest.approx(stats)
+    assert [block['start'] for block in summary['blocks']] == \
+        [block['start'] for block in expected['blocks']]
+
+
+def test_metadata_of_an_open_run_combines_the_segments(tmp_path):
+    handler = start_run(tmp_path)
+    write_rows(handler, 0, 130)
+    assert len(handler.segments) == 3
+
+    # El manifest es va escriure en obrir el tercer segment (100 files)
+    metadata = FileHandler.load_metadata(handler.filepath)
+    assert metadata['start_time'] == "2026-01-01T00:00:00"
+    assert_same_summary(metadata['summary'], handler.summary.to_dict())
+    handler.close()
+
+
+def test_metadata_of_a_closed_run(tmp_path):
+    handler = start_run(tmp_path)
+    write_rows(handler, 0, 120)
+    handler.close()
+    metadata = FileHandler.load_metadata(handler.filepath)
+    assert metadata['period'] == 1.0
+    assert_same_summary(metadata['summary'], handler.summary.to_dict())
+
+
+def test_missing_manifest_has_no_metadata(tmp_path):
+    assert FileHandler.load_metadata(str(tmp_path / "cap.manifest.json")) is None
+
+
+def test_overview_of_a_segmented_run(tmp_path):
+    handler = start_run(tmp_path)
+    write_rows(handler, 0, 120)
+    handler.close()
+
+    overview = load_overview(handler.filepath)
+    assert overview is not None
+    assert overview['time_seconds'].tolist() == [float(i) for i in range(120)]
+    assert overview['height_sensor1_max'].iloc[-1] == 0.5 * 119
+
+
+def test_segmented_run_without_overviews(tmp_path):
+    handler = SegmentedFileHandler(str(tmp_path / "mesura.xlsx"), max_duration=SEGMENT_DURATION)
+    handler.create_file()
+    write_rows(handler, 0, 60)
+    handler.close()
+    assert load_overview(handler.filepath) is None
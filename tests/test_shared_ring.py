@@ -0,0 +1,76 @@
+"""
+Proves de la memòria circular compartida: ordre, volta i comptatge de blocs perduts
+"""
+import numpy as np
+import pytest
+
+from simulation.mock_daq import enable_simulation
+
+enable_simulation()  # El paquet daq importa nidaqmx si no
+
+from daq.shared_ring import SharedBlockRing  # noqa: E402
+
+SLOTS = 4
+
+
+def block(index: int) -> np.ndarray:
+    """Bloc (2 canals, 3 mostres) identificable pel seu índex."""
+    return np.full((2, 3), float(index)) + np.array([[0.0], [0.5]])
+
+
+@pytest.fixture
+def rings():
+    """Escriptor (crea la memòria) i lector connectat pel nom, com entre processos."""
+    writer = SharedBlockRing(SLOTS, 2, 3)
+    reader = SharedBlockRing(SLOTS, 2, 3, name=writer.name)
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def test_reader_sees_blocks_in_order(rings):
+    writer, reader = rings
+    assert reader.read_available() == ([], 0)
+    for index in range(3):
+        writer.write(block(index))
+    blocks, lost = reader.read_available()
+    assert lost == 0
+    assert [index for index, _ in blocks] == [0, 1, 2]
+    for index, view in blocks:
+        assert np.array_equal(view, block(index))
+    assert reader.read_available() == ([], 0)
+
+
+def test_wrap_around_without_losses(rings):
+    writer, reader = rings
+    seen = []
+    for index in range(3 * SLOTS + 1):
+        writer.write(block(index))
+        if index % 2:
+            blocks, lost = reader.read_available()
+            assert lost == 0
+            seen += [index for index, view in blocks if np.array_equal(view, block(index))]
+    seen += [index for index, _ in reader.read_available()[0]]
+    assert seen == list(range(3 * SLOTS + 1))
+    assert writer.write_count == 3 * SLOTS + 1
+
+
+def test_overwritten_blocks_are_counted_as_lost(rings):
+    writer, reader = rings
+    for index in range(10):
+        writer.write(block(index))
+    blocks, lost = reader.read_available()
+    # Només es lliuren slots - 1 blocs: el més antic es pot estar sobreescrivint
+    assert [index for index, _ in blocks] == [7, 8, 9]
+    assert lost == 7
+    for index, view in blocks:
+        assert np.array_equal(view, block(index))
+
+    writer.write(block(10))
+    assert [index for index, _ in reader.read_available()[0]] == [10]
+
+
+def test_block_shape_is_checked(rings):
+    writer, _ = rings
+    with pytest.raises(ValueError):
+        writer.write(np.zeros((3, 3)))
@@ -0,0 +1,91 @@
+"""
+Proves del servidor de dades en directe: trames, ordre i clients lents
+"""
+import math
+import socket
+import time
+
+import numpy as np
+import pytest
+
+from data.streaming import StreamClient, StreamServer
+
+
+def wait_for(condition, timeout: float = 5.0):
+    """Espera que es compleixi una condició (el servidor treballa en un altre fil)."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Temps d'espera esgotat")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def server():
+    server = StreamServer('127.0.0.1', 0, batch_interval=0.01, max_client_buffer=64 * 1024)
+    success, msg = server.start()
+    assert success, msg
+    yield server
+    server.stop()
+
+
+def test_client_receives_rows_and_events_in_order(server):
+    assert server.port != 0
+    with StreamClient('127.0.0.1', server.port, timeout=5.0) as client:
+        kind, hello = client.receive()
+        assert (kind, hello['type'], hello['run']) == ('message', 'hello', None)
+        assert len(client.columns) == 5
+        wait_for(lambda: server.client_count == 1)
+
+        server.publish_message('start', filename="assaig.xlsx", period=0.1)
+        assert client.receive()[1]['type'] == 'start'
+        assert client.run_info['filename'] == "assaig.xlsx"
+        # Un client que es connecta a mitja mesura rep les dades de la mesura
+        with StreamClient('127.0.0.1', server.port, timeout=5.0) as late:
+            assert late.receive()[1]['run']['filename'] == "assaig.xlsx"
+
+        server.publish_row(0.0, 1.0, 2.0, None, None)
+        server.publish_row(0.1, 1.5, 2.5, 10.0, 20.0)
+        server.publish_events([{'rule': "alt", 'kind': "start", 'time': 0.1}])
+        server.publish_row(0.2, 1.0, 2.0, 3.0, 4.0)
+
+        # Les files poden arribar en una o dues trames, però sempre abans de l'esdeveniment
+        frames = []
+        while not frames or frames[-1][0] == 'samples':
+            frames.append(client.receive())
+        assert frames[-1] == ('events', [{'rule': "alt", 'kind': "start", 'time': 0.1}])
+        rows = np.vstack([value for kind, value in frames[:-1]])
+        assert rows.shape == (2, 5)
+        assert rows[1].tolist() == [0.1, 1.5, 2.5, 10.0, 20.0]
+        assert math.isnan(rows[0, 3])
+        kind, rows = client.receive()
+        assert kind == 'samples' and rows[:, 0].tolist() == [0.2]
+
+        server.publish_message('stop')
+        assert client.receive() == ('message', {'type': 'stop'})
+        assert client.run_info is None
+
+        server.stop()
+        assert client.receive() is None
+
+
+def test_slow_client_is_disconnected(server):
+    slow = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    slow.connect(('127.0.0.1', server.port))
+    try:
+        wait_for(lambda: server.client_count == 1)
+        rows = np.random.default_rng(0).normal(size=(2000, 5))
+        deadline = time.monotonic() + 10.0
+        # El client no llegeix: el seu buffer supera max_client_buffer i es desconnecta
+        while server.client_count and time.monotonic() < deadline:
+            for row in rows:
+                server.publish_row(*row)
+            time.sleep(0.02)
+        assert server.client_count == 0
+    finally:
+        slow.close()
+
+    # El servidor continua acceptant clients nous
+    with StreamClient('127.0.0.1', server.port, timeout=5.0) as client:
+        assert client.receive()[1]['type'] == 'hello'
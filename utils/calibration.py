@@ -1,13 +1,27 @@
 """
 Mòdul de calibratge per convertir voltatge a alçada d'aigua
 """
-import json
-import os
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.calibration_store import CalibrationStore
+from utils.config import (
+    CALIBRATION_METHOD_PIECEWISE, CALIBRATION_METHOD_POLYNOMIAL, CALIBRATION_POLY_DEGREE,
+    CALIBRATION_FILE
+)
 
 
 class SensorCalibration:
-    """Gestiona la calibració d'un sensor (voltatge → alçada)."""
+    """
+    Gestiona la calibració d'un sensor (voltatge → alçada).
+    Admet N punts amb dos mètodes d'ajust:
+    - 'piecewise': interpolació lineal entre punts consecutius (amb 2 punts és
+      la recta de sempre) i extrapolació amb el primer/últim tram
+    - 'polynomial': polinomi de mínims quadrats del grau indicat
+    """
+    
+    METHODS = (CALIBRATION_METHOD_PIECEWISE, CALIBRATION_METHOD_POLYNOMIAL)
     
     def __init__(self, sensor_id: int):
         """
@@ -17,13 +31,28 @@ class SensorCalibration:
             sensor_id: Identificador del sensor (0 o 1)
         """
         self.sensor_id = sensor_id
-        # Punts de calibratge (voltatge, alçada)
-        self.point1 = None  # (voltage, height)
-        self.point2 = None  # (voltage, height)
+        # Punts de calibratge [(voltatge, alçada), ...] ordenats per voltatge
+        self.points: List[Tuple[float, float]] = []
+        self.method = CALIBRATION_METHOD_PIECEWISE
+        self.degree = CALIBRATION_POLY_DEGREE
+        # Model ajustat (es recalcula en canviar els punts)
+        self._voltages = np.empty(0)
+        self._heights = np.empty(0)
+        self._coefficients = None
+    
+    @property
+    def point1(self) -> Optional[Tuple[float, float]]:
+        """Primer punt (compatibilitat amb el calibratge de 2 punts)."""
+        return self.points[0] if len(self.points) >= 1 else None
+    
+    @property
+    def point2(self) -> Optional[Tuple[float, float]]:
+        """Segon punt (compatibilitat amb el calibratge de 2 punts)."""
+        return self.points[1] if len(self.points) >= 2 else None
         
     def set_calibration_points(self, v1: float, h1: float, v2: float, h2: float):
         """
-        Estableix els punts de calibratge.
+        Estableix un calibratge lineal de 2 punts.
         
         Args:
             v1: Voltatge del punt 1
@@ -31,16 +60,43 @@ class SensorCalibration:
             v2: Voltatge del punt 2
             h2: Alçada del punt 2 (cm)
         """
-        self.point1 = (v1, h1)
-        self.point2 = (v2, h2)
+        self.set_points([(v1, h1), (v2, h2)], CALIBRATION_METHOD_PIECEWISE)
+    
+    def set_points(self, points: Sequence[Tuple[float, float]],
+                   method: str = CALIBRATION_METHOD_PIECEWISE,
+                   degree: int = CALIBRATION_POLY_DEGREE):
+        """
+        Estableix N punts de calibratge i ajusta el model.
+        
+        Args:
+            points: Parells (voltatge, alçada)
+            method: 'piecewise' o 'polynomial'
+            degree: Grau del polinomi (només per 'polynomial')
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Mètode de calibratge desconegut: {method}")
+        self.points = sorted((float(v), float(h)) for v, h in points)
+        self.method = method
+        self.degree = int(degree)
+        self._fit()
+    
+    def _fit(self):
+        """Precalcula el model per avaluar blocs sencers sense bucles."""
+        self._voltages = np.array([p[0] for p in self.points], dtype=np.float64)
+        self._heights = np.array([p[1] for p in self.points], dtype=np.float64)
+        self._coefficients = None
+        if self.method == CALIBRATION_METHOD_POLYNOMIAL and len(self.points) >= 2:
+            # Amb menys punts que grau+1 l'ajust quedaria indeterminat
+            degree = min(self.degree, len(self.points) - 1)
+            self._coefficients = np.polyfit(self._voltages, self._heights, degree)
     
     def is_calibrated(self) -> bool:
         """Retorna True si el sensor està calibrat."""
-        return self.point1 is not None and self.point2 is not None
+        return len(self.points) >= 2
     
     def voltage_to_height(self, voltage: float) -> Optional[float]:
         """
-        Converteix voltatge a alçada usant interpolació lineal.
+        Converteix voltatge a alçada amb el model ajustat.
         
         Args:
             voltage: Voltatge llegit del sensor
@@ -50,38 +106,72 @@ class SensorCalibration:
         """
         if not self.is_calibrated():
             return None
+        return float(self.voltages_to_heights(voltage))
+    
+    def voltages_to_heights(self, voltages) -> Optional[np.ndarray]:
+        """
+        Converteix un bloc de voltatges a alçades (vectoritzat).
         
-        v1, h1 = self.point1
-        v2, h2 = self.point2
+        Args:
+            voltages: Array (o escalar) de voltatges
+            
+        Returns:
+            Array d'alçades en cm de la mateixa forma, o None si no està calibrat
+        """
+        if not self.is_calibrated():
+            return None
+        voltages = np.asarray(voltages, dtype=np.float64)
+        
+        if self._coefficients is not None:
+            return np.polyval(self._coefficients, voltages)
         
-        # Interpolació lineal: h = h1 + (h2 - h1) * (v - v1) / (v2 - v1)
-        if abs(v2 - v1) < 0.001:  # Evitar divisió per zero
-            return h1
+        v, h = self._voltages, self._heights
+        if v[-1] - v[0] < 0.001:  # Evitar divisió per zero
+            return np.full(voltages.shape, h[0])
         
-        height = h1 + (h2 - h1) * (voltage - v1) / (v2 - v1)
-        return height
+        heights = np.interp(voltages, v, h)
+        # np.interp satura als extrems: fora del rang es continua amb el tram extrem
+        # (amb 2 punts és exactament la recta del calibratge lineal)
+        below = voltages < v[0]
+        if np.any(below):
+            slope = (h[1] - h[0]) / (v[1] - v[0]) if v[1] - v[0] >= 0.001 else 0.0
+            heights = np.where(below, h[0] + slope * (voltages - v[0]), heights)
+        above = voltages > v[-1]
+        if np.any(above):
+            slope = (h[-1] - h[-2]) / (v[-1] - v[-2]) if v[-1] - v[-2] >= 0.001 else 0.0
+            heights = np.where(above, h[-1] + slope * (voltages - v[-1]), heights)
+        return heights
     
     def to_dict(self) -> dict:
         """Exporta la calibració a diccionari."""
         return {
             'sensor_id': self.sensor_id,
+            'method': self.method,
+            'degree': self.degree,
+            'points': [list(point) for point in self.points],
+            # Es mantenen per als lectors del format antic de 2 punts
             'point1': self.point1,
             'point2': self.point2
         }
     
     @staticmethod
     def from_dict(data: dict) -> 'SensorCalibration':
-        """Crea una calibració des d'un diccionari."""
+        """Crea una calibració des d'un diccionari (format N punts o antic de 2 punts)."""
         calib = SensorCalibration(data['sensor_id'])
-        calib.point1 = tuple(data['point1']) if data['point1'] else None
-        calib.point2 = tuple(data['point2']) if data['point2'] else None
+        if data.get('points'):
+            points = data['points']
+        else:
+            points = [p for p in (data.get('point1'), data.get('point2')) if p]
+        calib.set_points(points,
+                         data.get('method', CALIBRATION_METHOD_PIECEWISE),
+                         data.get('degree', CALIBRATION_POLY_DEGREE))
         return calib
 
 
 class CalibrationManager:
     """Gestiona les calibracions de tots els sensors."""
     
-    CALIBRATION_FILE = "sensor_calibration.json"
+    CALIBRATION_FILE = CALIBRATION_FILE
     
     # Valors per defecte: -2V = 0cm, +2V = 5cm
     DEFAULT_V1 = -2.0
@@ -89,30 +179,51 @@ class CalibrationManager:
     DEFAULT_V2 = 2.0
     DEFAULT_H2 = 5.0
     
-    def __init__(self):
-        """Inicialitza el gestor de calibracions."""
+    def __init__(self, calibration_file: str = None):
+        """
+        Inicialitza el gestor de calibracions.
+        
+        Args:
+            calibration_file: Fitxer de calibracions (per defecte, el de l'arrel del projecte)
+        """
         self.calibrations = {
             0: SensorCalibration(0),
             1: SensorCalibration(1)
         }
+        self.store = CalibrationStore(calibration_file or self.CALIBRATION_FILE)
         self.load()
         
-        # Si no hi ha calibracions carregades, aplicar valors per defecte
-        if not self.calibrations[0].is_calibrated():
-            self.set_calibration(0, self.DEFAULT_V1, self.DEFAULT_H1, 
-                               self.DEFAULT_V2, self.DEFAULT_H2)
-        if not self.calibrations[1].is_calibrated():
-            self.set_calibration(1, self.DEFAULT_V1, self.DEFAULT_H1, 
-                               self.DEFAULT_V2, self.DEFAULT_H2)
+        # Si no hi ha calibracions carregades, aplicar valors per defecte (es desa una sola vegada)
+        defaults = [sensor_id for sensor_id, cal in self.calibrations.items() if not cal.is_calibrated()]
+        for sensor_id in defaults:
+            self.set_calibration(sensor_id, self.DEFAULT_V1, self.DEFAULT_H1,
+                                 self.DEFAULT_V2, self.DEFAULT_H2, save=False)
+        if defaults:
+            self.save()
+    
+    @property
+    def version(self) -> Optional[str]:
+        """Identificador de la versió del calibratge actual (None si no s'ha desat)."""
+        return self.store.version
     
     def get_calibration(self, sensor_id: int) -> SensorCalibration:
         """Obté la calibració d'un sensor."""
         return self.calibrations[sensor_id]
     
-    def set_calibration(self, sensor_id: int, v1: float, h1: float, v2: float, h2: float):
-        """Estableix la calibració d'un sensor."""
+    def set_calibration(self, sensor_id: int, v1: float, h1: float, v2: float, h2: float,
+                        save: bool = True):
+        """Estableix la calibració d'un sensor (save=False per desar-ne diverses de cop)."""
         self.calibrations[sensor_id].set_calibration_points(v1, h1, v2, h2)
-        self.save()
+        if save:
+            self.save()
+    
+    def set_calibration_points(self, sensor_id: int, points: Sequence[Tuple[float, float]],
+                               method: str = CALIBRATION_METHOD_PIECEWISE,
+                               degree: int = CALIBRATION_POLY_DEGREE, save: bool = True):
+        """Estableix una calibració de N punts d'un sensor (save=False per desar-ne diverses de cop)."""
+        self.calibrations[sensor_id].set_points(points, method, degree)
+        if save:
+            self.save()
     
     def is_sensor_calibrated(self, sensor_id: int) -> bool:
         """Comprova si un sensor està calibrat."""
@@ -126,34 +237,55 @@ class CalibrationManager:
         """Converteix voltatge a alçada per un sensor."""
         return self.calibrations[sensor_id].voltage_to_height(voltage)
     
-    def save(self):
-        """Guarda les calibracions a fitxer JSON."""
+    def voltages_to_heights(self, sensor_id: int, voltages) -> Optional[np.ndarray]:
+        """Converteix un bloc de voltatges a alçades per un sensor."""
+        return self.calibrations[sensor_id].voltages_to_heights(voltages)
+    
+    def save(self) -> Optional[str]:
+        """
+        Guarda les calibracions com a nova versió (si el contingut ha canviat).
+        
+        Returns:
+            Identificador de la versió desada, o None si hi ha hagut un error
+        """
         try:
-            data = {
-                'calibrations': [cal.to_dict() for cal in self.calibrations.values()]
-            }
-            with open(self.CALIBRATION_FILE, 'w') as f:
-                json.dump(data, f, indent=2)
+            return self.store.commit([cal.to_dict() for cal in self.calibrations.values()])
         except Exception as e:
             print(f"Error guardant calibracions: {e}")
+            return None
     
     def load(self):
-        """Carrega les calibracions des de fitxer JSON."""
+        """Carrega les calibracions actuals des del fitxer JSON."""
         try:
-            if os.path.exists(self.CALIBRATION_FILE):
-                with open(self.CALIBRATION_FILE, 'r') as f:
-                    data = json.load(f)
-                for cal_data in data['calibrations']:
-                    cal = SensorCalibration.from_dict(cal_data)
-                    self.calibrations[cal.sensor_id] = cal
+            self.store.load()
+            for cal_data in self.store.calibrations:
+                cal = SensorCalibration.from_dict(cal_data)
+                self.calibrations[cal.sensor_id] = cal
         except Exception as e:
             print(f"Error carregant calibracions: {e}")
     
+    def calibrations_for_version(self, version: str) -> Optional[Dict[int, SensorCalibration]]:
+        """
+        Recupera les calibracions d'una versió de l'historial (p.ex. per reprocessar mesures).
+        
+        Args:
+            version: Identificador de la versió (metadada 'calibration_version' de la mesura)
+            
+        Returns:
+            Diccionari sensor_id → SensorCalibration, o None si la versió no existeix
+        """
+        calibrations = self.store.get(version)
+        if calibrations is None:
+            return None
+        return {data['sensor_id']: SensorCalibration.from_dict(data) for data in calibrations}
+    
     def reset(self):
-        """Reseteja totes les calibracions."""
+        """Reseteja totes les calibracions (les versions anteriors es conserven a l'historial)."""
         self.calibrations = {
             0: SensorCalibration(0),
             1: SensorCalibration(1)
         }
-        if os.path.exists(self.CALIBRATION_FILE):
-            os.remove(self.CALIBRATION_FILE)
+        try:
+            self.store.clear_current()
+        except Exception as e:
+            print(f"Error guardant calibracions: {e}")
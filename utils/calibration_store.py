@@ -0,0 +1,113 @@
+"""
+Magatzem versionat de calibracions
+Cada calibratge desat s'identifica pel hash del seu contingut i es conserva a
+l'historial amb la data en què es va desar, de manera que les mesures poden
+referenciar la versió exacta que va produir les seves alçades.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from utils.config import CALIBRATION_FILE
+
+
+class CalibrationStore:
+    """Fitxer JSON amb el calibratge actual i l'historial de versions."""
+
+    def __init__(self, path: str = CALIBRATION_FILE):
+        """
+        Inicialitza el magatzem (el fitxer es llegeix a load()).
+
+        Args:
+            path: Camí del fitxer de calibracions
+        """
+        self.path = path
+        self.version: Optional[str] = None
+        self.calibrations: List[dict] = []
+        self.history: List[dict] = []  # [{'version', 'timestamp', 'calibrations'}, ...]
+
+    @staticmethod
+    def version_id(calibrations: List[dict]) -> str:
+        """
+        Calcula l'identificador d'un calibratge a partir del seu contingut.
+
+        Args:
+            calibrations: Calibratge de cada sensor (SensorCalibration.to_dict)
+
+        Returns:
+            Hash curt (12 caràcters hexadecimals)
+        """
+        canonical = json.dumps(calibrations, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:12]
+
+    def load(self):
+        """Llegeix el fitxer (format versionat o antic sense historial)."""
+        self.version = None
+        self.calibrations = []
+        self.history = []
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        self.calibrations = data.get('calibrations') or []
+        self.history = data.get('history', [])
+        if self.calibrations:
+            self.version = data.get('version') or self.version_id(self.calibrations)
+            if self.get(self.version) is None:
+                # Fitxer antic: el calibratge actual passa a ser la primera versió
+                modified = datetime.fromtimestamp(os.path.getmtime(self.path))
+                self.history.append({
+                    'version': self.version,
+                    'timestamp': modified.isoformat(timespec='seconds'),
+                    'calibrations': self.calibrations
+                })
+
+    def commit(self, calibrations: List[dict]) -> str:
+        """
+        Desa un calibratge com a actual i l'afegeix a l'historial si és nou.
+
+        Args:
+            calibrations: Calibratge de cada sensor
+
+        Returns:
+            Identificador de la versió
+        """
+        version = self.version_id(calibrations)
+        if self.get(version) is None:
+            self.history.append({
+                'version': version,
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'calibrations': calibrations
+            })
+        self.version = version
+        self.calibrations = calibrations
+        self.write()
+        return version
+
+    def clear_current(self):
+        """Deixa sense calibratge actual (l'historial es conserva)."""
+        self.version = None
+        self.calibrations = []
+        self.write()
+
+    def get(self, version: str) -> Optional[List[dict]]:
+        """Retorna el calibratge d'una versió de l'historial, o None si no existeix."""
+        for entry in self.history:
+            if entry['version'] == version:
+                return entry['calibrations']
+        return None
+
+    def write(self):
+        """Escriu el fitxer de forma atòmica (mai queda a mitges)."""
+        data = {
+            'version': self.version,
+            'calibrations': self.calibrations,
+            'history': self.history
+        }
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(temporary, self.path)
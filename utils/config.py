@@ -2,6 +2,10 @@
 Configuració del sistema d'adquisició de nivell d'aigua
 Universitat de Girona - Departament de Física
 """
+import os
+
+# Arrel del projecte (els fitxers de configuració no depenen del directori de treball)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # Noms de dispositius DAQmx (verificar amb NI MAX)
 DEVICE_NAME = "cDAQ1"
@@ -20,12 +24,101 @@ VOLTAGE_RANGE_MIN = -10.0  # V
 VOLTAGE_RANGE_MAX = 10.0   # V
 SAMPLE_RATE = 1000         # Hz (taxa de mostreig hardware)
 BUFFER_SIZE = 100000       # samples per buffer (augmentat per evitar overflow)
+MONITOR_SAMPLE_RATE = 100  # Hz (tasca de monitorització contínua quan no es grava)
+MONITOR_BUFFER_SIZE = 10000  # samples per buffer de monitorització
+MONITOR_INTERVAL = 0.2     # segons entre lectures del fil de monitorització
+MONITOR_RETRY_INTERVAL = 2.0  # segons d'espera abans de reconnectar després d'un error
+LIVE_VALUE_WINDOW = 1.0    # segons de mitjana dels valors en directe (displays i calibratge)
+LIVE_VALUE_DISPATCH_INTERVAL = 0.2  # segons entre actualitzacions dels subscriptors
+
+# Captura de punts de calibratge (ràfega de mostres a la freqüència completa)
+CALIBRATION_BURST_SAMPLES = 2000   # mostres per canal de cada ràfega
+CALIBRATION_SEGMENTS = 4           # trams en què es divideix la ràfega per mesurar la deriva
+CALIBRATION_MAX_STD = 0.1          # V, desviació típica màxima d'una captura estable
+CALIBRATION_MAX_DRIFT = 0.01       # V, diferència màxima entre les mitjanes dels trams
+CALIBRATION_MAX_ATTEMPTS = 3       # ràfegues abans de demanar confirmació a l'usuari
+
+# Ajust del calibratge (N punts)
+CALIBRATION_METHOD_PIECEWISE = "piecewise"    # Lineal a trams entre punts consecutius
+CALIBRATION_METHOD_POLYNOMIAL = "polynomial"  # Polinomi de mínims quadrats
+CALIBRATION_POLY_DEGREE = 2        # Grau per defecte del polinomi
+CALIBRATION_MAX_POINTS = 8         # Punts màxims per sensor al diàleg
+CALIBRATION_FILE = os.path.join(PROJECT_ROOT, "sensor_calibration.json")  # Actual + historial
+
+# Adquisició en un procés separat amb memòria compartida (vegeu daq.process)
+ACQUISITION_PROCESS_ENABLED = False
+ACQUISITION_RING_DURATION = 30.0     # segons de blocs que caben a la memòria compartida
+ACQUISITION_PROCESS_TIMEOUT = 10.0   # segons màxims per engegar o aturar el procés
+
+# Servidor de dades en directe per a altres equips (vegeu data.streaming)
+STREAM_ENABLED = False
+STREAM_HOST = "127.0.0.1"            # '0.0.0.0' per acceptar connexions de tota la xarxa local
+STREAM_PORT = 8765
+STREAM_BATCH_INTERVAL = 0.2          # segons entre enviaments (les files s'agrupen)
+STREAM_MAX_CLIENT_BUFFER = 4 * 1024 * 1024  # bytes pendents màxims per client lent
+
+# API de control local per a scripts d'automatització (vegeu utils.control_server)
+CONTROL_API_ENABLED = False
+CONTROL_HOST = "127.0.0.1"           # Només accessible des del mateix equip
+CONTROL_PORT = 8766
+CONTROL_COMMAND_TIMEOUT = 30.0       # segons màxims d'espera de cada ordre
+
+# Motor d'adquisició asíncron i servei sense interfície (vegeu daq.engine i headless.py)
+ENGINE_QUEUE_SIZE = 1000           # blocs/registres pendents màxims per cua abans de descartar-ne
+ENGINE_FLUSH_INTERVAL = 1.0        # segons mínims entre escriptures al disc de la sortida d'emmagatzematge
+
+# Període adaptatiu de les dades desades (vegeu data.adaptive)
+ADAPTIVE_SAMPLING_ENABLED = False  # Estat inicial de la casella 'Període adaptatiu'
+ADAPTIVE_MAX_FACTOR = 16           # Màxim de períodes de mostreig agrupats en una fila
+ADAPTIVE_THRESHOLD = 0.02          # V, canvi que es considera activitat
+ADAPTIVE_QUIET_TIME = 10.0         # segons sense activitat abans de doblar el període
 
 # Configuració de la interfície
 DEFAULT_SAMPLING_PERIOD = 0.1  # segons
 MIN_SAMPLING_PERIOD = 0.001    # segons
 MAX_SAMPLING_PERIOD = 10.0     # segons
-PLOT_UPDATE_INTERVAL = 10      # Actualitzar gràfica cada N mostres (més alt = menys càrrega)
+PLOT_TARGET_FPS = 20           # Refrescos de gràfica per segon durant l'adquisició
+PLOT_MIN_FPS = 2               # Mínim si el redibuix és massa lent (alentiment adaptatiu)
+PLOT_USE_OPENGL = False        # Renderitzar la gràfica amb OpenGL (GPU o OpenGL per software)
+LIVE_WINDOW_ENABLED = False    # Finestra mòbil: mostrar només els últims segons en directe
+LIVE_WINDOW_SPAN = 300.0        # Durada de la finestra mòbil (s)
+PLOT_OVERVIEW_POINTS = 2000     # Punts de la gràfica de vista general (tota la mesura)
+PLOT_DETAIL_MAX_POINTS = 10000  # Punts màxims de la gràfica de detall en navegar
+PLOT_CACHE_MAX_RAW_POINTS = 2000000  # Mostres originals en memòria (les antigues es llegeixen del disc)
+
+# Agregació de cada bloc de mostres (vegeu DataProcessor.aggregate_block)
+BLOCK_AGGREGATOR = "mean"       # 'mean', 'median', 'hampel' o 'sigma_clip'
+HAMPEL_HALF_WINDOW = 10         # mostres a cada costat de la finestra del filtre de Hampel
+HAMPEL_THRESHOLD = 3.0          # MAD escalades per considerar una mostra espúria
+SIGMA_CLIP_THRESHOLD = 3.0      # desviacions típiques del sigma-clipping
+SIGMA_CLIP_ITERATIONS = 3       # iteracions màximes del sigma-clipping
+
+# Compensació de la deriva dels sensors (vegeu data.drift)
+DRIFT_COMPENSATION_MODE = "none"  # 'none', 'zero_check' (botó Zero) o 'reference'
+DRIFT_REFERENCE_SENSOR = 1        # Sensor en un dipòsit de referència (mode 'reference')
+DRIFT_TIME_CONSTANT = 600.0       # segons de suavitzat de la deriva de referència
+DRIFT_LOG_STEP = 0.001            # V, canvi mínim de correcció per registrar-lo
+
+# Regles de detecció d'esdeveniments (vegeu data.events); llista buida = desactivat
+# Exemple: [{'name': 'Desbordament', 'channel': 0, 'quantity': 'height', 'type': 'above',
+#            'threshold': 40.0, 'hysteresis': 0.5, 'window': 0.5},
+#           {'name': 'Baixada sobtada', 'channel': 1, 'quantity': 'height', 'type': 'rate_below',
+#            'threshold': -2.0, 'hysteresis': 0.5, 'window': 1.0}]
+EVENT_RULES = []
+
+# Captura de ràfegues a freqüència completa al voltant dels esdeveniments (vegeu data.burst)
+BURST_ENABLED = False
+BURST_PRE_TRIGGER = 2.0          # segons guardats abans de l'esdeveniment
+BURST_POST_TRIGGER = 5.0         # segons guardats després de l'esdeveniment
+BURST_TRIGGER_RULES = None       # Noms de regles que disparen (None = totes les d'EVENT_RULES)
+BURST_SUFFIX = "_rafaga"         # mesura.xlsx → mesura_rafaga_001.lvz
+
+# Espectre en directe de les dades brutes (mètode de Welch)
+SPECTRUM_SEGMENT_LENGTH = 4096  # Mostres per FFT (resolució = SAMPLE_RATE / 4096 ≈ 0.24 Hz)
+SPECTRUM_OVERLAP = 0.5          # Solapament entre segments
+SPECTRUM_AVERAGES = 8           # Segments recents promitjats
+SPECTRUM_UPDATE_INTERVAL = 0.25 # Interval mínim entre refrescos de l'espectre (s)
+SPECTRUM_MAX_FREQUENCY = 20.0   # Freqüència màxima mostrada per defecte (Hz)
 
 # Configuració de colors per a la gràfica
 PLOT_COLORS = ['#4A90E2', '#E24A4A']  # Blau, Vermell
@@ -34,9 +127,36 @@ PLOT_COLORS = ['#4A90E2', '#E24A4A']  # Blau, Vermell
 SENSOR_STABILIZATION_TIME = 0.1  # segons
 
 # Configuració de fitxers
+MESURES_DIR = "Mesures"         # Directori on es guarden les mesures
 DEFAULT_FILENAME_PATTERN = "mesura_%Y%m%d_%H%M%S.xlsx"
 FILE_EXTENSION = ".xlsx"
 
+# Format comprimit per arxius de llarga durada (XOR + zstd/lz4/zlib)
+COMPRESSED_FILE_EXTENSION = ".lvz"
+COMPRESSION_CODEC = "auto"      # 'auto', 'zstd', 'lz4' o 'zlib'
+COMPRESSED_FRAME_ROWS = 1000    # Files mínimes per trama comprimida
+COMPRESSED_MAX_FRAME_AGE = 60.0 # segons màxims que una fila pot esperar en memòria abans d'escriure-la
+SUPPORTED_FILE_EXTENSIONS = (FILE_EXTENSION, COMPRESSED_FILE_EXTENSION)
+
+# Segmentació de mesures molt llargues (rotació de fitxers amb manifest)
+SEGMENT_ROTATION_ENABLED = False
+SEGMENT_MAX_DURATION = 6 * 3600          # segons per segment
+SEGMENT_MAX_SIZE = 50 * 1024 * 1024      # bytes per segment
+MANIFEST_EXTENSION = ".manifest.json"
+
+# Catàleg de mesures (índex SQLite dins del directori de mesures)
+CATALOG_FILENAME = "cataleg.sqlite"
+CATALOG_FILE_EXTENSIONS = SUPPORTED_FILE_EXTENSIONS + (MANIFEST_EXTENSION,)  # S'indexen
+
+# Resum estadístic guardat amb cada mesura
+SUMMARY_BLOCK_DURATION = 60.0   # segons per bloc d'estadístiques
+
+# Fitxer de resum decimat (min/mitjana/max) escrit en paral·lel a les dades completes
+OVERVIEW_ENABLED = True
+OVERVIEW_INTERVAL = 1.0         # segons per fila de resum
+OVERVIEW_SUFFIX = "_resum"      # mesura.xlsx → mesura_resum.xlsx
+PLOT_MAX_LOAD_POINTS = 200000   # Per sobre d'aquestes mostres es carrega el resum
+
 # Títols i etiquetes
 WINDOW_TITLE = "Sistema d'Adquisició de Nivell d'Aigua - UdG"
 INSTITUTION_FOOTER = "Departament de Física · Universitat de Girona"
@@ -0,0 +1,148 @@
+"""
+API de control local (HTTP/JSON) per a scripts d'automatització
+Les peticions s'atenen en fils propis del servidor; cada ordre es passa a un
+executor (p.ex. gui.control_bridge.ControlBridge, que l'executa al fil de la
+interfície) i se n'espera el resultat, de manera que la xarxa mai bloqueja el
+bucle d'adquisició.
+
+Rutes:
+- GET  /status   estat de l'aplicació i últimes lectures
+- GET  /metrics  comptadors de la mesura en curs
+- POST /start    inicia una mesura; cos JSON opcional
+                 {"period": 0.1, "filename": "mesura.xlsx", "adaptive": false, "overwrite": false}
+- POST /stop     atura la mesura en curs
+Les respostes són JSON amb 'success' i 'message' (200 si ha anat bé, 409 si
+l'ordre no s'ha pogut fer, 400/404 per peticions incorrectes).
+"""
+import json
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Tuple
+
+from utils.config import CONTROL_HOST, CONTROL_PORT, CONTROL_COMMAND_TIMEOUT
+
+ROUTES = {
+    ('GET', '/status'): 'status',
+    ('GET', '/metrics'): 'metrics',
+    ('POST', '/start'): 'start',
+    ('POST', '/stop'): 'stop',
+}
+
+
+class ControlServer:
+    """Servidor HTTP de l'API de control en un fil de fons."""
+
+    def __init__(self, execute: Callable[[str, dict, float], dict],
+                 host: str = CONTROL_HOST, port: int = CONTROL_PORT,
+                 timeout: float = CONTROL_COMMAND_TIMEOUT):
+        """
+        Inicialitza el servidor (s'obre a start()).
+
+        Args:
+            execute: Funció (ordre, paràmetres, temps màxim) → diccionari de resultat amb
+                'success'; es crida des dels fils del servidor
+            host: Adreça on escoltar ('127.0.0.1' només local)
+            port: Port TCP (0 per triar-ne un de lliure)
+            timeout: Temps màxim d'espera de cada ordre (s)
+        """
+        self.execute = execute
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Indica si el servidor està escoltant."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> Tuple[bool, str]:
+        """
+        Obre el port i engega el fil del servidor.
+
+        Returns:
+            Tupla (success, error_message)
+        """
+        if self.is_running:
+            return True, ""
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        except OSError as e:
+            return False, f"Error obrint l'API de control a {self.host}:{self.port}: {e}"
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="ControlServer", daemon=True)
+        self._thread.start()
+        return True, ""
+
+    def stop(self):
+        """Tanca el servidor."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        """
+        Atén una petició.
+
+        Args:
+            method: Mètode HTTP
+            path: Ruta (sense paràmetres de consulta)
+            body: Cos de la petició
+
+        Returns:
+            Tupla (codi HTTP, resposta JSON)
+        """
+        command = ROUTES.get((method, path))
+        if command is None:
+            return 404, {'success': False, 'message': f"Ruta desconeguda: {method} {path}"}
+        try:
+            params = json.loads(body) if body.strip() else {}
+        except ValueError as e:
+            return 400, {'success': False, 'message': f"JSON invàlid: {e}"}
+        if not isinstance(params, dict):
+            return 400, {'success': False, 'message': "El cos ha de ser un objecte JSON"}
+
+        try:
+            result = self.execute(command, params, self.timeout)
+        except FutureTimeoutError:
+            return 503, {'success': False, 'message': "L'aplicació no ha respost a temps"}
+        except (TypeError, ValueError) as e:
+            return 400, {'success': False, 'message': str(e)}
+        except Exception as e:
+            return 500, {'success': False, 'message': str(e)}
+        return (200 if result.get('success', True) else 409), result
+
+    def _handler_class(self):
+        """Classe de gestor de peticions lligada a aquest servidor."""
+        control = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._respond()
+
+            def do_POST(self):
+                self._respond()
+
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                status, result = control.handle(self.command, self.path.split('?', 1)[0], body)
+                payload = json.dumps(result).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # Sense una línia a la consola per cada petició
+
+        return Handler
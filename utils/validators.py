@@ -2,7 +2,7 @@
 Validadors per inputs de l'usuari
 """
 import os
-from utils.config import MIN_SAMPLING_PERIOD, MAX_SAMPLING_PERIOD, FILE_EXTENSION
+from utils.config import MIN_SAMPLING_PERIOD, MAX_SAMPLING_PERIOD, SUPPORTED_FILE_EXTENSIONS
 
 
 def validate_sampling_period(period: float) -> tuple[bool, str]:
@@ -37,8 +37,9 @@ def validate_filename(filename: str) -> tuple[bool, str]:
     if not filename:
         return False, "El nom del fitxer no pot estar buit"
     
-    if not filename.endswith(FILE_EXTENSION):
-        return False, f"El fitxer ha de tenir extensió {FILE_EXTENSION}"
+    if not filename.endswith(SUPPORTED_FILE_EXTENSIONS):
+        extensions = " o ".join(SUPPORTED_FILE_EXTENSIONS)
+        return False, f"El fitxer ha de tenir extensió {extensions}"
     
     # Comprovar caràcters invàlids per a noms de fitxer
     invalid_chars = '<>:"|?*'